@@ -0,0 +1,103 @@
+"""Benchmark the checksum features on the saved HTML fixtures.
+
+Compare the features of the whole page, which were used by the GSC checksums,
+with the region features of `RegionFeature`. For every site, the fixtures are
+`{site}.html`, `{site}_volatile.html` with only volatile nodes (ads, CSRF tokens, timestamps) changed,
+and `{site}_changed.html` with the listing changed.
+A crawl triggered by the volatile page is a false positive.
+
+    python -m benchmarks.checksum_features --repeat 200
+"""
+import argparse
+import re
+import statistics
+import time
+from hashlib import md5
+from pathlib import Path
+from typing import Callable
+
+from bs4 import BeautifulSoup
+
+from figure_hook.SourceChecksum.delay_checksum import GSCDelayChecksum
+from figure_hook.SourceChecksum.features import RegionFeature
+from figure_hook.SourceChecksum.product_announcement_checksum import \
+    GSCProductAnnouncementChecksum
+from figure_hook.SourceChecksum.shipment_checksum import GSCShipmentChecksum
+
+fixtures = Path(__file__).parent.parent / "tests" / "fixtures" / "html"
+
+
+def whole_page_feature(content: bytes) -> list[bytes]:
+    return [content]
+
+
+def beautifulsoup_delay_feature(content: bytes) -> list[bytes]:
+    page = BeautifulSoup(content, 'lxml')
+    release_date_relations = page.find_all('span', string=re.compile('発売時期|発売延期|発売月'), attrs={'class': "newsTtlBd"})
+    return [content, str(len(release_date_relations)).encode()]
+
+
+sites: dict[str, dict[str, Callable[[bytes], list[bytes]]]] = {
+    "gsc_announcement": {
+        "whole page": whole_page_feature,
+        "region": GSCProductAnnouncementChecksum.region.extract,
+    },
+    "gsc_delay": {
+        "beautifulsoup": beautifulsoup_delay_feature,
+        "region": GSCDelayChecksum.region.extract,
+    },
+    "gsc_shipment": {
+        "body": RegionFeature("body").extract,
+        "region": GSCShipmentChecksum.region.extract,
+    },
+}
+
+
+def digest(features: list[bytes]) -> str:
+    m = md5()
+    for feature in features:
+        m.update(feature)
+    return m.hexdigest()
+
+
+def crawls(extract: Callable[[bytes], list[bytes]], pages: list[bytes]) -> int:
+    """Count the crawls triggered by polling the pages in order."""
+    previous = digest(extract(pages[0]))
+    triggered = 0
+    for page in pages[1:]:
+        current = digest(extract(page))
+        triggered += current != previous
+        previous = current
+    return triggered
+
+
+def measure(extract: Callable[[bytes], list[bytes]], content: bytes, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        digest(extract(content))
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main(repeat: int):
+    print(f"{'site':<18} {'feature':<14} {'digest (ms)':>11} {'crawls':>7} {'false positive':>15}")
+    for site, features in sites.items():
+        original = (fixtures / f"{site}.html").read_bytes()
+        volatile = (fixtures / f"{site}_volatile.html").read_bytes()
+        changed = (fixtures / f"{site}_changed.html").read_bytes()
+        # poll the volatile page before the changed page, only the last crawl is expected.
+        pages = [original, volatile, original, volatile, changed]
+
+        for name, extract in features.items():
+            triggered = crawls(extract, pages)
+            false_positive = triggered - crawls(extract, [original, changed])
+            parse_time = measure(extract, original, repeat)
+            print(f"{site:<18} {name:<14} {parse_time:>11.3f} {triggered:>7} {false_positive:>15}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
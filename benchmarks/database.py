@@ -0,0 +1,41 @@
+"""Database for the benchmarks which would drop all tables."""
+import os
+
+from sqlalchemy import create_engine
+
+
+def create_benchmark_engine(yes_drop: bool = False):
+    """Create engine for `BENCHMARK_POSTGRES_DATABASE`.
+
+    The benchmark database should be different from `POSTGRES_DATABASE`,
+    or `yes_drop` should be given to confirm dropping the tables in `POSTGRES_DATABASE`.
+
+    Raises
+    ----------
+    SystemExit
+        The database to drop wasn't confirmed.
+    """
+    database = os.getenv("BENCHMARK_POSTGRES_DATABASE")
+    if not database and yes_drop:
+        database = os.getenv("POSTGRES_DATABASE")
+
+    if not database:
+        raise SystemExit(
+            "Set BENCHMARK_POSTGRES_DATABASE to a disposable database, "
+            "or pass --yes-drop to drop all tables in POSTGRES_DATABASE."
+        )
+
+    if database == os.getenv("POSTGRES_DATABASE") and not yes_drop:
+        raise SystemExit(
+            "BENCHMARK_POSTGRES_DATABASE is the same as POSTGRES_DATABASE, "
+            "pass --yes-drop to drop all tables in it."
+        )
+
+    db_url = os.getenv("POSTGRES_URL")
+    db_user = os.getenv('POSTGRES_USER')
+    db_pw = os.getenv('POSTGRES_PASSWORD')
+    return create_engine(
+        f"postgresql+psycopg2://{db_user}:{db_pw}@{db_url}/{database}",
+        echo=False,
+        future=True
+    )
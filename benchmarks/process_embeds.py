@@ -0,0 +1,58 @@
+"""Benchmark splitting the embeds into Discord batches.
+
+Compare the previous `process_embeds`, which replaced the slices of the list in place,
+with the lazy batching of `process_embeds`. The batching is measured on plain objects,
+which aren't counted by characters, and on `Embed`, whose characters are counted by `len`.
+
+    python -m benchmarks.process_embeds --repeat 20
+"""
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Iterable
+
+from discord import Embed
+
+from figure_hook.Publishers.discord_hooker import process_embeds
+
+
+def slicing_process_embeds(embeds: list[Any], batch_size: int = 10) -> list[list[Any]]:
+    complete_batch_amount = len(embeds) // batch_size
+    for i in range(complete_batch_amount+1):
+        embeds[i:i+batch_size] = [embeds[i:i+batch_size]]
+
+    return embeds
+
+
+def make_embeds(amount: int) -> list[Embed]:
+    return [
+        Embed(title=f"product-{i}", description="description " * (i % 50)).add_field(name="price", value="¥12,000")
+        for i in range(amount)
+    ]
+
+
+def measure(split: Callable[[list[Any]], Iterable[list[Any]]], embeds: list[Any], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in split(embeds):
+            pass
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main(repeat: int):
+    print(f"{'embeds':>8} {'slicing (ms)':>14} {'generator (ms)':>16} {'generator, Embed (ms)':>23}")
+    for amount in (1000, 10000, 50000, 200000):
+        objects = list(range(amount))
+        slicing = measure(lambda embeds: slicing_process_embeds(embeds.copy()), objects, repeat)
+        generator = measure(process_embeds, objects, repeat)
+        counted = measure(process_embeds, make_embeds(amount), repeat)
+        print(f"{amount:>8} {slicing:>14.3f} {generator:>16.3f} {counted:>23.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,94 @@
+"""Benchmark the latency of the release feed query.
+
+Seed N products with `utils/db_fake_data.py` and measure the query used by
+`ReleaseHelper.fetch_new_releases` with and without the release feed indexes.
+
+**All tables in the database would be dropped**, run it with a disposable database
+set in `BENCHMARK_POSTGRES_DATABASE`, or pass `--yes-drop` to use `POSTGRES_DATABASE`.
+
+    BENCHMARK_POSTGRES_DATABASE=figure_benchmark python -m benchmarks.release_feed_query 1000 5000 10000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from benchmarks.database import create_benchmark_engine
+from figure_hook.Helpers.db_helper import _make_release_feed_statement
+from figure_hook.Models import ProductReleaseInfo
+from figure_hook.Models.base import Model
+from utils.db_fake_data import insert_fake_products
+
+release_feed_indexes = (
+    "ix_product_series_id",
+    "ix_product_manufacturer_id",
+    "ix_product_release_info_product_id",
+    "ix_product_release_info_created_at",
+    "ix_product_official_image_product_id_order",
+    "ix_product_official_image_cover",
+)
+checkpoint = datetime(2020, 12, 1)
+seed_batch_size = 1000
+repeat = 7
+
+
+def seed(engine, amount: int):
+    Model.metadata.drop_all(bind=engine)
+    Model.metadata.create_all(bind=engine)
+
+    with Session(engine) as session:
+        Model.set_session(session)
+        for offset in range(0, amount, seed_batch_size):
+            insert_fake_products(session, min(seed_batch_size, amount - offset))
+            session.commit()
+
+        # spread the releases over 6 years, so the checkpoint would select about 1.5% of them.
+        session.execute(text(
+            "UPDATE product_release_info "
+            "SET created_at = timestamp '2015-01-01' + random() * interval '6 years'"
+        ))
+        session.commit()
+        Model.set_session(None)  # type: ignore
+
+
+def measure(engine) -> tuple[float, int]:
+    stmt = _make_release_feed_statement(ProductReleaseInfo.created_at >= checkpoint)
+    durations = []
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = conn.execute(stmt).all()
+            durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations) * 1000, len(rows)
+
+
+def drop_indexes(engine):
+    with engine.begin() as conn:
+        for index in release_feed_indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+
+def main(amounts: list[int], yes_drop: bool = False):
+    engine = create_benchmark_engine(yes_drop)
+    print(f"{'products':>10} {'rows':>8} {'indexed (ms)':>14} {'no index (ms)':>14}")
+    for amount in amounts:
+        seed(engine, amount)
+        indexed_latency, rows = measure(engine)
+        drop_indexes(engine)
+        seq_scan_latency, _ = measure(engine)
+        print(f"{amount:>10} {rows:>8} {indexed_latency:>14.2f} {seq_scan_latency:>14.2f}")
+
+    Model.metadata.drop_all(bind=engine)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("amounts", type=int, nargs="*", default=[1000, 5000, 10000])
+    parser.add_argument("--yes-drop", action="store_true", help="drop all tables in POSTGRES_DATABASE")
+    args = parser.parse_args()
+    main(args.amounts, args.yes_drop)
@@ -0,0 +1,95 @@
+"""Benchmark writing back the webhook status after a Discord push.
+
+Compare the previous write-back, one `UPDATE` with `synchronize_session="fetch"` per webhook,
+with `Webhook.update_status`, which updates the dead and the alive webhooks in two statements.
+
+**All tables in the database would be dropped**, run it with a disposable database
+set in `BENCHMARK_POSTGRES_DATABASE`, or pass `--yes-drop` to use `POSTGRES_DATABASE`.
+
+    BENCHMARK_POSTGRES_DATABASE=figure_benchmark python -m benchmarks.webhook_status_update 100 1000 10000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from benchmarks.database import create_benchmark_engine
+from figure_hook.Models import Webhook
+from figure_hook.Models.base import Model
+
+repeat = 5
+# a webhook of every `dead_ratio` would be dead.
+dead_ratio = 10
+
+
+def seed(engine, amount: int) -> dict[str, bool]:
+    Model.metadata.drop_all(bind=engine)
+    Model.metadata.create_all(bind=engine)
+    rows = [
+        {"channel_id": f"channel-{i}", "id": f"webhook-{i}", "token": "token", "is_existed": True, "lang": "en"}
+        for i in range(amount)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Webhook.__table__), rows)
+
+    return {f"webhook-{i}": bool(i % dead_ratio) for i in range(amount)}
+
+
+def update_one_by_one(session: Session, webhook_status: dict[str, bool]):
+    for webhook_id, is_existed in webhook_status.items():
+        stmt = update(Webhook).where(
+            Webhook.id == webhook_id
+        ).values(
+            is_existed=is_existed
+        ).execution_options(
+            synchronize_session="fetch"
+        )
+        session.execute(stmt)
+
+
+def measure(engine, write_back, webhook_status: dict[str, bool]) -> tuple[float, int]:
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+
+    durations = []
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        for _ in range(repeat):
+            statements.clear()
+            with Session(engine) as session:
+                start = time.perf_counter()
+                write_back(session, webhook_status)
+                session.flush()
+                durations.append(time.perf_counter() - start)
+                session.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    return statistics.median(durations) * 1000, len(statements)
+
+
+def main(amounts: list[int], yes_drop: bool = False):
+    engine = create_benchmark_engine(yes_drop)
+    print(f"{'webhooks':>10} {'per row (ms)':>13} {'statements':>11} {'bulk (ms)':>10} {'statements':>11}")
+    for amount in amounts:
+        webhook_status = seed(engine, amount)
+        per_row_latency, per_row_statements = measure(engine, update_one_by_one, webhook_status)
+        bulk_latency, bulk_statements = measure(engine, Webhook.update_status, webhook_status)
+        print(
+            f"{amount:>10} {per_row_latency:>13.2f} {per_row_statements:>11} "
+            f"{bulk_latency:>10.2f} {bulk_statements:>11}"
+        )
+
+    Model.metadata.drop_all(bind=engine)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("amounts", type=int, nargs="*", default=[100, 1000, 10000])
+    parser.add_argument("--yes-drop", action="store_true", help="drop all tables in POSTGRES_DATABASE")
+    args = parser.parse_args()
+    main(args.amounts, args.yes_drop)
@@ -0,0 +1,38 @@
+"""add release feed indexes
+
+Revision ID: 3c9d1e6f0a42
+Revises: 77263c67479f
+Create Date: 2022-04-02 14:08:21.503118
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3c9d1e6f0a42'
+down_revision = '77263c67479f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_product_url', 'product', ['url'])
+    op.create_index('ix_product_series_id', 'product', ['series_id'])
+    op.create_index('ix_product_manufacturer_id', 'product', ['manufacturer_id'])
+    op.create_index('ix_product_release_info_product_id', 'product_release_info', ['product_id'])
+    op.create_index('ix_product_release_info_created_at', 'product_release_info', ['created_at'])
+    op.create_index('ix_product_official_image_product_id_order', 'product_official_image', ['product_id', 'order'])
+    op.create_index(
+        'ix_product_official_image_cover', 'product_official_image', ['product_id'],
+        postgresql_where=sa.text('"order" = 1')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_product_official_image_cover', table_name='product_official_image')
+    op.drop_index('ix_product_official_image_product_id_order', table_name='product_official_image')
+    op.drop_index('ix_product_release_info_created_at', table_name='product_release_info')
+    op.drop_index('ix_product_release_info_product_id', table_name='product_release_info')
+    op.drop_index('ix_product_manufacturer_id', table_name='product')
+    op.drop_index('ix_product_series_id', table_name='product')
+    op.drop_index('ix_product_url', table_name='product')
@@ -0,0 +1,39 @@
+"""add publish job
+
+Revision ID: 5d0e7a3b9c21
+Revises: 8b2f4c1d7e90
+Create Date: 2022-04-05 21:37:09.148226
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5d0e7a3b9c21'
+down_revision = '8b2f4c1d7e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'publish_job',
+        sa.Column('release_id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.ForeignKeyConstraint(['release_id'], ['product_release_info.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('release_id', 'target')
+    )
+    op.create_index(
+        'ix_publish_job_target_next_attempt_at', 'publish_job', ['target', 'next_attempt_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_publish_job_target_next_attempt_at', table_name='publish_job')
+    op.drop_table('publish_job')
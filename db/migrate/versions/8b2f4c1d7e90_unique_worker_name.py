@@ -0,0 +1,51 @@
+"""unique worker name
+
+Revision ID: 8b2f4c1d7e90
+Revises: 3c9d1e6f0a42
+Create Date: 2022-04-03 10:21:47.215532
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8b2f4c1d7e90'
+down_revision = '3c9d1e6f0a42'
+branch_labels = None
+depends_on = None
+
+worker_tables = (
+    ('paintwork', 'product_paintwork', 'paintwork_id'),
+    ('sculptor', 'product_sculptor', 'sculptor_id'),
+)
+
+
+def upgrade():
+    for worker_table, relation_table, worker_id in worker_tables:
+        # keep the worker with the smallest id and repoint the products to it.
+        op.execute(sa.text(f"""
+            UPDATE {relation_table} AS r
+            SET {worker_id} = k.id
+            FROM {worker_table} AS w
+            JOIN (SELECT name, min(id) AS id FROM {worker_table} GROUP BY name) AS k ON k.name = w.name
+            WHERE r.{worker_id} = w.id AND w.id <> k.id
+        """))
+        op.execute(sa.text(f"""
+            DELETE FROM {relation_table} AS a
+            USING {relation_table} AS b
+            WHERE a.ctid > b.ctid
+            AND a.product_id = b.product_id
+            AND a.{worker_id} = b.{worker_id}
+        """))
+        op.execute(sa.text(f"""
+            DELETE FROM {worker_table} AS a
+            USING {worker_table} AS b
+            WHERE a.name = b.name AND a.id > b.id
+        """))
+        op.create_unique_constraint(f'{worker_table}_name_key', worker_table, ['name'])
+
+
+def downgrade():
+    # the merged workers couldn't be restored.
+    for worker_table, _, _ in worker_tables:
+        op.drop_constraint(f'{worker_table}_name_key', worker_table, type_='unique')
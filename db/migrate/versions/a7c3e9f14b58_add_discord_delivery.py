@@ -0,0 +1,37 @@
+"""add discord delivery
+
+Revision ID: a7c3e9f14b58
+Revises: 5d0e7a3b9c21
+Create Date: 2022-04-07 22:12:51.630114
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f14b58'
+down_revision = '5d0e7a3b9c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'discord_delivery',
+        sa.Column('channel_id', sa.String(), nullable=False),
+        sa.Column('release_id', sa.Integer(), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['channel_id'], ['webhook.channel_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['release_id'], ['product_release_info.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('channel_id', 'release_id')
+    )
+    op.create_index(
+        'ix_discord_delivery_pending', 'discord_delivery', ['channel_id', 'release_id'],
+        postgresql_where=sa.text('delivered_at IS NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_discord_delivery_pending', table_name='discord_delivery')
+    op.drop_table('discord_delivery')
@@ -0,0 +1,31 @@
+"""webhook live group index
+
+Revision ID: a8d2c5f0e7b3
+Revises: f3b7d1e5a9c4
+Create Date: 2022-04-16 15:21:04.381927
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a8d2c5f0e7b3'
+down_revision = 'f3b7d1e5a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_webhook_live', table_name='webhook')
+    op.create_index(
+        'ix_webhook_live_group', 'webhook', ['lang', 'is_nsfw', 'channel_id'],
+        unique=False, postgresql_where=sa.text('is_existed IS NOT false')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_webhook_live_group', table_name='webhook')
+    op.create_index(
+        'ix_webhook_live', 'webhook', ['channel_id'],
+        unique=False, postgresql_where=sa.text('is_existed IS NOT false')
+    )
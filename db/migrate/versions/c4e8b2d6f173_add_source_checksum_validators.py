@@ -0,0 +1,25 @@
+"""add source checksum validators
+
+Revision ID: c4e8b2d6f173
+Revises: a7c3e9f14b58
+Create Date: 2022-04-09 15:31:08.204417
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8b2d6f173'
+down_revision = 'a7c3e9f14b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('source_checksum', sa.Column('etag', sa.String(), nullable=True))
+    op.add_column('source_checksum', sa.Column('last_modified', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('source_checksum', 'last_modified')
+    op.drop_column('source_checksum', 'etag')
@@ -0,0 +1,35 @@
+"""notify new release
+
+Revision ID: e1f6a9c3b2d8
+Revises: c4e8b2d6f173
+Create Date: 2022-04-12 21:46:19.513370
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e1f6a9c3b2d8'
+down_revision = 'c4e8b2d6f173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    CREATE OR REPLACE FUNCTION notify_product_release_info_inserted() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('product_release_info_inserted', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER product_release_info_inserted
+    AFTER INSERT ON product_release_info
+    FOR EACH STATEMENT EXECUTE PROCEDURE notify_product_release_info_inserted();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS product_release_info_inserted ON product_release_info;")
+    op.execute("DROP FUNCTION IF EXISTS notify_product_release_info_inserted();")
@@ -0,0 +1,30 @@
+"""webhook revalidation
+
+Revision ID: f3b7d1e5a9c4
+Revises: e1f6a9c3b2d8
+Create Date: 2022-04-14 20:08:37.915624
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d1e5a9c4'
+down_revision = 'e1f6a9c3b2d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('webhook', sa.Column('missing_count', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('webhook', sa.Column('checked_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_webhook_live', 'webhook', ['channel_id'],
+        unique=False, postgresql_where=sa.text('is_existed IS NOT false')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_webhook_live', table_name='webhook')
+    op.drop_column('webhook', 'checked_at')
+    op.drop_column('webhook', 'missing_count')
@@ -1,5 +1,15 @@
-from discord import Webhook, WebhookAdapter
+import json
+import time
+from threading import Lock
+from typing import Any, Callable, Optional
+from urllib.parse import quote as _uriquote
+
+from discord import RequestsWebhookAdapter, Webhook, WebhookAdapter, utils
+from discord.errors import (DiscordServerError, Forbidden, HTTPException,
+                            NotFound)
+
 from figure_hook.Models import Webhook as WebhookModel
+from figure_hook.utils.rate_limit import TokenBucket
 
 
 class DiscordWebhookAdapter:
@@ -10,3 +20,181 @@ class DiscordWebhookAdapter:
             adapter=webhook_adapter
         )
         return webhook
+
+
+class DiscordRateLimiter:
+    """Track the rate limit buckets of Discord.
+
+    Every webhook has its own bucket which is updated from `X-RateLimit-*` headers,
+    the global bucket is shared by all webhooks. The limiter could be shared between threads.
+
+    Parameters
+    -----------
+    global_rate: `float`
+        Maximum requests per second for all webhooks.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 50,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._global_bucket = TokenBucket(rate=global_rate, capacity=global_rate, clock=clock, sleep=sleep)
+        self._global_reset_at = 0.0
+        self._buckets: dict[str, tuple[int, float]] = {}
+        self._lock = Lock()
+        self.rate_limited_count = 0
+
+    def acquire(self, key: str):
+        """Block until the bucket of `key` and the global bucket allow a request."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait = self._global_reset_at - now
+                remaining, reset_at = self._buckets.get(key, (1, now))
+
+                if reset_at <= now:
+                    self._buckets.pop(key, None)
+                elif remaining <= 0:
+                    wait = max(wait, reset_at - now)
+
+                if wait <= 0:
+                    if key in self._buckets:
+                        self._buckets[key] = (remaining - 1, reset_at)
+                    break
+
+            self._sleep(wait)
+
+        self._global_bucket.acquire()
+
+    def update(self, key: str, headers):
+        """Update the bucket with the `X-RateLimit-*` headers of response."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is None or reset_after is None:
+            return
+
+        with self._lock:
+            self._buckets[key] = (int(remaining), self._clock() + float(reset_after))
+
+    def rate_limited(self, key: str, retry_after: float, is_global: bool = False):
+        """Block the bucket of `key` or the global bucket for `retry_after` seconds."""
+        with self._lock:
+            self.rate_limited_count += 1
+            reset_at = self._clock() + retry_after
+            if is_global:
+                self._global_reset_at = max(self._global_reset_at, reset_at)
+            else:
+                self._buckets[key] = (0, reset_at)
+
+    def backoff(self, seconds: float):
+        """Wait for `seconds` before retrying the failed request."""
+        self._sleep(seconds)
+
+
+def _parse_rate_limited_response(response, data: Any) -> tuple[float, bool]:
+    """Return `retry_after` in seconds and whether the global rate limit was hit."""
+    if isinstance(data, dict) and 'retry_after' in data:
+        # the api version used by discord.py reports `retry_after` in milliseconds.
+        retry_after = data['retry_after'] / 1000.0
+        is_global = bool(data.get('global'))
+    else:
+        retry_after = float(response.headers.get('Retry-After', 1))
+        is_global = False
+
+    is_global = is_global or response.headers.get('X-RateLimit-Global') == 'true'
+    return retry_after, is_global
+
+
+class RateLimitedWebhookAdapter(RequestsWebhookAdapter):
+    """A webhook adapter which waits for the rate limit buckets before sending.
+
+    Responses with 429 would be retried after the advertised wait for `max_retries` times.
+
+    Parameters
+    -----------
+    session: Optional[`requests.Session`]
+        The requests session to use for sending requests.
+    rate_limiter: `DiscordRateLimiter`
+        Rate limiter which should be shared by every adapter in the same push.
+    max_retries: `int`
+        Maximum retries when the request is rate limited or Discord is unavailable.
+    """
+
+    def __init__(self, session=None, *, rate_limiter: DiscordRateLimiter, max_retries: int = 5):
+        super().__init__(session=session, sleep=True)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+
+    def request(self, verb, url, payload=None, multipart=None, *, files=None, reason=None):
+        headers = {}
+        data = None
+        files = files or []
+        if payload:
+            headers['Content-Type'] = 'application/json'
+            data = utils.to_json(payload)
+
+        if reason:
+            headers['X-Audit-Log-Reason'] = _uriquote(reason, safe='/ ')
+
+        if multipart is not None:
+            data = {'payload_json': multipart.pop('payload_json')}
+
+        return self._request(verb, url, headers=headers, data=data, files=files, multipart=multipart)
+
+    def execute_payload(self, payload: bytes):
+        """Execute the webhook with the payload which was serialized to JSON in advance."""
+        url = f'{self._request_url}?wait=0'
+        return self._request('POST', url, headers={'Content-Type': 'application/json'}, data=payload)
+
+    def _request(self, verb, url, *, headers, data, files=(), multipart=None) -> Optional[Any]:
+        bucket = str(self._webhook_id)
+        for tries in range(self.max_retries + 1):
+            for file in files:
+                file.reset(seek=tries)
+
+            self.rate_limiter.acquire(bucket)
+            r = self.session.request(verb, url, headers=headers, data=data, files=multipart)
+            r.encoding = 'utf-8'
+            # Coerce empty responses to return None for hygiene purposes
+            response = r.text or None
+
+            # compatibility with aiohttp
+            r.status = r.status_code
+
+            if response and r.headers.get('Content-Type') == 'application/json':
+                response = json.loads(response)
+
+            self.rate_limiter.update(bucket, r.headers)
+
+            if 300 > r.status >= 200:
+                return response
+
+            if r.status == 429:
+                if not r.headers.get('Via'):
+                    # Banned by Cloudflare more than likely.
+                    raise HTTPException(r, response)
+
+                retry_after, is_global = _parse_rate_limited_response(r, response)
+                self.rate_limiter.rate_limited(bucket, retry_after, is_global)
+                continue
+
+            if r.status in (500, 502):
+                if tries < self.max_retries:
+                    self.rate_limiter.backoff(1 + tries * 2)
+                continue
+
+            if r.status == 403:
+                raise Forbidden(r, response)
+            elif r.status == 404:
+                raise NotFound(r, response)
+            else:
+                raise HTTPException(r, response)
+
+        # no more retries
+        if r.status >= 500:
+            raise DiscordServerError(r, response)
+        raise HTTPException(r, response)
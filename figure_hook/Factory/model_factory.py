@@ -1,29 +1,47 @@
-from typing import List
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Tuple
 
 from figure_parser.product import ProductBase
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import selectinload
 
 from figure_hook.exceptions import ReleaseInfosConflictError
 from figure_hook.Models import Category, Company, Paintwork
 from figure_hook.Models import Product as ProductModel
 from figure_hook.Models import (ProductOfficialImage, ProductReleaseInfo,
                                 Sculptor, Series)
+from figure_hook.Models.relation_table import (product_paintwork_table,
+                                               product_sculptor_table)
 from figure_hook.Helpers.release_info_helper import (ReleaseInfoHelper,
                                                      ReleaseInfosSolution,
                                                      ReleaseInfosStatus)
 
 __all__ = (
     "ProductModelFactory",
+    "BulkUpsertResult",
 )
 
 
+@dataclass
+class BulkUpsertResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicated: int = 0
+    conflicted_urls: List[str] = field(default_factory=list)
+
+
 class ProductModelFactory:
     @staticmethod
     def createProduct(product_dataclass: ProductBase) -> ProductModel:
-        series = Series.as_unique(name=product_dataclass.series)
-        manufacturer = Company.as_unique(name=product_dataclass.manufacturer)
-        category = Category.as_unique(name=product_dataclass.category)
-        releaser = Company.as_unique(name=product_dataclass.releaser)
-        distributer = Company.as_unique(name=product_dataclass.distributer)
+        series, = Series.as_unique_many([product_dataclass.series])
+        category, = Category.as_unique_many([product_dataclass.category])
+        manufacturer, releaser, distributer = Company.as_unique_many([
+            product_dataclass.manufacturer,
+            product_dataclass.releaser,
+            product_dataclass.distributer
+        ])
 
         paintworks = Paintwork.multiple_as_unique(product_dataclass.paintworks)
         sculptors = Sculptor.multiple_as_unique(product_dataclass.sculptors)
@@ -73,8 +91,9 @@ class ProductModelFactory:
         return product
 
     @staticmethod
-    def updateProduct(product_dataclass: ProductBase, product_model: ProductModel) -> ProductModel:
+    def updateProduct(product_dataclass: ProductBase, product_model: ProductModel, flush: bool = True) -> ProductModel:
         """Should be called in database session.
+        :param flush: Flush the changes immediately, leave it to caller when updating many products.
         :raise ReleaseInfosConflictError: Unable to sync the release_infos
         """
         release_info_solution = ReleaseInfosSolution()
@@ -89,17 +108,19 @@ class ProductModelFactory:
             raise ReleaseInfosConflictError(product_dataclass.url)
 
         # unique attribute
-        series = Series.as_unique(name=product_dataclass.series)
-        manufacturer = Company.as_unique(name=product_dataclass.manufacturer)
-        category = Category.as_unique(name=product_dataclass.category)
-        releaser = Company.as_unique(name=product_dataclass.releaser)
-        distributer = Company.as_unique(name=product_dataclass.distributer)
+        series, = Series.as_unique_many([product_dataclass.series])
+        category, = Category.as_unique_many([product_dataclass.category])
+        manufacturer, releaser, distributer = Company.as_unique_many([
+            product_dataclass.manufacturer,
+            product_dataclass.releaser,
+            product_dataclass.distributer
+        ])
 
         # unique in list attribute
         paintworks = Paintwork.multiple_as_unique(product_dataclass.paintworks)
         sculptors = Sculptor.multiple_as_unique(product_dataclass.sculptors)
 
-        product_model.update(
+        product_model.fill(
             url=product_dataclass.url,
             name=product_dataclass.name,
             size=product_dataclass.size,
@@ -124,4 +145,182 @@ class ProductModelFactory:
             paintworks=paintworks,
         )
 
+        if flush:
+            product_model.save()
+
         return product_model
+
+    @staticmethod
+    def bulk_upsert(products: Iterable[ProductBase], batch_size: int = 500) -> BulkUpsertResult:
+        """Create or update products in batches, should be called in database session.
+
+        New products, release infos, images and workers are inserted with one statement per table,
+        existing products are fetched by `url` or `jan` in one query and only updated
+        when the checksum was changed.
+
+        Products whose release infos conflict are skipped and recorded in the result,
+        the later one wins when the url or jan is duplicated in the same batch.
+        """
+        result = BulkUpsertResult()
+        for batch in _chunked(products, batch_size):
+            deduped_batch, duplicated = _dedupe_products(batch)
+            result.duplicated += duplicated
+            _bulk_upsert_batch(deduped_batch, result)
+
+        return result
+
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _dedupe_products(products: List[ProductBase]) -> Tuple[List[ProductBase], int]:
+    """The later product wins when the url or jan is duplicated, empty url or jan is never duplicated.
+
+    Returns
+    ----------
+    `Tuple[List[ProductBase], int]`
+        Deduplicated products and the amount of dropped products.
+    """
+    deduped: dict[int, ProductBase] = {}
+    positions: dict[tuple[str, str], int] = {}
+    for position, product in enumerate(products):
+        keys = [key for key in (("url", product.url), ("jan", product.jan)) if key[1]]
+        for key in keys:
+            if key in positions:
+                deduped.pop(positions[key], None)
+
+        deduped[position] = product
+        for key in keys:
+            positions[key] = position
+
+    return list(deduped.values()), len(products) - len(deduped)
+
+
+def _resolve_unique_objects(products: List[ProductBase]):
+    """Resolve the unique objects of whole batch, they would be cached in the session."""
+    Series.as_unique_many(p.series for p in products)
+    Category.as_unique_many(p.category for p in products)
+    Company.as_unique_many(
+        name for p in products for name in (p.manufacturer, p.releaser, p.distributer)
+    )
+    Paintwork.as_unique_many(name for p in products for name in p.paintworks)
+    Sculptor.as_unique_many(name for p in products for name in p.sculptors)
+
+
+def _fetch_existing_products(session, products: List[ProductBase]) -> List[ProductModel]:
+    urls = [p.url for p in products if p.url]
+    jans = [p.jan for p in products if p.jan]
+    stmt = select(ProductModel).where(
+        or_(ProductModel.url.in_(urls), ProductModel.jan.in_(jans))
+    ).options(
+        selectinload(ProductModel.release_infos)
+    )
+    return session.execute(stmt).unique().scalars().all()
+
+
+def _bulk_upsert_batch(products: List[ProductBase], result: BulkUpsertResult):
+    session = ProductModel.session
+    _resolve_unique_objects(products)
+    # the ids of pending unique objects are required by the insertion.
+    session.flush()
+
+    existing_models = _fetch_existing_products(session, products)
+    # url-less products are only matched by jan.
+    models_by_url = {m.url: m for m in existing_models if m.url}
+    models_by_jan = {m.jan: m for m in existing_models if m.jan}
+
+    new_products = []
+    for product in products:
+        model = models_by_url.get(product.url) or models_by_jan.get(product.jan)
+        if not model:
+            new_products.append(product)
+        elif model.check_checksum(product.checksum):
+            result.unchanged += 1
+        else:
+            try:
+                ProductModelFactory.updateProduct(product, model, flush=False)
+                result.updated += 1
+            except ReleaseInfosConflictError:
+                result.conflicted_urls.append(product.url)
+
+    if new_products:
+        _bulk_insert_products(session, new_products)
+        result.created += len(new_products)
+
+    session.flush()
+
+
+def _unique_id(model_cls, value):
+    obj = model_cls.as_unique(name=value)
+    return obj.id if obj else None
+
+
+def _bulk_insert_products(session, products: List[ProductBase]):
+    # allocate the ids first, products can't be matched with the returned rows when url is empty.
+    product_ids = session.execute(
+        select(func.nextval("product_id_seq")).select_from(func.generate_series(1, len(products)))
+    ).scalars().all()
+
+    product_rows = [
+        dict(
+            id=product_id,
+            url=p.url,
+            name=p.name,
+            size=p.size,
+            scale=p.scale,
+            resale=p.resale,
+            adult=p.adult,
+            copyright=p.copyright,
+            series_id=_unique_id(Series, p.series),
+            manufacturer_id=_unique_id(Company, p.manufacturer),
+            releaser_id=_unique_id(Company, p.releaser),
+            distributer_id=_unique_id(Company, p.distributer),
+            category_id=_unique_id(Category, p.category),
+            id_by_official=p.maker_id,
+            checksum=p.checksum,
+            jan=p.jan,
+            order_period_start=p.order_period.start,
+            order_period_end=p.order_period.end,
+            thumbnail=p.thumbnail,
+            og_image=p.og_image,
+        )
+        for product_id, p in zip(product_ids, products)
+    ]
+    session.execute(insert(ProductModel.__table__).values(product_rows))
+
+    release_info_rows = []
+    image_rows = []
+    sculptor_rows = []
+    paintwork_rows = []
+    for product_id, p in zip(product_ids, products):
+        for release in p.release_infos:
+            release_info_rows.append(dict(
+                product_id=product_id,
+                price=release.price,
+                tax_including=release.price.tax_including if release.price else None,
+                initial_release_date=release.release_date,
+                announced_at=release.announced_at,
+            ))
+        for order, url in enumerate(p.images, start=1):
+            image_rows.append(dict(product_id=product_id, url=url, order=order))
+        for sculptor in dict.fromkeys(Sculptor.as_unique_many(p.sculptors)):
+            if sculptor:
+                sculptor_rows.append(dict(product_id=product_id, sculptor_id=sculptor.id))
+        for paintwork in dict.fromkeys(Paintwork.as_unique_many(p.paintworks)):
+            if paintwork:
+                paintwork_rows.append(dict(product_id=product_id, paintwork_id=paintwork.id))
+
+    for table, rows in (
+        (ProductReleaseInfo.__table__, release_info_rows),
+        (ProductOfficialImage.__table__, image_rows),
+        (product_sculptor_table, sculptor_rows),
+        (product_paintwork_table, paintwork_rows),
+    ):
+        if rows:
+            session.execute(insert(table).values(rows))
@@ -1,5 +1,9 @@
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Hashable, Optional
 
 from babel.dates import format_date
 from discord import Colour, Embed
@@ -56,49 +60,123 @@ locale_mapping = {
 }
 
 
+class LocalizedEmbedCache:
+    """Thread-safe LRU cache of the localized embeds in Discord JSON.
+
+    The payloads are keyed by release id, language and nsfw flag,
+    and would be rendered again when the checksum of the product is changed.
+    The cached payloads are shared, they shouldn't be modified.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._payloads: OrderedDict[Hashable, tuple[str, dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def get(self, key: Hashable, checksum: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            cached = self._payloads.get(key)
+            if not cached:
+                return None
+
+            cached_checksum, payload = cached
+            if cached_checksum != checksum:
+                del self._payloads[key]
+                return None
+
+            self._payloads.move_to_end(key)
+            return payload
+
+    def put(self, key: Hashable, checksum: str, payload: dict[str, Any]):
+        with self._lock:
+            self._payloads[key] = (checksum, payload)
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+
+localized_embed_cache = LocalizedEmbedCache()
+
+
 class NewReleaseEmbed(Embed):
     _is_nsfw: bool
+    _release_id: Optional[Any]
+    _checksum: Optional[str]
 
     def __init__(self, **kwargs):
         kwargs.setdefault("colour", Colour.red())
         super().__init__(**kwargs)
         self._is_nsfw = kwargs.get("is_nsfw", False)
+        self._release_id = kwargs.get("release_id")
+        self._checksum = kwargs.get("checksum")
 
     @property
     def is_nsfw(self):
         return self._is_nsfw
 
+    def localized_payload(self, lang: str, cache: Optional[LocalizedEmbedCache] = None) -> dict[str, Any]:
+        """The localized embed in Discord JSON.
+
+        The payload is cached when the release id and checksum of the embed are known.
+        """
+        if cache is None:
+            cache = localized_embed_cache
+
+        if self._release_id is None or not self._checksum:
+            return self.localized_with(lang).to_dict()
+
+        key = (self._release_id, lang, self.is_nsfw)
+        payload = cache.get(key, self._checksum)
+        if payload is None:
+            payload = self.localized_with(lang).to_dict()
+            cache.put(key, self._checksum, payload)
+
+        return payload
+
     def copy(self):
         return deepcopy(super().copy())
 
-    def localized_with(self, lang: str):
-        """lang: en, ja, zh-TW"""
-        embed: Embed = self.copy()
+    def localized_with(self, lang: str) -> 'NewReleaseEmbed':
+        """lang: en, ja, zh-TW
+
+        Only the localized parts are copied, other parts are shared with this embed.
+        """
+        embed = self.from_dict(self._localized_dict(lang))
+        embed._is_nsfw = self._is_nsfw
+        embed._release_id = self._release_id
+        embed._checksum = self._checksum
+        return embed
+
+    def _localized_dict(self, lang: str) -> dict[str, Any]:
+        data = self.to_dict()
         embed_locale = embed_templates[lang]
 
-        if embed.author:
-            key = str(embed.author.name)
-            author_name = embed_locale.get(key)
-            embed.set_author(
-                name=author_name,
-                icon_url=embed.author.icon_url
-            )
+        author = data.get("author")
+        if author:
+            localized_author = {"name": str(embed_locale.get(str(author["name"])))}
+            if "icon_url" in author:
+                localized_author["icon_url"] = author["icon_url"]
+            data["author"] = localized_author
 
-        for f in embed._fields:
+        fields = []
+        for f in data.get("fields", []):
             key = f["name"]
-            f["name"] = embed_locale.get(key, key)
-
-            if key == "release_date":
-                locale = locale_mapping.get(lang, "en")
-                date_format = embed_locale["date_format"]
-                if f["value"]:
-                    release_date = datetime.strptime(
-                        f["value"], "%Y-%m-%d").date()
-                    f["value"] = str(format_date(
-                        release_date, date_format, locale=locale)
-                    )
+            f = {**f, "name": embed_locale.get(key, key)}
+            if key == "release_date" and f["value"]:
+                f["value"] = _format_release_date(f["value"], lang)
+            fields.append(f)
 
-        return embed
+        if "fields" in data:
+            data["fields"] = fields
+
+        return data
 
     def add_field(self, *, name, value, inline):
         if not value:
@@ -106,6 +184,14 @@ class NewReleaseEmbed(Embed):
         return super().add_field(name=name, value=value, inline=inline)
 
 
+@lru_cache(maxsize=1024)
+def _format_release_date(value: str, lang: str) -> str:
+    locale = locale_mapping.get(lang, "en")
+    date_format = embed_templates[lang]["date_format"]
+    release_date = datetime.strptime(value, "%Y-%m-%d").date()
+    return str(format_date(release_date, date_format, locale=locale))
+
+
 class DiscordEmbedFactory(PublishFactory):
     @staticmethod
     def create_new_release(release_feed: ReleaseFeed):
@@ -113,7 +199,9 @@ class DiscordEmbedFactory(PublishFactory):
             title=release_feed.name,
             type="rich",
             url=release_feed.url,
-            is_nsfw=release_feed.is_adult
+            is_nsfw=release_feed.is_adult,
+            release_id=release_feed.id,
+            checksum=release_feed.checksum
         )
 
         author = "resale_release" if release_feed.resale else "new_release"
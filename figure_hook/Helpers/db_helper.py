@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Iterator
 
 from sqlalchemy import select
 from sqlalchemy.orm.session import Session
@@ -25,7 +26,8 @@ def _make_release_feed_statement(where_clause):
         Product.thumbnail.label("thumbnail"),
         Product.og_image.label("og_image"),
         Product.size.label("size"),
-        Product.scale.label("scale")
+        Product.scale.label("scale"),
+        Product.checksum.label("checksum")
     ).select_from(
         Product
     ).where(
@@ -51,6 +53,20 @@ def _fetch_releases_from_created_time(session: Session, time_checkpoint: datetim
     return releases
 
 
+def _stream_releases_from_created_time(session: Session, time_checkpoint: datetime, chunk_size: int):
+    """Fetch the releases with server-side cursor, only `chunk_size` rows are buffered."""
+    stmt = _make_release_feed_statement(
+        ProductReleaseInfo.created_at >= time_checkpoint
+    ).order_by(
+        ProductReleaseInfo.id
+    ).execution_options(
+        stream_results=True,
+        max_row_buffer=chunk_size
+    )
+    result = session.execute(stmt)
+    return result.partitions(chunk_size)
+
+
 def _fetch_release_by_id(session: Session, release_ids: list[int]):
     stmt = _make_release_feed_statement(ProductReleaseInfo.id.in_(release_ids))
     releases = session.execute(stmt).all()
@@ -73,6 +89,7 @@ def _make_release_feed(release):
         thumbnail=release.thumbnail,
         og_image=release.og_image,
         resale=release.resale,
+        checksum=release.checksum,
     )
     return feed
 
@@ -90,6 +107,16 @@ class ReleaseHelper:
 
         return release_feeds
 
+    @staticmethod
+    def iter_new_releases(session: Session, time: datetime, chunk_size: int = 500) -> Iterator[list[ReleaseFeed]]:
+        """stream new releases to push in chunks.
+
+        The rows are fetched by server-side cursor, so the cursor would be closed
+        when the transaction is committed.
+        """
+        for releases in _stream_releases_from_created_time(session, time, chunk_size):
+            yield [_make_release_feed(release) for release in releases]
+
     @staticmethod
     def fetch_release_feed_by_ids(session: Session, release_ids: list[int]) -> list[ReleaseFeed]:
         """fetch release feed by release id"""
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import and_, delete, literal_column, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from figure_hook.Models import DiscordDelivery, ProductReleaseInfo, Webhook
+
+Delivery = Tuple[int, str]
+"""(release_id, channel_id)"""
+
+
+class DiscordDeliveryHelper:
+    """Track the delivery of every release to every webhook.
+
+    The deliveries are planned once and claimed in batches with `SELECT ... FOR UPDATE SKIP LOCKED`,
+    a claim is leased until `locked_until`, so the deliveries left by a crashed worker would be claimed again
+    after the lease is expired.
+    """
+
+    @staticmethod
+    def plan(session: Session, checkpoint: datetime):
+        """Add the deliveries of the releases created since `checkpoint` to every live webhook.
+
+        The planned deliveries are ignored, so planning the same releases again wouldn't resend them.
+        """
+        releases_and_webhooks = select(
+            ProductReleaseInfo.id, Webhook.channel_id
+        ).where(
+            ProductReleaseInfo.created_at >= checkpoint,
+            Webhook.is_live
+        ).join(
+            Webhook, literal_column("true")
+        )
+        stmt = insert(DiscordDelivery.__table__).from_select(
+            ["release_id", "channel_id"], releases_and_webhooks
+        ).on_conflict_do_nothing()
+        session.execute(stmt)
+
+    @staticmethod
+    def claim(session: Session, limit: int, lease: timedelta) -> List[Delivery]:
+        """Lease at most `limit` pending deliveries, ordered by channel and release."""
+        pending = select(
+            DiscordDelivery.release_id, DiscordDelivery.channel_id
+        ).where(
+            DiscordDelivery.delivered_at.is_(None),
+            (DiscordDelivery.locked_until.is_(None)) | (DiscordDelivery.locked_until < func.now())
+        ).order_by(
+            DiscordDelivery.channel_id, DiscordDelivery.release_id
+        ).limit(
+            limit
+        ).with_for_update(
+            skip_locked=True
+        ).cte("pending")
+
+        stmt = update(DiscordDelivery).where(
+            and_(
+                DiscordDelivery.release_id == pending.c.release_id,
+                DiscordDelivery.channel_id == pending.c.channel_id
+            )
+        ).values(
+            locked_until=func.now() + lease
+        ).returning(
+            DiscordDelivery.release_id, DiscordDelivery.channel_id
+        ).execution_options(
+            synchronize_session=False
+        )
+        deliveries = session.execute(stmt).all()
+        return sorted((release_id, channel_id) for release_id, channel_id in deliveries)
+
+    @staticmethod
+    def mark_delivered(session: Session, deliveries: Iterable[Delivery]):
+        deliveries = list(deliveries)
+        if not deliveries:
+            return
+
+        stmt = update(DiscordDelivery).where(
+            tuple_(DiscordDelivery.release_id, DiscordDelivery.channel_id).in_(deliveries)
+        ).values(
+            delivered_at=func.now(),
+            locked_until=None
+        ).execution_options(
+            synchronize_session=False
+        )
+        session.execute(stmt)
+
+    @staticmethod
+    def count_pending(session: Session) -> int:
+        stmt = select(func.count()).select_from(DiscordDelivery).where(DiscordDelivery.delivered_at.is_(None))
+        return session.execute(stmt).scalar_one()
+
+    @staticmethod
+    def prune(session: Session, checkpoint: datetime):
+        """Delete the delivered deliveries of the releases created before `checkpoint`.
+
+        They wouldn't be planned again.
+        """
+        created_before_checkpoint = select(ProductReleaseInfo.id).where(
+            ProductReleaseInfo.created_at < checkpoint
+        )
+        stmt = delete(DiscordDelivery).where(
+            DiscordDelivery.delivered_at.is_not(None),
+            DiscordDelivery.release_id.in_(created_before_checkpoint)
+        ).execution_options(
+            synchronize_session=False
+        )
+        session.execute(stmt)
@@ -1,4 +1,6 @@
 import os
+from functools import lru_cache
+from typing import Iterable, List
 
 from cryptography.fernet import Fernet
 
@@ -36,3 +38,24 @@ class EncryptHelper:
         byte_data = str_to_bytes(data)
         decrypted_byte_data = fernet.decrypt(byte_data)
         return bytes_to_str(decrypted_byte_data)
+
+    @staticmethod
+    def decrypt_str_cached(data: str) -> str:
+        """Decrypt with the process-local cache keyed by the encrypted data.
+
+        The decrypted data is only kept in memory and bounded by `decrypted_cache_size`.
+        """
+        return _decrypt_str_cached(data)
+
+    @staticmethod
+    def decrypt_str_many(data: Iterable[str]) -> List[str]:
+        """Decrypt every encrypted data through the cache, the duplicated ones are decrypted once."""
+        return [_decrypt_str_cached(d) for d in data]
+
+
+decrypted_cache_size = 1024
+
+
+@lru_cache(maxsize=decrypted_cache_size)
+def _decrypt_str_cached(data: str) -> str:
+    return EncryptHelper.decrypt_str(data)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from figure_hook.Models import PublishJob
+
+
+class PublishJobHelper:
+    """Outbox of the releases failed to publish.
+
+    The jobs are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`,
+    so workers in different processes could drain the same target together.
+    The claimed jobs are locked until the transaction ends.
+    """
+    base_backoff = timedelta(minutes=1)
+    max_backoff = timedelta(hours=6)
+    max_attempts = 8
+
+    @staticmethod
+    def enqueue(session: Session, release_ids: Iterable[int], target: str):
+        """Add jobs for the releases, the releases already waiting for the target are ignored."""
+        rows = [{"release_id": release_id, "target": target} for release_id in dict.fromkeys(release_ids)]
+        if not rows:
+            return
+
+        stmt = insert(PublishJob.__table__).values(rows).on_conflict_do_nothing(
+            index_elements=["release_id", "target"]
+        )
+        session.execute(stmt)
+
+    @staticmethod
+    def claim(session: Session, target: str, limit: int) -> List[PublishJob]:
+        """Lock at most `limit` jobs which are due, the jobs locked by others are skipped."""
+        stmt = select(PublishJob).where(
+            PublishJob.target == target,
+            PublishJob.next_attempt_at <= func.now()
+        ).order_by(
+            PublishJob.next_attempt_at
+        ).limit(
+            limit
+        ).with_for_update(
+            skip_locked=True
+        )
+        return session.execute(stmt).scalars().all()
+
+    @staticmethod
+    def complete(session: Session, job: PublishJob):
+        session.delete(job)
+
+    @classmethod
+    def fail(cls, session: Session, job: PublishJob, error: str):
+        """Retry the job with exponential backoff, give up after `max_attempts` attempts."""
+        job.attempts += 1
+        job.last_error = error
+        if job.attempts >= cls.max_attempts:
+            job.next_attempt_at = None
+        else:
+            backoff = min(cls.max_backoff, cls.base_backoff * 2 ** (job.attempts - 1))
+            job.next_attempt_at = func.now() + backoff
@@ -4,7 +4,9 @@
 from .source_checksum import *
 from .category import *
 from .company import *
+from .discord_delivery import *
 from .product import *
+from .publish_job import *
 from .series import *
 from .task import *
 from .webhook import *
@@ -1,6 +1,11 @@
-from typing import Any, AnyStr, Type, TypeVar, Union
-
-from sqlalchemy import Column, Integer
+from collections import OrderedDict
+from threading import Lock
+from typing import (Any, AnyStr, Hashable, Iterable, List, Optional, Type,
+                    TypeVar, Union)
+
+from sqlalchemy import Column, Integer, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, make_transient_to_detached
 from sqlalchemy_mixins import AllFeaturesMixin
 from sqlalchemy_mixins.timestamp import TimestampsMixin
 
@@ -42,13 +47,12 @@ class UniqueMixin:
     https://github.com/sqlalchemy/sqlalchemy/wiki/UniqueObject
     """
     __abstract__ = True
+    __unique_column__ = "name"
 
     @classmethod
     def as_unique(cls: Type[T], *arg: Any, **kw: Any) -> Union[T, None]:
         session = cls.session
-        cache = getattr(session, "_unique_cache", None)
-        if cache is None:
-            session._unique_cache = cache = {}
+        cache = _get_unique_cache(session)
 
         hash_value = cls.unique_hash(*arg, **kw)
         if not hash_value:
@@ -59,6 +63,9 @@ class UniqueMixin:
             return cache[key]
         else:
             with session.no_autoflush:
+                if not cls._merge_cached_identities(session, cache, [hash_value]):
+                    return cache[key]
+
                 q = session.query(cls)
                 q = cls.unique_filter(q, *arg, **kw)
                 obj = q.first()
@@ -68,6 +75,95 @@ class UniqueMixin:
             cache[key] = obj
             return obj
 
+    @classmethod
+    def as_unique_many(cls: Type[T], values: Iterable[Any]) -> List[Union[T, None]]:
+        """Get or create the unique objects by the values of `__unique_column__`.
+
+        The existing objects are fetched by one `SELECT ... IN` query,
+        the missing ones are inserted by one `INSERT ... ON CONFLICT DO NOTHING RETURNING`
+        and the rows inserted by others in the meantime are fetched again.
+
+        The conflict is only detected when `__unique_column__` has an unique constraint,
+        otherwise concurrent sessions could still insert duplicated rows.
+
+        Returns
+        ----------
+        `List`
+            Objects in the same order as `values`, `None` for the empty value.
+        """
+        session = cls.session
+        cache = _get_unique_cache(session)
+        column_name = cls.__unique_column__
+
+        hash_values = [cls.unique_hash(**{column_name: value}) for value in values]
+        missing_values = list(dict.fromkeys(
+            h for h in hash_values if h and (cls, h) not in cache
+        ))
+
+        with session.no_autoflush:
+            if missing_values:
+                missing_values = cls._merge_cached_identities(session, cache, missing_values)
+
+            if missing_values:
+                missing_values = cls._fetch_unique_many(session, cache, missing_values)
+
+            if missing_values:
+                missing_values = cls._insert_unique_many(session, cache, missing_values)
+
+            if missing_values:
+                # the rows were inserted by others after selecting.
+                cls._fetch_unique_many(session, cache, missing_values)
+
+        return [cache[(cls, h)] if h else None for h in hash_values]
+
+    @classmethod
+    def _merge_cached_identities(cls, session, cache: dict, values: List[Any]) -> List[Any]:
+        """Attach the objects found in the identity cache and return the values not found."""
+        if _identity_cache is None:
+            return values
+
+        missing_values = []
+        for value in values:
+            pk = _identity_cache.get((cls, value))
+            if pk is None:
+                missing_values.append(value)
+                continue
+
+            obj = cls(**{cls.__unique_column__: value})
+            obj.id = pk
+            make_transient_to_detached(obj)
+            cache[(cls, value)] = session.merge(obj, load=False)
+
+        return missing_values
+
+    @classmethod
+    def _fetch_unique_many(cls, session, cache: dict, values: List[Any]) -> List[Any]:
+        """Fill the cache with existing objects and return the values not found."""
+        column = getattr(cls, cls.__unique_column__)
+        objs = session.execute(select(cls).where(column.in_(values))).scalars().all()
+        for obj in objs:
+            cache.setdefault((cls, getattr(obj, cls.__unique_column__)), obj)
+
+        return [value for value in values if (cls, value) not in cache]
+
+    @classmethod
+    def _insert_unique_many(cls, session, cache: dict, values: List[Any]) -> List[Any]:
+        """Insert the values, fill the cache with new objects and return the values not inserted."""
+        table = cls.__table__
+        column = table.c[cls.__unique_column__]
+        stmt = insert(table).values(
+            [{column.name: value} for value in values]
+        ).on_conflict_do_nothing(index_elements=[column]).returning(table.c.id, column)
+
+        for pk, value in session.execute(stmt).all():
+            obj = cls(**{column.name: value})
+            obj.id = pk
+            make_transient_to_detached(obj)
+            session.add(obj)
+            cache[(cls, value)] = obj
+
+        return [value for value in values if (cls, value) not in cache]
+
     @classmethod
     def unique_hash(cls, *arg, **kw):
         raise NotImplementedError()
@@ -75,3 +171,83 @@ class UniqueMixin:
     @classmethod
     def unique_filter(cls, query, *arg, **kw):
         raise NotImplementedError()
+
+
+def _get_unique_cache(session) -> dict:
+    cache = getattr(session, "_unique_cache", None)
+    if cache is None:
+        session._unique_cache = cache = {}
+    return cache
+
+
+class UniqueIdentityCache:
+    """Thread-safe LRU cache maps the unique value to primary key."""
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("The maxsize should be larger than 0.")
+
+        self.maxsize = maxsize
+        self._identities: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._identities)
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            pk = self._identities.get(key)
+            if pk is not None:
+                self._identities.move_to_end(key)
+            return pk
+
+    def put(self, key: Hashable, pk: int):
+        with self._lock:
+            self._identities[key] = pk
+            self._identities.move_to_end(key)
+            while len(self._identities) > self.maxsize:
+                self._identities.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._identities.pop(key, None)
+
+
+_identity_cache: Optional[UniqueIdentityCache] = None
+
+
+def enable_unique_identity_cache(maxsize: int = 1024) -> UniqueIdentityCache:
+    """Share the primary keys of unique objects between sessions in the process.
+
+    The identities are cached after the session committed and discarded after the session rolled back.
+    """
+    global _identity_cache
+    _identity_cache = UniqueIdentityCache(maxsize)
+    return _identity_cache
+
+
+def disable_unique_identity_cache():
+    global _identity_cache
+    _identity_cache = None
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_identities(session):
+    if _identity_cache is None:
+        return
+
+    for key, obj in _get_unique_cache(session).items():
+        state = inspect(obj)
+        if state.has_identity and not state.deleted:
+            _identity_cache.put(key, state.identity[0])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_identities(session):
+    cache = _get_unique_cache(session)
+    if _identity_cache is not None:
+        # the cached identities might cause the rollback, e.g. the row was deleted by others.
+        for key in cache:
+            _identity_cache.discard(key)
+
+    cache.clear()
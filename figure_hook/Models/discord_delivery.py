@@ -0,0 +1,27 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from .base import Model
+
+__all__ = [
+    "DiscordDelivery"
+]
+
+
+class DiscordDelivery(Model):
+    """The release should be delivered to the webhook of the channel.
+
+    The delivery is claimed by a worker until `locked_until`.
+    """
+    __tablename__ = "discord_delivery"
+
+    channel_id = Column(String, ForeignKey("webhook.channel_id", ondelete="CASCADE"), primary_key=True)
+    release_id = Column(Integer, ForeignKey("product_release_info.id", ondelete="CASCADE"), primary_key=True)
+    delivered_at = Column(DateTime)
+    locked_until = Column(DateTime)
+
+    __table_args__ = (
+        Index(
+            "ix_discord_delivery_pending", channel_id, release_id,
+            postgresql_where=delivered_at.is_(None)
+        ),
+    )
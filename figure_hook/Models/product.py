@@ -1,8 +1,8 @@
 from datetime import date, datetime
 from typing import Union
 
-from sqlalchemy import (Boolean, Column, Date, DateTime, ForeignKey, Integer,
-                        SmallInteger, String)
+from sqlalchemy import (DDL, Boolean, Column, Date, DateTime, ForeignKey,
+                        Index, Integer, SmallInteger, String, event)
 from sqlalchemy.ext.orderinglist import ordering_list
 from sqlalchemy.orm import relationship
 
@@ -12,9 +12,13 @@ from .relation_table import product_paintwork_table, product_sculptor_table
 __all__ = [
     "ProductOfficialImage",
     "ProductReleaseInfo",
-    "Product"
+    "Product",
+    "NEW_RELEASE_CHANNEL"
 ]
 
+NEW_RELEASE_CHANNEL = "product_release_info_inserted"
+"""Channel of `NOTIFY` sent by every transaction which inserted release infos."""
+
 
 class ProductOfficialImage(PkModel):
     __tablename__ = "product_official_image"
@@ -23,6 +27,12 @@ class ProductOfficialImage(PkModel):
     order = Column(Integer)
     product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        Index("ix_product_official_image_product_id_order", product_id, order),
+        # the release feed only joins the cover image.
+        Index("ix_product_official_image_cover", product_id, postgresql_where=(order == 1)),
+    )
+
     @classmethod
     def create_image_list(cls: 'ProductOfficialImage', image_urls: list[str]) -> list['ProductOfficialImage']:
         images = []
@@ -43,7 +53,11 @@ class ProductReleaseInfo(PkModelWithTimestamps):
     adjusted_release_date = Column(Date)
     announced_at = Column(Date)
     shipped_at = Column(Date)
-    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_product_release_info_created_at", "created_at"),
+    )
 
     @property
     def release_date(self):
@@ -69,6 +83,22 @@ class ProductReleaseInfo(PkModelWithTimestamps):
         self.update(initial_release_date=None, adjusted_release_date=None)
 
 
+# the notifications are sent when the transaction is committed, and the same ones in a transaction are folded.
+notify_new_release_ddl = DDL(f"""
+CREATE OR REPLACE FUNCTION notify_{NEW_RELEASE_CHANNEL}() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NEW_RELEASE_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {NEW_RELEASE_CHANNEL}
+AFTER INSERT ON product_release_info
+FOR EACH STATEMENT EXECUTE PROCEDURE notify_{NEW_RELEASE_CHANNEL}();
+""")
+event.listen(ProductReleaseInfo.__table__, "after_create", notify_new_release_ddl)
+
+
 class Product(PkModelWithTimestamps):
     """
     ## Column
@@ -83,7 +113,7 @@ class Product(PkModelWithTimestamps):
     resale = Column(Boolean)
     adult = Column(Boolean)
     copyright = Column(String)
-    url = Column(String)
+    url = Column(String, index=True)
     jan = Column(String(13), unique=True)
     id_by_official = Column(String)
     checksum = Column(String(32))
@@ -93,7 +123,7 @@ class Product(PkModelWithTimestamps):
     og_image = Column(String)
 
     # ---Foreign key columns---
-    series_id = Column(Integer, ForeignKey("series.id"))
+    series_id = Column(Integer, ForeignKey("series.id"), index=True)
     series = relationship(
         "Series",
         backref="products",
@@ -107,7 +137,7 @@ class Product(PkModelWithTimestamps):
         lazy="joined",
     )
 
-    manufacturer_id = Column(Integer, ForeignKey("company.id"))
+    manufacturer_id = Column(Integer, ForeignKey("company.id"), index=True)
     manufacturer = relationship(
         "Company",
         backref="made_products",
@@ -0,0 +1,30 @@
+from sqlalchemy import (Column, DateTime, ForeignKey, Index, Integer, String,
+                        UniqueConstraint)
+from sqlalchemy.sql import func
+
+from .base import PkModel
+
+__all__ = [
+    "PublishJob"
+]
+
+
+class PublishJob(PkModel):
+    """The release should be published to the target again.
+
+    The job wouldn't be claimed when `next_attempt_at` is null.
+    """
+    __tablename__ = "publish_job"
+    __datetime_callback__ = func.now
+
+    release_id = Column(Integer, ForeignKey("product_release_info.id", ondelete="CASCADE"), nullable=False)
+    target = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=__datetime_callback__())
+    last_error = Column(String)
+    created_at = Column(DateTime, nullable=False, default=__datetime_callback__())
+
+    __table_args__ = (
+        UniqueConstraint(release_id, target),
+        Index("ix_publish_job_target_next_attempt_at", target, next_attempt_at),
+    )
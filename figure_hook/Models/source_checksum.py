@@ -16,6 +16,8 @@ class SourceChecksum(Model):
 
     source = Column(String, primary_key=True)
     checksum = Column(String)
+    etag = Column(String)
+    last_modified = Column(String)
     checked_at = Column(
         DateTime,
         default=__datetime_callback__(),
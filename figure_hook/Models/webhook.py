@@ -1,6 +1,11 @@
-from sqlalchemy import Boolean, Column, String, event
+from typing import Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import (Boolean, Column, DateTime, Index, SmallInteger,
+                        String, any_, bindparam, event, update)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import Session, validates
+from sqlalchemy.sql import func
 from sqlalchemy_mixins.timestamp import TimestampsMixin
 
 from figure_hook.Helpers.encrypt_helper import EncryptHelper
@@ -13,6 +18,12 @@ __all__ = [
 
 
 class Webhook(Model, TimestampsMixin):
+    """
+    ## Column
+    + is_existed: `False` if the webhook responded 404, the dead webhooks aren't published.
+    + missing_count: Times the dead webhook responded 404 when it was revalidated.
+    + checked_at: When the dead webhook was revalidated.
+    """
     __tablename__ = "webhook"
     supporting_langs = ("zh-TW", "en", "ja")
 
@@ -22,10 +33,83 @@ class Webhook(Model, TimestampsMixin):
     is_existed = Column(Boolean)
     is_nsfw = Column(Boolean, default=False)
     lang = Column(String(5), default="en")
+    missing_count = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    checked_at = Column(DateTime)
+
+    __table_args__ = (
+        # the pushes only select the live webhooks, ordered by the groups receiving the same embeds.
+        Index("ix_webhook_live_group", lang, is_nsfw, channel_id, postgresql_where=is_existed.is_not(False)),
+    )
+
+    @hybrid_property
+    def is_live(self):
+        """The webhooks never responded 404 are live as well."""
+        return self.is_existed is not False
+
+    @is_live.expression
+    def is_live(cls):
+        return cls.is_existed.is_not(False)
 
     @hybrid_property
     def decrypted_token(self):
-        return EncryptHelper.decrypt_str(self.token)
+        return EncryptHelper.decrypt_str_cached(self.token)
+
+    @staticmethod
+    def decrypt_tokens(webhooks: Iterable['Webhook']) -> Dict[str, str]:
+        """Decrypt the tokens of webhooks at once and warm up the cache of `decrypted_token`.
+
+        Returns
+        ----------
+        `Dict[str, str]`
+            Decrypted tokens keyed by webhook id.
+        """
+        webhooks = list(webhooks)
+        tokens = EncryptHelper.decrypt_str_many(webhook.token for webhook in webhooks)
+        return {webhook.id: token for webhook, token in zip(webhooks, tokens)}
+
+    @staticmethod
+    def update_status(session: Session, webhook_status: Mapping[str, bool]):
+        """Update `is_existed` of the webhooks keyed by id, with at most two statements.
+
+        The dead webhooks would be revalidated after `checked_at`.
+        The webhooks loaded in `session` aren't synchronized.
+        """
+        alive = [str(webhook_id) for webhook_id, is_existed in webhook_status.items() if is_existed]
+        dead = [str(webhook_id) for webhook_id, is_existed in webhook_status.items() if not is_existed]
+        if alive:
+            Webhook._update_many(session, alive, is_existed=True)
+        if dead:
+            Webhook._update_many(session, dead, is_existed=False, checked_at=func.now())
+
+    @staticmethod
+    def update_revalidation(session: Session, webhook_status: Mapping[str, Optional[bool]]):
+        """Save the result of revalidating the dead webhooks keyed by id.
+
+        The found webhooks are live again, and the missing ones count the misses.
+        The webhooks couldn't be checked (`None`) only record the check, so they are retried after the interval.
+        """
+        found = [str(webhook_id) for webhook_id, is_existed in webhook_status.items() if is_existed]
+        missing = [str(webhook_id) for webhook_id, is_existed in webhook_status.items() if is_existed is False]
+        unknown = [str(webhook_id) for webhook_id, is_existed in webhook_status.items() if is_existed is None]
+        if found:
+            Webhook._update_many(session, found, is_existed=True, missing_count=0, checked_at=func.now())
+        if missing:
+            Webhook._update_many(
+                session, missing, missing_count=Webhook.missing_count + 1, checked_at=func.now()
+            )
+        if unknown:
+            Webhook._update_many(session, unknown, checked_at=func.now())
+
+    @staticmethod
+    def _update_many(session: Session, webhook_ids: list, **values):
+        stmt = update(Webhook).where(
+            Webhook.id == any_(bindparam("webhook_ids", webhook_ids, type_=ARRAY(String)))
+        ).values(
+            **values
+        ).execution_options(
+            synchronize_session=False
+        )
+        session.execute(stmt)
 
     @validates('lang')
     def validate_lang(self, key, lang):
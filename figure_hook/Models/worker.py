@@ -17,18 +17,13 @@ class WorkerMultipleUniqueMixin:
 
     @classmethod
     def multiple_as_unique(cls: Type[T], worker_names: List[str]) -> List[T]:
-        workers = []
-        for name in worker_names:
-            worker = cls.as_unique(name=name)
-            workers.append(worker)
-
-        return workers
+        return cls.as_unique_many(worker_names)
 
 
 class Paintwork(WorkerMultipleUniqueMixin, UniqueMixin, PkModel):
     __tablename__ = "paintwork"
 
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, unique=True)
 
     @classmethod
     def unique_hash(cls, name):
@@ -42,7 +37,7 @@ class Paintwork(WorkerMultipleUniqueMixin, UniqueMixin, PkModel):
 class Sculptor(WorkerMultipleUniqueMixin, UniqueMixin, PkModel):
     __tablename__ = "sculptor"
 
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, unique=True)
 
     @classmethod
     def unique_hash(cls, name):
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from collections import UserDict
 from datetime import datetime
+from threading import Lock
 
 
 class Stats(UserDict, ABC):
@@ -11,6 +12,7 @@ class Stats(UserDict, ABC):
         }
         init_data.update(extension_data)
         super().__init__(init_data)
+        self._lock = Lock()
 
     @property
     def start_time(self):
@@ -21,11 +23,19 @@ class Stats(UserDict, ABC):
         return self.data["finish_time"]
 
     def start(self):
-        if not self.start_time:
-            self.data["start_time"] = datetime.utcnow()
+        with self._lock:
+            if not self.start_time:
+                self.data["start_time"] = datetime.utcnow()
 
     def finish(self):
-        self.data["finish_time"] = datetime.utcnow()
+        with self._lock:
+            self.data["finish_time"] = datetime.utcnow()
+
+    def _increase(self, *keys: str):
+        """Increase the counters atomically, publishers could be shared between threads."""
+        with self._lock:
+            for key in keys:
+                self.data[key] += 1
 
 
 class Publisher(ABC):
@@ -1,15 +1,24 @@
-from typing import Any, List, Optional
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from threading import Lock
+from typing import (Any, Callable, Iterable, Iterator, List, NamedTuple,
+                    Optional)
 
 from discord import Embed, RequestsWebhookAdapter, Webhook, WebhookAdapter
 from discord.errors import HTTPException, NotFound
+from discord.utils import to_json
 
-from figure_hook.Adapters.webhook_adapter import DiscordWebhookAdapter
+from figure_hook.Adapters.webhook_adapter import (DiscordWebhookAdapter,
+                                                  RateLimitedWebhookAdapter)
 from figure_hook.Factory.publish_factory.discord_embed_factory import \
     NewReleaseEmbed
 from figure_hook.Models import Webhook as WebhookModel
 
 from .abcs import Publisher, Stats
 
+logger = logging.getLogger(__name__)
+
 
 class DiscordHookerStats(Stats):
     def __init__(self) -> None:
@@ -43,27 +52,27 @@ class DiscordHookerStats(Stats):
         return self.data["webhook_sending_count/404"]
 
     def webhook_count_plusone(self):
-        self.data["webhook_count"] += 1
-
-    def _sending_count_plusone(self):
-        self.data["webhook_sending_count"] += 1
+        self._increase("webhook_count")
 
     def sending_success(self):
-        self._sending_count_plusone()
-        self.data["webhook_sending_count/success"] += 1
+        self._increase("webhook_sending_count", "webhook_sending_count/success")
 
     def sending_failed(self):
-        self._sending_count_plusone()
-        self.data["webhook_sending_count/failed"] += 1
+        self._increase("webhook_sending_count", "webhook_sending_count/failed")
 
     def sending_404(self):
-        self._sending_count_plusone()
-        self.data["webhook_sending_count/404"] += 1
+        self._increase("webhook_sending_count", "webhook_sending_count/404")
 
 
 avartar = "https://cdn.discordapp.com/app-icons/655029515726094337/27898ae3dcc9811d2622977f38364425.png"
 
 
+class EmbedBatch(NamedTuple):
+    """Embeds sent in one message, with the JSON body of the message."""
+    embeds: List[Embed]
+    payload: bytes
+
+
 class DiscordHooker(Publisher):
     batch_size = 10
 
@@ -81,29 +90,48 @@ class DiscordHooker(Publisher):
         return self._stats
 
     def publish(self, webhook: Webhook, embeds: List[Embed]):
-        if not embeds:
+        self.publish_batches(webhook, self.prepare_batches(embeds))
+
+    def prepare_batches(self, embeds: List[Embed]) -> List[EmbedBatch]:
+        """Split the embeds into batches and serialize the message of every batch.
+
+        The batches could be published to any number of webhooks without serializing them again.
+        """
+        return [
+            EmbedBatch(batch, _serialize_message(batch))
+            for batch in process_embeds(embeds, self.batch_size)
+        ]
+
+    def publish_batches(self, webhook: Webhook, batches: List[EmbedBatch]):
+        if not batches:
             return
 
-        self.stats.webhook_count_plusone()
+        # the webhook could be published several times when the embeds are streamed in chunks.
+        if str(webhook.id) not in self.webhook_status:
+            self.stats.webhook_count_plusone()
         self.stats.start()
-        embeds_batch = process_embeds(embeds.copy(), self.batch_size)
         webhook_status = []
-        for batch in embeds_batch:
+        for batch in batches:
             # once the webhook is not found, stop sending remaining batch.
             webhook_is_alive = not webhook_status or all(webhook_status)
-            if webhook_is_alive and batch:
+            if webhook_is_alive:
                 status = self._publish(webhook, batch)
                 webhook_status.append(status)
 
         self.webhook_status[str(webhook.id)] = all(webhook_status)
         self.stats.finish()
 
-    def _publish(self, webhook: Webhook, embeds: List[Embed]):
+    def _publish(self, webhook: Webhook, batch: EmbedBatch):
+        embeds = batch.embeds
         try:
-            webhook.send(
-                avatar_url=avartar,
-                embeds=embeds
-            )
+            if isinstance(webhook._adapter, RateLimitedWebhookAdapter):
+                webhook._adapter.execute_payload(batch.payload)
+            else:
+                # other adapters can't send the serialized payload.
+                webhook.send(
+                    avatar_url=avartar,
+                    embeds=embeds
+                )
             self._stats.sending_success()
 
         except NotFound:
@@ -112,6 +140,12 @@ class DiscordHooker(Publisher):
 
         except HTTPException as e:
             self._stats.sending_failed()
+            # the webhook is still alive, the embeds should be sent again later.
+            if e.status == 429:
+                logger.warning(
+                    "Webhook %s is still rate limited, %d embeds weren't sent: %s",
+                    webhook.id, len(embeds), [embed.title for embed in embeds]
+                )
             raise e
 
         except Exception as e:
@@ -129,33 +163,127 @@ class DiscordNewReleaseHooker(DiscordHooker):
     def __init__(self, raw_embeds: List[NewReleaseEmbed], stats: Optional[DiscordHookerStats] = None) -> None:
         self.embeds_cache = {}
         self.raw_embeds = raw_embeds
+        self._embeds_cache_lock = Lock()
         super().__init__(stats)
 
+    def reset_raw_embeds(self, raw_embeds: List[NewReleaseEmbed]):
+        """Replace the raw embeds to publish the next chunk of releases."""
+        with self._embeds_cache_lock:
+            self.raw_embeds = raw_embeds
+            self.embeds_cache = {}
+
     def publish(self, webhook: WebhookModel, webhook_adapter: Optional[WebhookAdapter] = None):
         if not webhook_adapter:
             webhook_adapter = RequestsWebhookAdapter()
 
-        cache_key = (webhook.lang, webhook.is_nsfw)
+        embeds = self._get_embeds_from_cache(_embed_group_key(webhook))
+        return self._publish_webhook_batches(webhook, self.prepare_batches(embeds), webhook_adapter)
+
+    def _publish_webhook_batches(
+        self, webhook: WebhookModel, batches: List[EmbedBatch], webhook_adapter: WebhookAdapter
+    ):
         discord_webhook = DiscordWebhookAdapter(webhook_model=webhook, webhook_adapter=webhook_adapter)
-        embeds: List[Embed] = list(self._get_embeds_from_cache(cache_key))
-        return super().publish(discord_webhook, embeds)
+        return self.publish_batches(discord_webhook, batches)
+
+    def publish_concurrently(
+        self,
+        webhooks: Iterable[WebhookModel],
+        max_workers: int,
+        webhook_adapter_factory: Callable[[], WebhookAdapter] = RequestsWebhookAdapter
+    ) -> dict[str, Exception]:
+        """Publish the embeds to webhooks with a bounded thread pool.
+
+        The adapter would be bound to the webhook when the webhook is created,
+        so every webhook should have its own adapter instead of sharing one.
+
+        The embeds are rendered and serialized once for every group of `group_webhooks`,
+        so the webhooks should be ordered by `(lang, is_nsfw)`.
+
+        A webhook failed with unexpected error wouldn't abort the others,
+        the error is logged and the webhook is still treated as existed.
+
+        Parameters
+        -----------
+        webhooks: `Iterable[Webhook]`
+            Webhook models which should be published to, ordered by `(lang, is_nsfw)`.
+        max_workers: `int`
+            Maximum number of the webhooks being sent at the same time.
+        webhook_adapter_factory: `Callable[[], WebhookAdapter]`
+            Create an adapter for each webhook.
+
+        Returns
+        ----------
+        `dict[str, Exception]`
+            The errors raised by webhooks, keyed by webhook id.
+
+        Raises
+        ----------
+        ValueError
+            The max_workers should be larger than 0.
+        """
+        if max_workers < 1:
+            raise ValueError("The max_workers should be larger than 0.")
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key, grouped_webhooks in group_webhooks(webhooks):
+                batches = self.prepare_batches(self._get_embeds_from_cache(key))
+                futures.extend(
+                    (webhook, executor.submit(
+                        self._publish_webhook_batches, webhook, batches, webhook_adapter_factory()
+                    ))
+                    for webhook in grouped_webhooks
+                )
+
+        errors = {}
+        for webhook, future in futures:
+            error = future.exception()
+            if error:
+                webhook_id = str(webhook.id)
+                errors[webhook_id] = error
+                self.webhook_status.setdefault(webhook_id, True)
+                logger.error("Failed to publish to webhook %s: %r", webhook_id, error)
+
+        return errors
 
     def _get_embeds_from_cache(self, key: tuple[str, bool]):
         webhook_lang, webhook_is_nsfw = key
         embeds = self.embeds_cache.get(key)
 
         if embeds is None:  # prevent running loop when embeds is []
-            embeds = [
-                raw_embed.localized_with(webhook_lang)
-                for raw_embed in self.raw_embeds
-                if _is_embed_should_be_processed(webhook_is_nsfw, raw_embed)
-            ]
+            with self._embeds_cache_lock:
+                embeds = self.embeds_cache.get(key)
+                if embeds is None:
+                    embeds = [
+                        Embed.from_dict(raw_embed.localized_payload(webhook_lang))
+                        for raw_embed in self.raw_embeds
+                        if _is_embed_should_be_processed(webhook_is_nsfw, raw_embed)
+                    ]
 
-            self.embeds_cache.setdefault(key, embeds)
+                    self.embeds_cache.setdefault(key, embeds)
 
         return embeds
 
 
+def _serialize_message(embeds: List[Embed]) -> bytes:
+    """Serialize the message like `Webhook.send(avatar_url=avartar, embeds=embeds)`."""
+    payload = {"embeds": [embed.to_dict() for embed in embeds], "tts": False, "avatar_url": avartar}
+    return to_json(payload).encode("utf-8")
+
+
+def group_webhooks(webhooks: Iterable[WebhookModel]) -> Iterator[tuple[tuple[str, bool], List[WebhookModel]]]:
+    """Group the consecutive webhooks which receive the same embeds by `(lang, is_nsfw)`.
+
+    The webhooks should be ordered by `(lang, is_nsfw)`, otherwise the same group would be yielded several times.
+    """
+    for key, grouped_webhooks in groupby(webhooks, key=_embed_group_key):
+        yield key, list(grouped_webhooks)
+
+
+def _embed_group_key(webhook: WebhookModel) -> tuple[str, bool]:
+    return webhook.lang, webhook.is_nsfw
+
+
 def _is_embed_should_be_processed(webhook_nsfw_flag: bool, embed: NewReleaseEmbed) -> bool:
     return any((
         webhook_nsfw_flag,
@@ -163,22 +291,28 @@ def _is_embed_should_be_processed(webhook_nsfw_flag: bool, embed: NewReleaseEmbe
     ))
 
 
-def process_embeds(embeds: List[Any], batch_size: int = 10) -> List[List[Any]]:
+def process_embeds(embeds: Iterable[Any], batch_size: int = 10, max_characters: int = 6000) -> Iterator[List[Any]]:
     """Process embeds
-    The maximum number of embed could be sent in one time is 10.
-    If the embeds are more than 10, the embeds should be seperated into
-    List[Embed] which less than 10.
+    The maximum number of embed could be sent in one time is 10,
+    and the characters of the embeds in one message shouldn't be more than 6000.
+    The embeds are lazily seperated into List[Embed] within the limits, in their order.
+
+    Only `Embed` is counted by characters, an embed which exceeds `max_characters` alone
+    is still yielded in its own batch.
 
     Parameters
     -----------
-    embeds: `List`
-        List of embed.
+    embeds: `Iterable`
+        Embeds, which could be a generator.
     batch_size: `int`
         expected maximum size of seperated embeds.
+    max_characters: `int`
+        expected maximum characters of seperated embeds.
 
     Returns
     ----------
-    `List[List]`
+    `Iterator[List]`
+        The batches, which are never empty.
 
     Raises
     ----------
@@ -188,8 +322,21 @@ def process_embeds(embeds: List[Any], batch_size: int = 10) -> List[List[Any]]:
     if batch_size > 10:
         raise ValueError("The batch_size shouldn't larger than 10")
 
-    complete_batch_amount = len(embeds) // batch_size
-    for i in range(complete_batch_amount+1):
-        embeds[i:i+batch_size] = [embeds[i:i+batch_size]]
+    return _iter_embed_batches(embeds, batch_size, max_characters)
+
+
+def _iter_embed_batches(embeds: Iterable[Any], batch_size: int, max_characters: int) -> Iterator[List[Any]]:
+    batch = []
+    characters = 0
+    for embed in embeds:
+        embed_characters = len(embed) if isinstance(embed, Embed) else 0
+        if batch and (len(batch) == batch_size or characters + embed_characters > max_characters):
+            yield batch
+            batch = []
+            characters = 0
+
+        batch.append(embed)
+        characters += embed_characters
 
-    return embeds
+    if batch:
+        yield batch
@@ -4,6 +4,7 @@ from typing import Optional
 from plurk_oauth import PlurkAPI
 
 from figure_hook.exceptions import PublishError
+from figure_hook.utils.rate_limit import AdaptiveTokenBucket
 
 from .abcs import Publisher, Stats
 
@@ -18,6 +19,10 @@ class PlurkerStats(Stats):
         }
         super().__init__(extension_data=init_data)
 
+    @property
+    def sending_count(self):
+        return self.data["plurk_sending_count"]
+
     @property
     def sending_success_count(self):
         return self.data["plurk_sending_count/success"]
@@ -26,16 +31,31 @@ class PlurkerStats(Stats):
     def sending_failed_count(self):
         return self.data["plurk_sending_count/failed"]
 
-    def _sending_count_plusone(self):
-        self.data["plurk_sending_count"] += 1
-
     def sending_success(self):
-        self._sending_count_plusone()
-        self.data["plurk_sending_count/success"] += 1
+        self._increase("plurk_sending_count", "plurk_sending_count/success")
 
     def sending_failed(self):
-        self._sending_count_plusone()
-        self.data["plurk_sending_count/failed"] += 1
+        self._increase("plurk_sending_count", "plurk_sending_count/failed")
+
+
+# the errors mean too many requests were sent, other errors are caused by the content.
+throttled_error_texts = (
+    "anti-flood-too-many-new",
+)
+
+
+def _is_throttled(error: dict) -> bool:
+    if error.get('code') == 429:
+        return True
+
+    content = error.get('content') or {}
+    return content.get('error_text') in throttled_error_texts
+
+
+def _make_rate_limiter() -> AdaptiveTokenBucket:
+    posts_per_minute = float(os.getenv('PLURK_POSTS_PER_MINUTE', 20))
+    burst = float(os.getenv('PLURK_POSTS_BURST', 1))
+    return AdaptiveTokenBucket(rate=posts_per_minute / 60, capacity=burst)
 
 
 class Plurker(Publisher):
@@ -46,12 +66,15 @@ class Plurker(Publisher):
         access_token: Optional[str] = None,
         access_secret: Optional[str] = None,
         stats: Optional[PlurkerStats] = None,
+        rate_limiter: Optional[AdaptiveTokenBucket] = None,
     ) -> None:
         """
         Will try to fetch `PLURK_APP_KEY`, `PLURK_APP_SECRET`,
         `PLURK_USER_TOKEN`, `PLURK_USER_SECRET` from environment variables
         if `app_key`, `app_secret`, `access_token`, `access_secret` weren't provided.
 
+        The posts are limited by `PLURK_POSTS_PER_MINUTE` and `PLURK_POSTS_BURST`
+        if `rate_limiter` wasn't provided.
         """
         APP_KEY = os.getenv('PLURK_APP_KEY', app_key)
         APP_SECRET = os.getenv('PLURK_APP_SECRET', app_secret)
@@ -65,6 +88,7 @@ class Plurker(Publisher):
             access_secret=ACCESS_TOKEN_SECRET
         )
         self._stats = stats or PlurkerStats()
+        self.rate_limiter = rate_limiter or _make_rate_limiter()
         super().__init__()
 
     @property
@@ -81,13 +105,21 @@ class Plurker(Publisher):
         return response
 
     def _publish(self, content):
+        self.rate_limiter.acquire()
         response = self.plurk.callAPI("/APP/Timeline/plurkAdd", options=content)
         if response:
             self.stats.sending_success()
+            self.rate_limiter.succeeded()
             return response
         else:
             self.stats.sending_failed()
             error = self.plurk.error()
+            if _is_throttled(error):
+                self.rate_limiter.throttled()
+            else:
+                # the post is rejected by its content, so it shouldn't delay the next post.
+                self.rate_limiter.refund()
+
             msg = error['reason']
 
             if 'error_text' in error['content']:
@@ -1,31 +1,61 @@
-import functools
+import hashlib
 from abc import ABC, abstractmethod
-from hashlib import md5
-from typing import Any, Union
+from typing import Any, Iterable, Iterator, Optional, Union
+
+import requests as rq
 
 from figure_hook.Models.source_checksum import SourceChecksum
-from figure_hook.utils.scrapyd_api import ScrapydUtil
+from figure_hook.utils.http import shared_http_session
+from figure_hook.utils.scrapyd_api import ScrapydJob, ScrapydUtil
 
 __all__ = ["BaseSourceSiteChecksum", "ProductAnnouncementChecksum", "ShipmentChecksum"]
 
 
-@functools.lru_cache
-def generate_checksum(*target) -> str:
-    m = md5()
-    for t in target:
-        m.update(t)
-    return m.hexdigest()
+def generate_checksum(*target: bytes, algorithm: str = "md5") -> str:
+    return digest_chunks(target, algorithm)
+
+
+def digest_chunks(chunks: Iterable[bytes], algorithm: str = "md5") -> str:
+    """Feed the chunks into the hasher one by one, so the chunks could be streamed."""
+    hasher = hashlib.new(algorithm)
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+ChecksumFeature = Union[bytes, list[bytes], Iterator[bytes]]
 
 
-ChecksumFeature = Union[bytes, list[bytes]]
+class SourceNotModified(Exception):
+    """The source responded `304 Not Modified` to the conditional request."""
 
 
 class BaseSourceSiteChecksum(ABC):
+    """Checksum of the source site.
+
+    The feature is fetched when the checksum is created, unless `lazy` is set,
+    then `extract_feature` should be called later, e.g. by `SourceChecksumRunner`.
+    Every request of the feature should be sent by `http_session` with `timeout`,
+    the session defaults to the pooled session shared by every checksum.
+
+    The feature could be fetched by `_conditional_request`, which sends the validators (ETag, Last-Modified)
+    saved by the last update, the source is unchanged if it responds `304 Not Modified`.
+
+    The digest of the feature is computed by `hash_algorithm` once the feature is extracted,
+    a feature which is an iterator, e.g. `response.iter_content(chunk_size)`, is hashed while it's streamed
+    and isn't kept. Changing `hash_algorithm` (e.g. to the faster `blake2b`) would change every digest once.
+    """
     __source_site__: str
     __source_checksum: SourceChecksum
-    _feature: ChecksumFeature
-
-    def __init__(self) -> None:
+    _feature: Optional[ChecksumFeature]
+    _checksum: str
+    _not_modified: bool = False
+    _validators: dict[str, Optional[str]]
+    timeout: float = 10
+    hash_algorithm: str = "md5"
+    chunk_size: int = 64 * 1024
+
+    def __init__(self, lazy: bool = False, http_session: Optional[rq.Session] = None) -> None:
         if not hasattr(self, "__source_site__"):
             raise NotImplementedError(
                 "Class attribute `__source_site__` should be implemented."
@@ -36,17 +66,24 @@ class BaseSourceSiteChecksum(ABC):
             site_checksum = SourceChecksum.create(source=self.__source_site__, checksum='init')
 
         self.__source_checksum = site_checksum
-        self.extract_feature()
+        self.http_session = http_session or shared_http_session()
+        if not lazy:
+            self.extract_feature()
 
     @property
-    def feature(self) -> ChecksumFeature:
+    def feature(self) -> Optional[ChecksumFeature]:
+        """The feature, or `None` if the source isn't modified or the feature was streamed."""
         return self._feature
 
+    @property
+    def not_modified(self) -> bool:
+        return self._not_modified
+
     @property
     def current(self) -> str:
-        if isinstance(self.feature, list):
-            return generate_checksum(*self.feature)
-        return generate_checksum(self.feature)
+        if self.not_modified:
+            return self.previous
+        return self._checksum
 
     @property
     def previous(self) -> str:
@@ -56,40 +93,117 @@ class BaseSourceSiteChecksum(ABC):
     def is_changed(self) -> bool:
         return self.current != self.previous
 
+    @property
+    def source_site(self) -> str:
+        return self.__source_site__
+
     def update(self):
-        self.__source_checksum.update(checksum=self.current)  # type: ignore
+        values = {"checksum": self.current}
+        if not self.not_modified:
+            values.update(self._validators)
+        self.__source_checksum.update(**values)  # type: ignore
 
-    def extract_feature(self):
-        self._feature = self._extract_feature()
+    @property
+    def has_new_validators(self) -> bool:
+        """Whether the response returned validators other than the ones sent."""
+        if self.not_modified or not any(self._validators.values()):
+            return False
+        return self._validators != {key: self._request_validators.get(key) for key in self._validators}
+
+    def update_validators(self):
+        """Save the new validators of the response without updating the checksum.
+
+        The unchanged source would respond `304 Not Modified` to the next conditional request.
+        """
+        if self.has_new_validators:
+            self.__source_checksum.update(**self._validators)  # type: ignore
+
+    @property
+    def validators(self) -> dict[str, Optional[str]]:
+        """The validators of the last update, read into plain values to be sent by other threads."""
+        return {
+            "etag": self.__source_checksum.etag,
+            "last_modified": self.__source_checksum.last_modified,
+        }
+
+    def extract_feature(self, validators: Optional[dict[str, Optional[str]]] = None):
+        """Fetch the feature of the source.
+
+        `validators` should be read by `validators` in the thread of the session,
+        when the feature is extracted in another thread.
+        """
+        self._request_validators = self.validators if validators is None else validators
+        self._validators = {}
+        try:
+            feature = self._extract_feature()
+            chunks = [feature] if isinstance(feature, bytes) else feature
+            self._checksum = digest_chunks(chunks, self.hash_algorithm)
+            self._feature = feature if isinstance(feature, (bytes, list)) else None
+            self._not_modified = False
+        except SourceNotModified:
+            self._feature = None
+            self._not_modified = True
+
+    def _stream_content(self, response: rq.Response) -> Iterator[bytes]:
+        return response.iter_content(self.chunk_size)
+
+    def _conditional_request(self, url: str, method: str = "GET", stream: bool = False) -> rq.Response:
+        """Request `url` with the validators of the last update.
+
+        Raise `SourceNotModified` if the source responds `304 Not Modified`,
+        otherwise the validators of the response would be saved by `update`.
+        The body of the `stream` response should be consumed by `_stream_content`.
+        """
+        headers = {}
+        if self._request_validators.get("etag"):
+            headers["If-None-Match"] = self._request_validators["etag"]
+        if self._request_validators.get("last_modified"):
+            headers["If-Modified-Since"] = self._request_validators["last_modified"]
+
+        response = self.http_session.request(method, url, headers=headers, timeout=self.timeout, stream=stream)
+        if response.status_code == 304:
+            response.close()
+            raise SourceNotModified(url)
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+
+        self._validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        return response
 
     @abstractmethod
     def _extract_feature(self) -> ChecksumFeature:
-        """Return any bytes which could identify the site has changed."""
+        """Return any bytes, or the chunks of bytes, which could identify the site has changed."""
 
 
 class ProductAnnouncementChecksum(BaseSourceSiteChecksum, ABC):
     __spider__: str
     scrapyd_util: ScrapydUtil
 
-    def __init__(self, scrapyd_util: ScrapydUtil) -> None:
+    def __init__(
+        self,
+        scrapyd_util: ScrapydUtil,
+        lazy: bool = False,
+        http_session: Optional[rq.Session] = None
+    ) -> None:
         self.scrapyd_util = scrapyd_util
-        super().__init__()
+        super().__init__(lazy=lazy, http_session=http_session)
 
     @property
     @abstractmethod
     def spider_configs(self) -> list[dict[str, Any]]:
         pass
 
-    def trigger_crawler(self) -> list:
-        """Trigger the spiders to parse new product."""
-        jobs = []
-        for config in self.spider_configs:
-            spider_name = self.__spider__
-            settings = config['settings']
-            job = self.scrapyd_util.schedule_spider(spider_name, settings=settings)
-            jobs.append(job)
+    def trigger_crawler(self) -> list[ScrapydJob]:
+        """Trigger the spiders to parse new product.
 
-        return jobs
+        The spider wouldn't be triggered again while it's pending or running.
+        """
+        settings_list = [config['settings'] for config in self.spider_configs]
+        return self.scrapyd_util.dispatch(self.__spider__, settings_list)
 
 
 class ShipmentChecksum(BaseSourceSiteChecksum, ABC):
@@ -0,0 +1,103 @@
+import re
+from typing import Iterable, Optional, Pattern, Union
+
+from lxml import etree
+
+__all__ = ["RegionFeature"]
+
+
+class RegionFeature:
+    """Extract the relevant region of HTML by a streaming parser.
+
+    The region is the elements `tag` with the class `class_name`, or every element `tag` without `class_name`,
+    the elements of any tag are matched by `class_name` if `tag` is `None`,
+    every element is reduced to its texts and links, so the volatile nodes around the region,
+    e.g. ads, CSRF tokens and timestamps, wouldn't change the feature.
+
+    Parameters
+    -----------
+    tag: Optional[`str`]
+        Tag name of the region elements.
+    class_name: Optional[`str`]
+        Class of the region elements.
+    text_pattern: Optional[`re.Pattern`]
+        Only the elements whose text matches the pattern are kept.
+    ignored_tags: Iterable[`str`]
+        Tags which are skipped inside the region.
+    ignored_classes: Iterable[`str`]
+        Classes of the elements which are skipped inside the region.
+    """
+    default_ignored_tags = ("script", "style", "noscript", "input", "meta", "iframe")
+    kept_attributes = ("href", "src")
+
+    def __init__(
+        self,
+        tag: Optional[str],
+        class_name: Optional[str] = None,
+        text_pattern: Optional[Union[str, Pattern]] = None,
+        ignored_tags: Iterable[str] = default_ignored_tags,
+        ignored_classes: Iterable[str] = ()
+    ) -> None:
+        if not tag and not class_name:
+            raise ValueError("Either tag or class_name should be provided.")
+
+        self.tag = tag
+        self.class_name = class_name
+        self.text_pattern = re.compile(text_pattern) if isinstance(text_pattern, str) else text_pattern
+        self.ignored_tags = frozenset(ignored_tags)
+        self.ignored_classes = frozenset(ignored_classes)
+
+    def extract(self, content: Union[bytes, Iterable[bytes]]) -> list[bytes]:
+        """Return the reduced region elements of `content`, which could be streamed in chunks."""
+        chunks = [content] if isinstance(content, bytes) else content
+        parser = etree.HTMLPullParser(events=("end",), tag=self.tag)
+        region = []
+        for chunk in chunks:
+            parser.feed(chunk)
+            region.extend(self._read_events(parser))
+
+        parser.close()
+        region.extend(self._read_events(parser))
+        return region
+
+    def _read_events(self, parser: etree.HTMLPullParser):
+        for _, element in parser.read_events():
+            if not self.class_name or self._has_class(element, self.class_name):
+                reduced = self._reduce(element)
+                if not self.text_pattern or self.text_pattern.search(reduced):
+                    yield reduced.encode("utf-8")
+                element.clear(keep_tail=True)
+
+    def _reduce(self, element) -> str:
+        parts = []
+        self._reduce_into(element, parts)
+        return " ".join(parts)
+
+    def _reduce_into(self, element, parts: list[str]):
+        if not isinstance(element.tag, str):
+            # comments and processing instructions
+            return
+        if element.tag in self.ignored_tags or self._is_ignored_class(element):
+            return
+
+        for attribute in self.kept_attributes:
+            value = element.get(attribute)
+            if value:
+                parts.append(value)
+        if element.text and element.text.strip():
+            parts.append(element.text.strip())
+
+        for child in element:
+            self._reduce_into(child, parts)
+            if child.tail and child.tail.strip():
+                parts.append(child.tail.strip())
+
+    def _is_ignored_class(self, element) -> bool:
+        if not self.ignored_classes:
+            return False
+        classes = (element.get("class") or "").split()
+        return not self.ignored_classes.isdisjoint(classes)
+
+    @staticmethod
+    def _has_class(element, class_name: str) -> bool:
+        return class_name in (element.get("class") or "").split()
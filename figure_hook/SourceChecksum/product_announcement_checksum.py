@@ -1,7 +1,6 @@
-from typing import Any
+from typing import Any, Iterator, Optional
 
-import requests as rq
-from figure_parser.alter.announcecment_parser import fetch_alter_newest_year
+from bs4 import BeautifulSoup
 from figure_parser.constants import (AlterCategory, GSCCategory, GSCLang,
                                      NativeCategory)
 from figure_parser.utils import RelativeUrl
@@ -10,6 +9,7 @@ from figure_hook.constants import SourceSite
 from figure_hook.Helpers.datetime_helper import DatetimeHelper
 
 from .abcs import ProductAnnouncementChecksum
+from .features import RegionFeature
 
 __all__ = [
     "GSCProductAnnouncementChecksum",
@@ -21,6 +21,7 @@ __all__ = [
 class GSCProductAnnouncementChecksum(ProductAnnouncementChecksum):
     __source_site__ = SourceSite.GSC_ANNOUNCEMENT
     __spider__ = "gsc_product"
+    region = RegionFeature("div", "hitItem")
 
     @property
     def spider_configs(self) -> list[dict[str, Any]]:
@@ -35,13 +36,11 @@ class GSCProductAnnouncementChecksum(ProductAnnouncementChecksum):
             }
         ]
 
-    @staticmethod
-    def _extract_feature() -> bytes:
+    def _extract_feature(self) -> list[bytes]:
         url = RelativeUrl.gsc(
             f"/{GSCLang.JAPANESE}/products/category/{GSCCategory.SCALE}/announced/{DatetimeHelper.today().year}")
-        response = rq.get(url)
-        response.raise_for_status()
-        return response.content
+        response = self._conditional_request(url, stream=True)
+        return self.region.extract(self._stream_content(response))
 
 
 class AlterProductAnnouncementChecksum(ProductAnnouncementChecksum):
@@ -74,13 +73,20 @@ class AlterProductAnnouncementChecksum(ProductAnnouncementChecksum):
             },
         ]
 
-    @staticmethod
-    def _extract_feature() -> bytes:
-        year = fetch_alter_newest_year()
+    def _extract_feature(self) -> Iterator[bytes]:
+        year = self._fetch_newest_year()
         url = RelativeUrl.alter(f"/{AlterCategory.ALL}/?yy={year}")
-        response = rq.get(url)
+        response = self._conditional_request(url, stream=True)
+        return self._stream_content(response)
+
+    def _fetch_newest_year(self) -> Optional[int]:
+        """Same as `fetch_alter_newest_year` of figure_parser, but fetched by `http_session`."""
+        response = self.http_session.get("http://www.alter-web.jp/products/", timeout=self.timeout)
         response.raise_for_status()
-        return response.content
+        page = BeautifulSoup(response.text, "lxml")
+        year_options = page.select("#changeY option")
+        years = [int(option["value"]) for option in year_options if option["value"].isdigit()]
+        return max(years, default=None)
 
 
 class NativeProductAnnouncementChecksum(ProductAnnouncementChecksum):
@@ -106,10 +112,8 @@ class NativeProductAnnouncementChecksum(ProductAnnouncementChecksum):
             },
         ]
 
-    @staticmethod
-    def _extract_feature() -> bytes:
+    def _extract_feature(self) -> bytes:
         url = RelativeUrl.native("/news/feed/")
-        response = rq.head(url)
+        response = self._conditional_request(url, method="HEAD")
         etag = response.headers.get('ETag')
-        response.raise_for_status()
         return str(etag).encode("utf-8")
@@ -0,0 +1,88 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .abcs import BaseSourceSiteChecksum
+
+__all__ = ["SourceChecksumRunner", "SourceChecksumResult"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceChecksumResult:
+    changed: list[BaseSourceSiteChecksum] = field(default_factory=list)
+    unchanged: list[BaseSourceSiteChecksum] = field(default_factory=list)
+    failed: dict[str, BaseException] = field(default_factory=dict)
+    """Errors of the sources which couldn't be fetched, keyed by the source site."""
+
+
+class SourceChecksumRunner:
+    """Fetch the features of the checksums concurrently and update the changed checksums.
+
+    The checksums should be created with `lazy=True` in the session of the run,
+    every source is waited for its own `timeout` since the run is started,
+    so a full check takes about as long as the slowest source.
+    The changed checksums are updated in the session, the caller should commit them in one transaction.
+    The new validators of the unchanged checksums are always saved in the session.
+
+    Parameters
+    -----------
+    checksums: Iterable[`BaseSourceSiteChecksum`]
+        The checksums to be checked.
+    max_workers: Optional[`int`]
+        Maximum threads to fetch the features, defaults to the number of checksums.
+    """
+
+    def __init__(self, checksums: Iterable[BaseSourceSiteChecksum], max_workers: Optional[int] = None) -> None:
+        self.checksums = list(checksums)
+        self.max_workers = max_workers or max(1, len(self.checksums))
+
+    def run(self, update: bool = True) -> SourceChecksumResult:
+        result = SourceChecksumResult()
+        if not self.checksums:
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="source-checksum")
+        try:
+            started_at = time.monotonic()
+            # the session isn't thread-safe, the validators are read before the features are fetched.
+            futures = [
+                (checksum, executor.submit(checksum.extract_feature, checksum.validators))
+                for checksum in self.checksums
+            ]
+            for checksum, future in futures:
+                error = self._wait(future, started_at + checksum.timeout)
+                if error:
+                    logger.warning(f"Failed to fetch the feature of {checksum.source_site}: {error!r}")
+                    result.failed[checksum.source_site] = error
+                elif checksum.is_changed:
+                    result.changed.append(checksum)
+                else:
+                    result.unchanged.append(checksum)
+        finally:
+            # the features not fetched before the timeout are abandoned.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if update:
+            for checksum in result.changed:
+                checksum.update()
+
+        # the validators don't change the result, so they are saved even without `update`.
+        for checksum in result.unchanged:
+            checksum.update_validators()
+
+        return result
+
+    @staticmethod
+    def _wait(future: Future, deadline: float) -> Optional[BaseException]:
+        try:
+            future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            return TimeoutError("The feature wasn't fetched in time.")
+        except Exception as err:
+            return err
+        return None
@@ -1,18 +1,18 @@
-import requests as rq
 
 from figure_hook.constants import SourceSite
 
 from .abcs import ShipmentChecksum
+from .features import RegionFeature
 
 __all__ = ["GSCShipmentChecksum"]
 
 
 class GSCShipmentChecksum(ShipmentChecksum):
     __source_site__ = SourceSite.GSC_SHIPMENT
+    # the shipment listing of every month, without the banners and timestamps around it.
+    region = RegionFeature(None, "arrowlisting")
 
-    def _extract_feature(self) -> bytes:
+    def _extract_feature(self) -> list[bytes]:
         url = "https://www.goodsmile.info/ja/releaseinfo"
-        response = rq.get(url)
-        response.raise_for_status()
-
-        return response.content
+        response = self._conditional_request(url, stream=True)
+        return self.region.extract(self._stream_content(response))
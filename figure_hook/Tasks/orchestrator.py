@@ -0,0 +1,228 @@
+import logging
+import queue
+import select
+import threading
+import time
+from typing import Callable, Iterable, Optional, Sequence
+
+from figure_hook.database import PostgreSQLDB, pgsql_session
+from figure_hook.Models import NEW_RELEASE_CHANNEL
+from figure_hook.SourceChecksum.abcs import (BaseSourceSiteChecksum,
+                                             ProductAnnouncementChecksum)
+from figure_hook.SourceChecksum.delay_checksum import GSCDelayChecksum
+from figure_hook.SourceChecksum.product_announcement_checksum import (
+    AlterProductAnnouncementChecksum, GSCProductAnnouncementChecksum,
+    NativeProductAnnouncementChecksum)
+from figure_hook.SourceChecksum.runner import (SourceChecksumResult,
+                                               SourceChecksumRunner)
+from figure_hook.SourceChecksum.shipment_checksum import GSCShipmentChecksum
+from figure_hook.Tasks.periodic import (DiscordNewReleasePush,
+                                        DiscordWebhookRevalidation,
+                                        PlurkNewReleasePush,
+                                        PlurkPublishJobPush)
+from figure_hook.utils.scrapyd_api import (SCRAPY_PROJECT_NAME, SCRAPYD_URL,
+                                           ScrapydUtil)
+
+__all__ = ["PipelineEvent", "NewReleaseListener", "ReleasePipeline"]
+
+default_logger = logging.getLogger(__name__)
+
+
+class PipelineEvent:
+    NEW_RELEASE = "new_release"
+
+
+class NewReleaseListener:
+    """`LISTEN` to `NEW_RELEASE_CHANNEL` and put `PipelineEvent.NEW_RELEASE` into `events`.
+
+    The listener reconnects after the connection is lost, and puts an event after reconnecting,
+    since the notifications sent in between are lost.
+    """
+
+    def __init__(self, events: queue.Queue, engine=None, poll_interval: float = 1, retry_interval: float = 5) -> None:
+        self.events = events
+        self.engine = engine or PostgreSQLDB().engine
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.listening = threading.Event()
+
+    def start(self, stop: threading.Event) -> threading.Thread:
+        thread = threading.Thread(target=self.run, args=(stop,), name="new-release-listener", daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, stop: threading.Event, logger: logging.Logger = default_logger):
+        reconnected = False
+        while not stop.is_set():
+            try:
+                self._listen(stop, reconnected)
+            except Exception:
+                logger.exception("Lost the connection listening to %s.", NEW_RELEASE_CHANNEL)
+                self.listening.clear()
+                reconnected = True
+                stop.wait(self.retry_interval)
+
+    def _listen(self, stop: threading.Event, reconnected: bool):
+        raw_connection = self.engine.raw_connection()
+        # the connection in autocommit mode shouldn't be returned to the pool.
+        raw_connection.detach()
+        connection = raw_connection.connection
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NEW_RELEASE_CHANNEL};")
+            self.listening.set()
+            if reconnected:
+                self.events.put(PipelineEvent.NEW_RELEASE)
+
+            while not stop.is_set():
+                readable, _, _ = select.select([connection], [], [], self.poll_interval)
+                if not readable:
+                    continue
+
+                connection.poll()
+                if connection.notifies:
+                    connection.notifies.clear()
+                    self.events.put(PipelineEvent.NEW_RELEASE)
+        finally:
+            self.listening.clear()
+            raw_connection.close()
+
+
+def default_checksums(scrapyd_util: ScrapydUtil) -> list[BaseSourceSiteChecksum]:
+    return [
+        GSCProductAnnouncementChecksum(scrapyd_util, lazy=True),
+        AlterProductAnnouncementChecksum(scrapyd_util, lazy=True),
+        NativeProductAnnouncementChecksum(scrapyd_util, lazy=True),
+        GSCShipmentChecksum(lazy=True),
+        GSCDelayChecksum(lazy=True),
+    ]
+
+
+def push_to_discord():
+    with pgsql_session() as session:
+        DiscordNewReleasePush(session).execute()
+
+
+def push_to_plurk():
+    with pgsql_session() as session:
+        PlurkNewReleasePush(session).execute()
+    PlurkPublishJobPush().execute()
+
+
+def revalidate_discord_webhooks():
+    with pgsql_session() as session:
+        DiscordWebhookRevalidation(session).execute()
+
+
+class ReleasePipeline:
+    """Chain the stages of new releases by events instead of periods.
+
+    - checksum -> crawl: the sources are checked every `check_interval` seconds,
+      the changed announcements trigger their spiders at once.
+    - crawl -> ingest: the spiders ingest the products by `ProductModelFactory` in their own processes.
+    - ingest -> push: every transaction inserting release infos notifies `NEW_RELEASE_CHANNEL`,
+      the push tasks run `debounce` seconds after the first notification,
+      so the releases of a crawl inserted in several transactions are pushed together.
+
+    Parameters
+    -----------
+    checksum_factory: Callable[[], Iterable[`BaseSourceSiteChecksum`]]
+        Create the lazy checksums in the session of the check.
+    push_tasks: Sequence[Callable[[], Any]]
+        Tasks to push the new releases, they should open their own sessions.
+    maintenance_tasks: Sequence[Callable[[], Any]]
+        Tasks run after every check of the sources, e.g. revalidating the dead webhooks,
+        they should open their own sessions.
+    """
+    # seconds to check whether the pipeline is stopped.
+    poll_interval: float = 1
+
+    def __init__(
+        self,
+        checksum_factory: Optional[Callable[[], Iterable[BaseSourceSiteChecksum]]] = None,
+        push_tasks: Sequence[Callable] = (push_to_discord, push_to_plurk),
+        maintenance_tasks: Sequence[Callable] = (revalidate_discord_webhooks,),
+        check_interval: float = 600,
+        debounce: float = 5,
+        events: Optional[queue.Queue] = None,
+        listener: Optional[NewReleaseListener] = None,
+        session_scope=pgsql_session,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.checksum_factory = checksum_factory or (
+            lambda: default_checksums(ScrapydUtil(SCRAPYD_URL, SCRAPY_PROJECT_NAME))
+        )
+        self.push_tasks = push_tasks
+        self.maintenance_tasks = maintenance_tasks
+        self.check_interval = check_interval
+        self.debounce = debounce
+        self.events = events or queue.Queue()
+        self.listener = listener or NewReleaseListener(self.events)
+        self._session_scope = session_scope
+        self._clock = clock
+
+    def run(self, stop: threading.Event, logger: logging.Logger = default_logger):
+        self.listener.start(stop)
+        next_check_at = self._clock()
+        push_at: Optional[float] = None
+
+        while not stop.is_set():
+            deadline = min(next_check_at, push_at if push_at is not None else next_check_at)
+            timeout = min(max(0.0, deadline - self._clock()), self.poll_interval)
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event == PipelineEvent.NEW_RELEASE and push_at is None:
+                push_at = self._clock() + self.debounce
+
+            if push_at is not None and self._clock() >= push_at:
+                push_at = None
+                self.push(logger)
+
+            if self._clock() >= next_check_at:
+                next_check_at = self._clock() + self.check_interval
+                self.check_sources(logger)
+                self.maintain(logger)
+
+    def check_sources(self, logger: logging.Logger = default_logger) -> Optional[SourceChecksumResult]:
+        """Check the sources and trigger the spiders of the changed announcements.
+
+        The checksum of an announcement is only updated after its spiders are triggered,
+        so the announcement failed to trigger is still changed in the next check.
+        """
+        try:
+            with self._session_scope():
+                result = SourceChecksumRunner(self.checksum_factory()).run(update=False)
+                for checksum in list(result.changed):
+                    if isinstance(checksum, ProductAnnouncementChecksum):
+                        try:
+                            checksum.trigger_crawler()
+                        except Exception as err:
+                            logger.exception("Failed to trigger the crawler of %s.", checksum.source_site)
+                            result.changed.remove(checksum)
+                            result.failed[checksum.source_site] = err
+                            continue
+
+                    checksum.update()
+        except Exception:
+            logger.exception("Failed to check the sources.")
+            return None
+
+        return result
+
+    def push(self, logger: logging.Logger = default_logger):
+        for task in self.push_tasks:
+            try:
+                task()
+            except Exception:
+                logger.exception("Failed to push the new releases by %s.", getattr(task, "__name__", task))
+
+    def maintain(self, logger: logging.Logger = default_logger):
+        for task in self.maintenance_tasks:
+            try:
+                task()
+            except Exception:
+                logger.exception("Failed to run the maintenance task %s.", getattr(task, "__name__", task))
@@ -1,17 +1,30 @@
 import logging
-import time
+import os
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from discord.webhook import RequestsWebhookAdapter
-from sqlalchemy import select, update
+import requests as rq
+from requests.adapters import HTTPAdapter
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
 
-from figure_hook.constants import PeriodicTask
+from figure_hook.Adapters.webhook_adapter import (DiscordRateLimiter,
+                                                  RateLimitedWebhookAdapter)
+from figure_hook.constants import PeriodicTask, PublishTarget
 from figure_hook.extension_class import ReleaseFeed
 from figure_hook.Factory.publish_factory.discord_embed_factory import \
     DiscordEmbedFactory
 from figure_hook.Factory.publish_factory.plurk_content_factory import \
     PlurkContentFactory
+from figure_hook.database import PostgreSQLDB, pgsql_session
 from figure_hook.Helpers.db_helper import ReleaseHelper
+from figure_hook.Helpers.discord_delivery_helper import (Delivery,
+                                                         DiscordDeliveryHelper)
+from figure_hook.Helpers.publish_job_helper import PublishJobHelper
 from figure_hook.Publishers.discord_hooker import DiscordNewReleaseHooker
 from figure_hook.Models import Task, Webhook
 from figure_hook.exceptions import PublishError
@@ -21,7 +34,13 @@ default_logger = logging.getLogger(__name__)
 
 
 class NewReleasePush(ABC):
+    """Push the releases created since the last execution.
+
+    The execution time is updated before the releases are pushed,
+    so the releases not pushed should be kept by the subclass, e.g. the deliveries or the publish jobs.
+    """
     __task_id__: PeriodicTask
+    release_chunk_size = 500
 
     def __init__(self, session):
         self._session = session
@@ -57,6 +76,14 @@ class NewReleasePush(ABC):
         )
         return releases
 
+    def _iter_new_releases(self):
+        """Stream new releases in chunks with `release_chunk_size`."""
+        return ReleaseHelper.iter_new_releases(
+            self.session,
+            self.executed_at,
+            chunk_size=self.release_chunk_size
+        )
+
     def _update_execution_time(self):
         self._model.update()
 
@@ -66,34 +93,225 @@ class NewReleasePush(ABC):
 
 
 class DiscordNewReleasePush(NewReleasePush):
+    """Deliver new releases to every webhook.
+
+    The deliveries of new releases are planned in `discord_delivery` before the execution time is updated,
+    then they are claimed in batches and marked as delivered once the webhook received them.
+    The undelivered ones would be resumed by the next execution, so several processes could share the work.
+    """
     __task_id__ = PeriodicTask.DISCORD_NEW_RELEASE_PUSH
+    delivery_lease = timedelta(minutes=10)
 
-    def execute(self):
-        raw_embeds = [DiscordEmbedFactory.create_new_release(release) for release in self._fetch_new_releases()]
-        self._update_execution_time()
+    def __init__(self, session, max_workers: Optional[int] = None):
+        """
+        Will try to fetch `DISCORD_PUSH_MAX_WORKERS` from environment variables
+        if `max_workers` wasn't provided.
+        """
+        # deliveries are tracked in their own transactions, so they are durable even if the push is aborted.
+        self._delivery_scope = PostgreSQLDB().Session.begin
+        super().__init__(session)
+        self.max_workers = max_workers or int(os.getenv("DISCORD_PUSH_MAX_WORKERS", 8))
 
-        webhook_adapter = RequestsWebhookAdapter()
-        publisher = DiscordNewReleaseHooker(raw_embeds=raw_embeds)
+    def _fetch_model(self):
+        # the task is created in its own transaction, so `session` never locks the task.
+        with self._delivery_scope() as delivery_session:
+            delivery_session.execute(insert(Task.__table__).values(name=self.name).on_conflict_do_nothing())
+        return super()._fetch_model()
+
+    def execute(self, logger: logging.Logger = default_logger):
+        with self._delivery_scope() as delivery_session:
+            checkpoint = self._advance_checkpoint(delivery_session)
+            DiscordDeliveryHelper.prune(delivery_session, checkpoint)
+            DiscordDeliveryHelper.plan(delivery_session, checkpoint)
+        self.session.expire(self._model, ["executed_at"])
 
-        webhooks = Webhook.all()
-        for webhook in webhooks:
-            publisher.publish(webhook=webhook, webhook_adapter=webhook_adapter)
+        publisher = DiscordNewReleaseHooker(raw_embeds=[])
+        delivered_count = 0
 
-        self._update_webhook_status(publisher.webhook_status)
+        # the webhooks receiving the same embeds are adjacent, so the embeds are rendered once for every group.
+        live_webhooks = select(Webhook).where(
+            Webhook.is_live
+        ).order_by(
+            Webhook.lang, Webhook.is_nsfw, Webhook.channel_id
+        )
+        webhooks = {webhook.channel_id: webhook for webhook in self.session.execute(live_webhooks).scalars()}
+        Webhook.decrypt_tokens(webhooks.values())
+        rate_limiter = DiscordRateLimiter()
+        try:
+            with rq.Session() as http_session:
+                pool = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                http_session.mount("https://", pool)
+
+                def webhook_adapter_factory():
+                    return RateLimitedWebhookAdapter(session=http_session, rate_limiter=rate_limiter)
+
+                while True:
+                    with self._delivery_scope() as delivery_session:
+                        deliveries = DiscordDeliveryHelper.claim(
+                            delivery_session, self.release_chunk_size * self.max_workers, self.delivery_lease
+                        )
+                    if not deliveries:
+                        break
+
+                    delivered_count += self._deliver(
+                        publisher, webhooks, deliveries, webhook_adapter_factory, logger
+                    )
+        except Exception:
+            logger.exception(
+                "Discord push was aborted after %d deliveries, the others would be resumed by the next execution.",
+                delivered_count
+            )
+            raise
+        finally:
+            # keep the status of webhooks which have been published even if the push is aborted.
+            self._update_webhook_status(publisher.webhook_status)
 
         return publisher.stats
 
-    def _update_webhook_status(self, webhook_status):
-        for webhook_id, is_existed in webhook_status.items():
-            stmt = update(Webhook).where(
-                Webhook.id == webhook_id
+    def _advance_checkpoint(self, delivery_session) -> datetime:
+        """Update the execution time and return the previous one.
+
+        The task is locked until the deliveries are planned, so the other workers
+        wait for the planning instead of the whole push.
+        """
+        stmt = select(Task.executed_at).where(Task.name == self.name).with_for_update()
+        checkpoint = delivery_session.execute(stmt).scalar_one()
+        delivery_session.execute(
+            update(Task).where(
+                Task.name == self.name
             ).values(
-                is_existed=is_existed
+                executed_at=func.now()
             ).execution_options(
-                synchronize_session="fetch"
+                synchronize_session=False
+            )
+        )
+        return checkpoint
+
+    def _deliver(
+        self,
+        publisher: DiscordNewReleaseHooker,
+        webhooks: dict[str, Webhook],
+        deliveries: List[Delivery],
+        webhook_adapter_factory,
+        logger: logging.Logger
+    ) -> int:
+        """Publish the claimed deliveries, the webhooks received the same releases are published together."""
+        release_ids_by_channel: dict[str, list[int]] = defaultdict(list)
+        for release_id, channel_id in deliveries:
+            release_ids_by_channel[channel_id].append(release_id)
+
+        with self._delivery_scope() as delivery_session:
+            releases = ReleaseHelper.fetch_release_feed_by_ids(
+                delivery_session, sorted({release_id for release_id, _ in deliveries})
             )
+        embeds = {release.id: DiscordEmbedFactory.create_new_release(release) for release in releases}
 
-            self.session.execute(stmt)
+        # keep the order of `webhooks`, so the webhooks of every release group are still grouped by embeds.
+        webhooks_by_releases: dict[tuple[int, ...], list[Webhook]] = defaultdict(list)
+        done = []
+        for channel_id, webhook in webhooks.items():
+            release_ids = release_ids_by_channel.pop(channel_id, None)
+            if release_ids is None:
+                continue
+            if publisher.webhook_status.get(webhook.id, True):
+                webhooks_by_releases[tuple(release_ids)].append(webhook)
+            else:
+                done.extend((release_id, channel_id) for release_id in release_ids)
+
+        # the webhooks removed or not found don't need the deliveries.
+        for channel_id, release_ids in release_ids_by_channel.items():
+            done.extend((release_id, channel_id) for release_id in release_ids)
+
+        with self._delivery_scope() as delivery_session:
+            DiscordDeliveryHelper.mark_delivered(delivery_session, done)
+
+        delivered_count = 0
+        for release_ids, grouped_webhooks in webhooks_by_releases.items():
+            publisher.reset_raw_embeds([embeds[release_id] for release_id in release_ids if release_id in embeds])
+            errors = publisher.publish_concurrently(
+                grouped_webhooks,
+                max_workers=self.max_workers,
+                webhook_adapter_factory=webhook_adapter_factory
+            )
+            if errors:
+                logger.warning("%d webhooks failed, they would be retried after the lease expired.", len(errors))
+
+            delivered = [
+                (release_id, webhook.channel_id)
+                for webhook in grouped_webhooks if str(webhook.id) not in errors
+                for release_id in release_ids
+            ]
+            with self._delivery_scope() as delivery_session:
+                DiscordDeliveryHelper.mark_delivered(delivery_session, delivered)
+            delivered_count += len(delivered)
+
+        return delivered_count
+
+    def _update_webhook_status(self, webhook_status):
+        Webhook.update_status(self.session, webhook_status)
+
+
+class DiscordWebhookRevalidation:
+    """Revalidate the dead webhooks, which are skipped by `DiscordNewReleasePush`.
+
+    Every dead webhook is fetched without sending a message once per `revalidate_interval`,
+    it would be live again if it's found. The webhook missing for `max_missing_count` times is tombstoned,
+    and it wouldn't be revalidated anymore.
+    """
+    __task_id__ = PeriodicTask.DISCORD_WEBHOOK_REVALIDATION
+    api_base = "https://discord.com/api/v7"
+    revalidate_interval = timedelta(days=1)
+    max_missing_count = 7
+
+    def __init__(self, session, http_session: Optional[rq.Session] = None, max_workers: int = 4, timeout: float = 10):
+        self.session = session
+        self.http_session = http_session or rq.Session()
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def execute(self, logger: logging.Logger = default_logger) -> dict[str, Optional[bool]]:
+        """Return whether the revalidated webhooks are found, or `None` if they couldn't be checked."""
+        self._update_execution_time()
+        stmt = select(Webhook).where(
+            Webhook.is_existed.is_(False),
+            Webhook.missing_count < self.max_missing_count,
+            or_(Webhook.checked_at.is_(None), Webhook.checked_at < func.now() - self.revalidate_interval)
+        )
+        webhooks = self.session.execute(stmt).scalars().all()
+        if not webhooks:
+            return {}
+
+        tokens = Webhook.decrypt_tokens(webhooks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            status_codes = list(executor.map(lambda webhook: self._fetch(webhook.id, tokens[webhook.id]), webhooks))
+
+        webhook_status: dict[str, Optional[bool]] = {}
+        for webhook, status_code in zip(webhooks, status_codes):
+            if status_code == 404:
+                webhook_status[webhook.id] = False
+            elif status_code is not None and 200 <= status_code < 300:
+                webhook_status[webhook.id] = True
+            else:
+                # revalidate it again after the interval.
+                webhook_status[webhook.id] = None
+                logger.warning("Failed to revalidate webhook %s (%s).", webhook.id, status_code)
+
+        Webhook.update_revalidation(self.session, webhook_status)
+        return webhook_status
+
+    def _update_execution_time(self):
+        task = self.session.execute(select(Task).where(Task.name == self.__task_id__.name)).scalar()
+        if task:
+            task.update()
+        else:
+            Task.create(name=self.__task_id__.name)
+
+    def _fetch(self, webhook_id: str, token: str) -> Optional[int]:
+        try:
+            response = self.http_session.get(f"{self.api_base}/webhooks/{webhook_id}/{token}", timeout=self.timeout)
+        except rq.RequestException:
+            return None
+        return response.status_code
 
 
 class PlurkNewReleasePush(NewReleasePush):
@@ -106,17 +324,65 @@ class PlurkNewReleasePush(NewReleasePush):
         self.plurker = Plurker()
 
     def execute(self, logger: logging.Logger = default_logger):
-        new_releases = self._fetch_new_releases()
+        release_chunks = self._iter_new_releases()
         self._update_execution_time()
 
-        for release in new_releases:
-            content = PlurkContentFactory.create_new_release(release)
-            try:
-                self.plurker.publish(content=content)
-            except PublishError as err:
-                self.failed_releases.append(release)
-                logger.error(err)
-            finally:
-                time.sleep(3)
+        for new_releases in release_chunks:
+            for release in new_releases:
+                content = PlurkContentFactory.create_new_release(release)
+                try:
+                    self.plurker.publish(content=content)
+                except PublishError as err:
+                    self.failed_releases.append(release)
+                    logger.error(err)
+
+        # retry the failed releases by `PlurkPublishJobPush` later.
+        PublishJobHelper.enqueue(
+            self.session, [release.id for release in self.failed_releases], PublishTarget.PLURK
+        )
+
+        return self.plurker.stats
+
+
+class PlurkPublishJobPush:
+    """Publish the releases in the plurk outbox.
+
+    Every batch is claimed, published and committed in its own transaction,
+    so several workers could run at the same time.
+    """
+    target = PublishTarget.PLURK
+
+    def __init__(self, batch_size: int = 20, plurker: Optional[Plurker] = None, session_scope=pgsql_session):
+        self.batch_size = batch_size
+        self.plurker = plurker or Plurker()
+        self._session_scope = session_scope
+
+    def execute(self, logger: logging.Logger = default_logger):
+        while self._publish_batch(logger):
+            pass
 
         return self.plurker.stats
+
+    def _publish_batch(self, logger: logging.Logger) -> int:
+        with self._session_scope() as session:
+            jobs = PublishJobHelper.claim(session, self.target, self.batch_size)
+            releases = ReleaseHelper.fetch_release_feed_by_ids(session, [job.release_id for job in jobs])
+            releases_by_id = {release.id: release for release in releases}
+
+            for job in jobs:
+                release = releases_by_id.get(job.release_id)
+                if not release:
+                    # the release couldn't be published anymore.
+                    PublishJobHelper.complete(session, job)
+                    continue
+
+                content = PlurkContentFactory.create_new_release(release)
+                try:
+                    self.plurker.publish(content=content)
+                except PublishError as err:
+                    PublishJobHelper.fail(session, job, str(err))
+                    logger.error(err)
+                else:
+                    PublishJobHelper.complete(session, job)
+
+            return len(jobs)
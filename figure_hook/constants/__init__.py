@@ -9,6 +9,11 @@ class SourceSite:
     NATIVE_ANNOUNCEMENT = "native_announcement"
 
 
+class PublishTarget:
+    PLURK = "plurk"
+
+
 class PeriodicTask(Enum):
     DISCORD_NEW_RELEASE_PUSH = 1
     PLURK_NEW_RELEASE_PUSH = 2
+    DISCORD_WEBHOOK_REVALIDATION = 3
@@ -23,6 +23,7 @@ class ReleaseFeed:
     image_url: str
     thumbnail: Optional[str]
     og_image: Optional[str]
+    checksum: Optional[str] = None
 
     @property
     def media_image(self):
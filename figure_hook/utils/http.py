@@ -0,0 +1,60 @@
+from threading import Lock
+from typing import Optional
+
+import requests as rq
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+__all__ = ["TimeoutHTTPAdapter", "create_http_session", "shared_http_session"]
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter which sends the requests without timeout with the default `timeout`."""
+
+    def __init__(self, *args, timeout: float = 10, **kwargs) -> None:
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_http_session(
+    pool_maxsize: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    timeout: float = 10
+) -> rq.Session:
+    """Create a keep-alive session which keeps at most `pool_maxsize` connections to every host.
+
+    The idempotent requests are retried for `retries` times on connection errors and 5xx responses.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry, timeout=timeout)
+
+    session = rq.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_shared_session: Optional[rq.Session] = None
+_shared_session_lock = Lock()
+
+
+def shared_http_session() -> rq.Session:
+    """The session shared by the source checksums, so the connections are reused between polls."""
+    global _shared_session
+
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_http_session()
+        return _shared_session
@@ -0,0 +1,113 @@
+import time
+from threading import Lock
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` tokens per second and at most
+    `capacity` tokens could be stored.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None
+    ) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("The rate and capacity should be larger than 0.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep or time.sleep
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._lock = Lock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take the tokens and return the seconds should be waited before using them."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until the tokens are available and return the waited seconds."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def refund(self, tokens: float = 1):
+        """Give back the tokens which were taken by a request not counted by the server."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket which slows down after being throttled.
+
+    When it is throttled, the rate is halved and no token is handed out for a backoff,
+    the backoff is doubled from `min_backoff` up to `max_backoff` while it is throttled repeatedly.
+    Every success resets the backoff and raises the rate by `1 / recovery_steps` of the initial rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        recovery_steps: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None
+    ) -> None:
+        super().__init__(rate=rate, capacity=capacity, clock=clock, sleep=sleep)
+        self.max_rate = rate
+        self.min_rate = rate / 2 ** 10
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.recovery_steps = recovery_steps
+        self._backoff = 0.0
+        self._blocked_until = float("-inf")
+
+    @property
+    def backoff(self):
+        return self._backoff
+
+    def acquire(self, tokens: float = 1) -> float:
+        with self._lock:
+            blocked = max(0.0, self._blocked_until - self._clock())
+
+        if blocked > 0:
+            self._sleep(blocked)
+
+        return blocked + super().acquire(tokens)
+
+    def throttled(self):
+        """Slow down and block the bucket for the backoff."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._backoff = min(self.max_backoff, self._backoff * 2 or self.min_backoff)
+            self._blocked_until = now + self._backoff
+
+    def succeeded(self):
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / self.recovery_steps)
+            self._backoff = 0.0
@@ -1,26 +1,201 @@
+import logging
 import os
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
 
-from scrapyd_client.lib import get_spiders, schedule
+import requests as rq
+from scrapyd_client.lib import schedule
+
+from figure_hook.exceptions import FigureHookError
+from figure_hook.utils.http import create_http_session
 
 SCRAPYD_URL = os.getenv("SCRAPYD_URL", "http://127.0.0.1:6800")
 SCRAPY_PROJECT_NAME = "product_crawler"
 
+logger = logging.getLogger(__name__)
+
+
+class ScrapydError(FigureHookError):
+    """Scrapyd responded with an error."""
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    FINISHED = "finished"
+    UNKNOWN = "unknown"
+
+    active = (PENDING, RUNNING)
+
+
+@dataclass
+class ScrapydJob:
+    id: str
+    spider: str
+    settings: dict[str, Any] = field(default_factory=dict)
+    status: str = JobStatus.PENDING
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in JobStatus.active
+
+
+class ScrapydDispatcher:
+    """Schedule spiders concurrently and track their jobs.
+
+    The spiders which are pending or running wouldn't be scheduled again,
+    the status of all tracked jobs are polled by one `listjobs.json` request.
+
+    Parameters
+    -----------
+    scrapyd_url: `str`
+        The base URL of Scrapyd.
+    project: `str`
+        The project of the spiders.
+    http_session: Optional[`requests.Session`]
+        The pooled session to send the requests, it should keep at least `max_workers` connections.
+    max_workers: `int`
+        Maximum schedule requests at the same time.
+    """
+
+    def __init__(
+        self,
+        scrapyd_url: str = SCRAPYD_URL,
+        project: str = SCRAPY_PROJECT_NAME,
+        http_session: Optional[rq.Session] = None,
+        max_workers: int = 4,
+        timeout: float = 10
+    ) -> None:
+        self.scrapyd_url = scrapyd_url.rstrip("/")
+        self.project = project
+        self.http_session = http_session or create_http_session(pool_maxsize=max_workers)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._jobs: dict[str, ScrapydJob] = {}
+        self._lock = Lock()
+
+    @property
+    def jobs(self) -> list[ScrapydJob]:
+        return list(self._jobs.values())
+
+    def dispatch(self, spider: str, settings_list: Iterable[dict[str, Any]] = ({},)) -> list[ScrapydJob]:
+        """Schedule `spider` for every settings, unless the spider is pending or running."""
+        return self.dispatch_many((spider, settings) for settings in settings_list)
+
+    def dispatch_many(self, schedules: Iterable[tuple[str, dict[str, Any]]]) -> list[ScrapydJob]:
+        """Schedule the spiders with their settings concurrently, except the spiders which are pending or running.
+
+        Schedules which failed are logged and skipped.
+        """
+        schedules = list(schedules)
+        if not schedules:
+            return []
+
+        active_spiders = {job.spider for job in self.poll() if job.is_active}
+        skipped = {spider for spider, _ in schedules if spider in active_spiders}
+        for spider in skipped:
+            logger.info(f"Skipped scheduling {spider}, which is pending or running.")
+
+        schedules = [(spider, settings) for spider, settings in schedules if spider not in skipped]
+        if not schedules:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(schedules))) as executor:
+            futures = [(spider, executor.submit(self.schedule, spider, settings)) for spider, settings in schedules]
+
+        jobs = []
+        for spider, future in futures:
+            error = future.exception()
+            if error:
+                logger.error(f"Failed to schedule {spider}: {error!r}")
+            else:
+                jobs.append(future.result())
+
+        return jobs
+
+    def list_spiders(self) -> list[str]:
+        return self._request("GET", "/listspiders.json", params={"project": self.project})["spiders"]
+
+    def schedule(self, spider: str, settings: Optional[dict[str, Any]] = None) -> ScrapydJob:
+        settings = settings or {}
+        data = {**settings, "project": self.project, "spider": spider}
+        response = self._request("POST", "/schedule.json", data=data)
+
+        job = ScrapydJob(id=response["jobid"], spider=spider, settings=settings)
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def poll(self) -> list[ScrapydJob]:
+        """Update the tracked jobs and return the jobs of the project listed by Scrapyd."""
+        response = self._request("GET", "/listjobs.json", params={"project": self.project})
+
+        listed = {}
+        for status in (JobStatus.PENDING, JobStatus.RUNNING, JobStatus.FINISHED):
+            for item in response.get(status, []):
+                listed[item["id"]] = ScrapydJob(id=item["id"], spider=item["spider"], status=status)
+
+        with self._lock:
+            for job in self._jobs.values():
+                if job.id in listed:
+                    job.status = listed[job.id].status
+                elif job.is_active:
+                    # the finished jobs are only kept for a while by Scrapyd.
+                    job.status = JobStatus.UNKNOWN
+
+        return list(listed.values())
+
+    def wait(
+        self,
+        jobs: Iterable[ScrapydJob],
+        interval: float = 5,
+        timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> bool:
+        """Poll until every job isn't active, return `False` if it's timed out."""
+        jobs = list(jobs)
+        deadline = None if timeout is None else clock() + timeout
+        while True:
+            self.poll()
+            if not any(job.is_active for job in jobs):
+                return True
+            if deadline is not None and clock() + interval > deadline:
+                return False
+            sleep(interval)
+
+    def _request(self, method: str, path: str, **kwargs) -> dict[str, Any]:
+        response = self.http_session.request(method, f"{self.scrapyd_url}{path}", timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") != "ok":
+            raise ScrapydError(data.get("message", data))
+        return data
+
 
 class ScrapydUtil:
     def __init__(self, scrapyd_url, default_project_name) -> None:
         self.scrapyd_url = os.getenv("SCRAPYD_URL", scrapyd_url)
         self.default_project_name = default_project_name
+        self._dispatcher: Optional[ScrapydDispatcher] = None
 
-    def schedule_spiders(self, project_name: Optional[str] = None):
-        the_project = project_name or self.default_project_name
-        spiders = get_spiders(self.scrapyd_url, the_project)
-        schedule_status = []
-        for spider in spiders:
-            if "recent" in spider:
-                response = self.schedule_spider(spider)
-                schedule_status.append(response)
-        return schedule_status
+    @property
+    def dispatcher(self) -> ScrapydDispatcher:
+        if not self._dispatcher:
+            self._dispatcher = ScrapydDispatcher(self.scrapyd_url, self.default_project_name)
+        return self._dispatcher
+
+    def schedule_spiders(self, project_name: Optional[str] = None) -> list[ScrapydJob]:
+        """Schedule the spiders of recent products concurrently."""
+        dispatcher = self.dispatcher
+        if project_name and project_name != self.default_project_name:
+            dispatcher = ScrapydDispatcher(self.scrapyd_url, project_name, http_session=dispatcher.http_session)
+
+        spiders = dispatcher.list_spiders()
+        return dispatcher.dispatch_many((spider, {}) for spider in spiders if "recent" in spider)
 
     def schedule_spider(self, spider_name: str, project_name: Optional[str] = None, settings={}):
         the_project = project_name or self.default_project_name
@@ -29,3 +204,7 @@ class ScrapydUtil:
         except ConnectionRefusedError:
             return None
         return response
+
+    def dispatch(self, spider_name: str, settings_list: Iterable[dict[str, Any]]) -> list[ScrapydJob]:
+        """Schedule `spider_name` for every settings by `ScrapydDispatcher`."""
+        return self.dispatcher.dispatch(spider_name, settings_list)
@@ -78,6 +78,19 @@ def release_feed():
 
 @pytest.fixture()
 def product():
+    return _make_fake_product()
+
+
+@pytest.fixture()
+def products():
+    products = [_make_fake_product() for _ in range(20)]
+    # faker only generates few domains, keep the urls distinct.
+    for i, p in enumerate(products):
+        p.url = f"{p.url}products/{i}"
+    return products
+
+
+def _make_fake_product():
     from figure_parser.extension_class import Price
     fake = Faker(['ja-JP'])
 
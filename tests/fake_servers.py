@@ -0,0 +1,360 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeClock:
+    """Monotonic clock which is only advanced by sleeping."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FakePlurkAPI:
+    """Accept `plurkAdd` like `PlurkAPI.callAPI` at most `limit` times in `period` seconds of the `clock`.
+
+    Posts over the limit would be rejected with `anti-flood-too-many-new`.
+    """
+
+    def __init__(self, clock: FakeClock, limit: int, period: float) -> None:
+        self.clock = clock
+        self.limit = limit
+        self.period = period
+        self.posted_at = []
+        self.rejected_count = 0
+        self._error = None
+
+    def callAPI(self, path, options=None):
+        now = self.clock()
+        recent_posts = [t for t in self.posted_at if t > now - self.period]
+        if len(recent_posts) >= self.limit:
+            self.rejected_count += 1
+            self._error = {
+                'code': 400, 'reason': 'BAD REQUEST', 'content': {'error_text': 'anti-flood-too-many-new'}
+            }
+            return None
+
+        self.posted_at.append(now)
+        return {"plurk_id": len(self.posted_at)}
+
+    def error(self):
+        return self._error
+
+
+class FakeServer:
+    """Run a local HTTP server in a daemon thread."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = []
+        self.client_addresses = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_HEAD(self):
+                server._dispatch(self, "HEAD")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self.lock:
+            self.requests.append((method, handler.path, body))
+            self.client_addresses.add(handler.client_address)
+
+        status, headers, content = self.handle(method, handler.path, dict(handler.headers), body)
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        if method != "HEAD":
+            handler.wfile.write(content)
+
+    def handle(self, method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, bytes]:
+        raise NotImplementedError
+
+
+class FakeDiscordServer(FakeServer):
+    """Accept webhook executions like `POST /api/v7/webhooks/{id}/{token}`.
+
+    Webhooks in `missing_webhook_ids` would respond 404 and webhooks in `failing_webhooks`
+    would respond with the mapped status.
+    Every webhook could be executed `rate_limit[0]` times in `rate_limit[1]` seconds,
+    and the first `forced_rate_limits` executions of every webhook would respond 429.
+    """
+    webhook_path = re.compile(r"^/api/v7/webhooks/(?P<id>[^/]+)/(?P<token>[^/?]+)")
+
+    def __init__(
+        self,
+        delay: float = 0,
+        missing_webhook_ids=(),
+        rate_limit=None,
+        forced_rate_limits: int = 0,
+        failing_webhooks: dict[str, int] = None
+    ) -> None:
+        super().__init__()
+        self.delay = delay
+        self.missing_webhook_ids = set(missing_webhook_ids)
+        self.failing_webhooks = failing_webhooks or {}
+        self.rate_limit = rate_limit
+        self.forced_rate_limits = forced_rate_limits
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rate_limited_count = 0
+        self._windows: dict[str, tuple[int, float]] = {}
+        self._execution_counts: dict[str, int] = {}
+
+    @property
+    def api_base(self):
+        return f"{self.url}/api/v7"
+
+    @property
+    def executions(self):
+        return [r for r in self.requests if r[0] == "POST"]
+
+    def handle(self, method, path, headers, body):
+        match = self.webhook_path.match(path)
+        if not match:
+            return self._json_response(404, {"message": "404: Not Found", "code": 0})
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay)
+            rate_limited, rate_limit_headers = self._check_rate_limit(match["id"])
+            if rate_limited:
+                return rate_limited
+            status, response_headers, content = self.handle_webhook(method, match["id"], headers, body)
+            response_headers.update(rate_limit_headers)
+            return status, response_headers, content
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def _check_rate_limit(self, webhook_id):
+        with self.lock:
+            count = self._execution_counts.get(webhook_id, 0) + 1
+            self._execution_counts[webhook_id] = count
+            if count <= self.forced_rate_limits:
+                self.rate_limited_count += 1
+                return self._rate_limited_response(0.05), {}
+
+            if not self.rate_limit:
+                return None, {}
+
+            limit, period = self.rate_limit
+            now = time.monotonic()
+            used, reset_at = self._windows.get(webhook_id, (0, now + period))
+            if reset_at <= now:
+                used, reset_at = 0, now + period
+
+            if used >= limit:
+                self.rate_limited_count += 1
+                return self._rate_limited_response(reset_at - now), {}
+
+            self._windows[webhook_id] = (used + 1, reset_at)
+            return None, {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(limit - used - 1),
+                "X-RateLimit-Reset-After": f"{reset_at - now:.3f}",
+            }
+
+    def _rate_limited_response(self, retry_after: float):
+        return self._json_response(
+            429,
+            {"message": "You are being rate limited.", "retry_after": int(retry_after * 1000) + 1, "global": False},
+            {"Via": "1.1 google", "Retry-After": str(int(retry_after) + 1)}
+        )
+
+    def handle_webhook(self, method, webhook_id, headers, body):
+        if webhook_id in self.missing_webhook_ids:
+            return self._json_response(404, {"message": "Unknown Webhook", "code": 10015})
+        if webhook_id in self.failing_webhooks:
+            return self._json_response(self.failing_webhooks[webhook_id], {"message": "Failed", "code": 0})
+        return self._json_response(200, {})
+
+    @staticmethod
+    def _json_response(status, data, headers=None):
+        response_headers = {"Content-Type": "application/json"}
+        response_headers.update(headers or {})
+        return status, response_headers, json.dumps(data).encode("utf-8")
+
+
+class FakeSourceSite(FakeServer):
+    """Serve `content` on every path with `ETag` and `Last-Modified`.
+
+    Conditional requests with matching validators would respond 304 without the body.
+    The first `failures` requests would respond 503 and every response is delayed for `delay` seconds.
+    """
+
+    def __init__(
+        self,
+        content: bytes = b"",
+        use_etag: bool = True,
+        use_last_modified: bool = True,
+        failures: int = 0,
+        delay: float = 0
+    ) -> None:
+        super().__init__()
+        self.use_etag = use_etag
+        self.use_last_modified = use_last_modified
+        self.failures = failures
+        self.delay = delay
+        self.not_modified_count = 0
+        self.modify(content)
+
+    def modify(self, content: bytes, modified_at: float = None):
+        with self.lock:
+            self.content = content
+            self.etag = f'"{hashlib.md5(content).hexdigest()}"'
+            self.last_modified = formatdate(modified_at or time.time(), usegmt=True)
+
+    def handle(self, method, path, headers, body):
+        time.sleep(self.delay)
+        with self.lock:
+            if self.failures > 0:
+                self.failures -= 1
+                return 503, {}, b"Service Unavailable"
+
+            validators = {}
+            if self.use_etag:
+                validators["ETag"] = self.etag
+            if self.use_last_modified:
+                validators["Last-Modified"] = self.last_modified
+
+            if self._is_not_modified(headers):
+                self.not_modified_count += 1
+                return 304, validators, b""
+
+            return 200, {"Content-Type": "text/html", **validators}, self.content
+
+    def _is_not_modified(self, headers):
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            return self.use_etag and if_none_match == self.etag
+
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since is not None and self.use_last_modified:
+            return parsedate_to_datetime(self.last_modified) <= parsedate_to_datetime(if_modified_since)
+
+        return False
+
+
+class FakeScrapyd(FakeServer):
+    """Serve `schedule.json`, `listjobs.json` and `listspiders.json` of Scrapyd.
+
+    Scheduled jobs are pending until they are moved by `start` and `finish`,
+    every schedule request is delayed for `delay` seconds and `failing_spiders` couldn't be scheduled.
+    """
+
+    def __init__(self, spiders=(), delay: float = 0, failing_spiders=()) -> None:
+        super().__init__()
+        self.spiders = list(spiders)
+        self.delay = delay
+        self.failing_spiders = set(failing_spiders)
+        self.jobs: dict[str, dict] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def schedules(self):
+        return [r for r in self.requests if r[1].startswith("/schedule.json")]
+
+    @property
+    def job_lists(self):
+        return [r for r in self.requests if r[1].startswith("/listjobs.json")]
+
+    def start(self, *job_ids):
+        self._move(job_ids, "running")
+
+    def finish(self, *job_ids):
+        self._move(job_ids, "finished")
+
+    def _move(self, job_ids, status):
+        with self.lock:
+            for job_id in job_ids:
+                self.jobs[job_id]["status"] = status
+
+    def handle(self, method, path, headers, body):
+        url = urlsplit(path)
+        if url.path == "/schedule.json" and method == "POST":
+            return self._schedule({k: v[0] for k, v in parse_qs(body.decode()).items()})
+        if url.path == "/listjobs.json":
+            return self._list_jobs()
+        if url.path == "/listspiders.json":
+            return FakeDiscordServer._json_response(200, {"status": "ok", "spiders": self.spiders})
+        return FakeDiscordServer._json_response(404, {"status": "error", "message": "Not Found"})
+
+    def _schedule(self, data: dict):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            time.sleep(self.delay)
+            if data["spider"] in self.failing_spiders:
+                return FakeDiscordServer._json_response(
+                    200, {"status": "error", "message": f"spider '{data['spider']}' not found"}
+                )
+
+            job_id = uuid.uuid4().hex
+            with self.lock:
+                self.jobs[job_id] = {"id": job_id, "spider": data.pop("spider"), "args": data, "status": "pending"}
+            return FakeDiscordServer._json_response(200, {"status": "ok", "jobid": job_id})
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def _list_jobs(self):
+        listed = {"status": "ok", "pending": [], "running": [], "finished": []}
+        with self.lock:
+            for job in self.jobs.values():
+                listed[job["status"]].append({"id": job["id"], "spider": job["spider"]})
+        return FakeDiscordServer._json_response(200, listed)
@@ -1,9 +1,97 @@
-from discord import RequestsWebhookAdapter, Webhook
-from figure_hook.Adapters.webhook_adapter import DiscordWebhookAdapter
+import logging
+
+import pytest
+
+from discord import Embed, RequestsWebhookAdapter, Webhook
+from discord.errors import DiscordServerError, HTTPException
+from figure_hook.Adapters.webhook_adapter import (DiscordRateLimiter,
+                                                  DiscordWebhookAdapter,
+                                                  RateLimitedWebhookAdapter)
 from figure_hook.Models import Webhook as WebhookModel
+from figure_hook.Publishers.discord_hooker import DiscordHooker, avartar
+
+from tests.fake_servers import FakeDiscordServer
 
 
 def test_webhook_adapter():
     model = WebhookModel(channel_id="kappa", id="564651", token="top_)secret")
     webhook = DiscordWebhookAdapter(model, RequestsWebhookAdapter())
     assert isinstance(webhook, Webhook)
+
+
+def _make_webhook(server: FakeDiscordServer, webhook_id: str, rate_limiter: DiscordRateLimiter, **kwargs):
+    adapter = RateLimitedWebhookAdapter(rate_limiter=rate_limiter, **kwargs)
+    adapter.BASE = server.api_base
+    return Webhook.partial(webhook_id, "token", adapter=adapter)
+
+
+def test_rate_limited_adapter_retries_after_429():
+    rate_limiter = DiscordRateLimiter()
+    hooker = DiscordHooker()
+
+    with FakeDiscordServer(forced_rate_limits=1) as server:
+        for webhook_id in ("1", "2", "3"):
+            hooker.publish(_make_webhook(server, webhook_id, rate_limiter), [Embed(title="foo")])
+
+    assert server.rate_limited_count == 3
+    assert rate_limiter.rate_limited_count == 3
+    assert hooker.stats.sending_success_count == 3
+    assert hooker.stats.sending_failed_count == 0
+    assert all(hooker.webhook_status.values())
+
+
+def test_rate_limited_adapter_follows_bucket():
+    rate_limiter = DiscordRateLimiter()
+    hooker = DiscordHooker()
+    embeds = [Embed(title="foo") for _ in range(50)]
+
+    with FakeDiscordServer(rate_limit=(2, 0.2)) as server:
+        hooker.publish(_make_webhook(server, "1", rate_limiter), embeds)
+
+    assert len(server.executions) == 5
+    assert server.rate_limited_count == 0
+    assert hooker.stats.sending_success_count == 5
+
+
+def test_rate_limited_adapter_gives_up(caplog):
+    rate_limiter = DiscordRateLimiter()
+    hooker = DiscordHooker()
+
+    with FakeDiscordServer(forced_rate_limits=10) as server:
+        with caplog.at_level(logging.WARNING), pytest.raises(HTTPException) as error:
+            hooker.publish(_make_webhook(server, "1", rate_limiter, max_retries=2), [Embed(title="foo")])
+
+    assert error.value.status == 429
+    assert len(server.executions) == 3
+    assert "Webhook 1 is still rate limited" in caplog.text
+    assert "foo" in caplog.text
+    assert hooker.stats.sending_failed_count == 1
+    # the webhook isn't treated as missing.
+    assert "1" not in hooker.webhook_status
+
+
+def test_rate_limited_adapter_backoff_on_server_error():
+    sleeps = []
+    rate_limiter = DiscordRateLimiter(sleep=sleeps.append)
+    hooker = DiscordHooker()
+
+    with FakeDiscordServer(failing_webhooks={"1": 502}) as server:
+        with pytest.raises(DiscordServerError):
+            hooker.publish(_make_webhook(server, "1", rate_limiter, max_retries=2), [Embed(title="foo")])
+
+    assert len(server.executions) == 3
+    assert sleeps == [1, 3]
+
+
+def test_rate_limited_adapter_executes_serialized_payload():
+    rate_limiter = DiscordRateLimiter()
+    embeds = [Embed(title="foo", description="bar"), Embed(title="baz")]
+
+    with FakeDiscordServer() as server:
+        webhook = _make_webhook(server, "1", rate_limiter)
+        webhook.send(avatar_url=avartar, embeds=embeds)
+        DiscordHooker().publish(webhook, embeds)
+
+    sent_by_discord, sent_by_hooker = server.executions
+    # the payload serialized in advance is the same as the one serialized by discord.py.
+    assert sent_by_hooker == sent_by_discord
@@ -36,3 +36,73 @@ class TestProdcutModelFactory:
         p = ProductModelFactory.createProduct(product)
         with pytest.raises(ReleaseInfosConflictError):
             ProductModelFactory.updateProduct(product, p)
+
+
+@pytest.mark.usefixtures("session")
+class TestBulkUpsert:
+    def test_bulk_create(self, session, products):
+        result = ProductModelFactory.bulk_upsert(products, batch_size=7)
+        session.commit()
+
+        assert result.created == 20
+        assert not result.updated
+
+        for p in products:
+            model = Product.query.where(Product.url == p.url).one()
+            assert model.name == p.name
+            assert model.checksum == p.checksum
+            assert model.manufacturer.name == p.manufacturer
+            assert [i.url for i in model.official_images] == p.images
+            assert [i.order for i in model.official_images] == list(range(1, len(p.images) + 1))
+            assert len(model.release_infos) == len(p.release_infos)
+            assert {s.name for s in model.sculptors} == set(p.sculptors)
+            assert {w.name for w in model.paintworks} == set(p.paintworks)
+
+    def test_bulk_update(self, session, products):
+        products = products[:10]
+        ProductModelFactory.createProduct(products[0])
+        session.commit()
+
+        products[1].name = "renamed"
+        result = ProductModelFactory.bulk_upsert(products)
+        assert result.created == 9
+        assert result.unchanged == 1
+
+        products[2].name = "renamed"
+        result = ProductModelFactory.bulk_upsert(products + [products[2]])
+        session.commit()
+        assert result.updated == 1
+        assert result.unchanged == 9
+        assert result.duplicated == 1
+        assert Product.query.where(Product.url == products[2].url).one().name == "renamed"
+        assert len(Product.all()) == 10
+
+    def test_bulk_upsert_dedupes_non_empty_keys(self, session, products):
+        products = products[:4]
+        products[1].url = products[0].url
+        products[2].url = None
+        products[3].url = None
+        products[3].jan = None
+
+        result = ProductModelFactory.bulk_upsert(products)
+        session.commit()
+
+        assert result.duplicated == 1
+        assert result.created == 3
+        assert len(Product.all()) == 3
+
+    def test_bulk_upsert_doesnt_match_empty_urls(self, session, products):
+        products = products[:2]
+        products[0].url = None
+        products[1].url = None
+        products[1].jan = None
+        ProductModelFactory.createProduct(products[0])
+        session.commit()
+
+        result = ProductModelFactory.bulk_upsert(products)
+        session.commit()
+
+        assert result.unchanged == 1
+        assert result.created == 1
+        assert not result.updated
+        assert {p.name for p in Product.all()} == {products[0].name, products[1].name}
@@ -14,3 +14,77 @@ def test_discord_new_release_embed_creation(release_feed):
 def test_new_hook_notification_creation():
     embed = DiscordEmbedFactory.create_new_hook_notification(msg="Hello")
     assert isinstance(embed, Embed)
+
+
+def test_localized_payload_cache(mocker, release_feed):
+    from figure_hook.Factory.publish_factory.discord_embed_factory import (
+        LocalizedEmbedCache, NewReleaseEmbed)
+
+    cache = LocalizedEmbedCache()
+    release_feed.checksum = "checksum"
+    embed = DiscordEmbedFactory.create_new_release(release_feed)
+    localized_with = mocker.spy(NewReleaseEmbed, "localized_with")
+
+    payload = embed.localized_payload("ja", cache=cache)
+    assert payload == embed.localized_with("ja").to_dict()
+    assert embed.localized_payload("ja", cache=cache) is payload
+    assert localized_with.call_count == 2
+
+    release_feed.checksum = "changed"
+    changed_embed = DiscordEmbedFactory.create_new_release(release_feed)
+    assert changed_embed.localized_payload("ja", cache=cache) is not payload
+    assert localized_with.call_count == 3
+    assert len(cache) == 1
+
+
+def test_localized_payload_without_checksum(release_feed):
+    from figure_hook.Factory.publish_factory.discord_embed_factory import \
+        LocalizedEmbedCache
+
+    cache = LocalizedEmbedCache()
+    embed = DiscordEmbedFactory.create_new_release(release_feed)
+
+    assert embed.localized_payload("en", cache=cache) == embed.localized_with("en").to_dict()
+    assert not len(cache)
+
+
+def _deepcopy_localized_dict(embed, lang):
+    """The former implementation of `NewReleaseEmbed.localized_with`."""
+    from copy import deepcopy
+    from datetime import datetime
+
+    from babel.dates import format_date
+
+    from figure_hook.Factory.publish_factory.discord_embed_factory import (
+        embed_templates, locale_mapping)
+
+    embed = deepcopy(Embed.copy(embed))
+    embed_locale = embed_templates[lang]
+    if embed.author:
+        embed.set_author(name=embed_locale.get(str(embed.author.name)), icon_url=embed.author.icon_url)
+
+    for f in embed._fields:
+        key = f["name"]
+        f["name"] = embed_locale.get(key, key)
+        if key == "release_date" and f["value"]:
+            release_date = datetime.strptime(f["value"], "%Y-%m-%d").date()
+            f["value"] = str(format_date(release_date, embed_locale["date_format"], locale=locale_mapping[lang]))
+
+    return embed.to_dict()
+
+
+@pytest.mark.parametrize("lang", ["en", "ja", "zh-TW"])
+@pytest.mark.parametrize("resale", [True, False])
+def test_localized_with_is_identical_to_deepcopy(release_feed, lang, resale):
+    import json
+
+    release_feed.resale = resale
+    embed = DiscordEmbedFactory.create_new_release(release_feed)
+    expected = _deepcopy_localized_dict(embed, lang)
+
+    localized_embed = embed.localized_with(lang)
+    assert json.dumps(localized_embed.to_dict()) == json.dumps(expected)
+    assert localized_embed.is_nsfw is embed.is_nsfw
+    # the original embed shouldn't be localized.
+    assert embed.author.name in ("new_release", "resale_release")
+    assert embed.fields[0].name == "maker"
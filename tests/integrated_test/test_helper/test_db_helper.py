@@ -11,3 +11,20 @@ def test_release_helper(session):
     release_feeds = ReleaseHelper.fetch_new_releases(session, datetime(2021, 5, 1))
     for rf in release_feeds:
         assert isinstance(rf, ReleaseFeed)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_release_helper_streams_new_releases_in_chunks():
+    from figure_hook.database import pgsql_session
+
+    checkpoint = datetime(2017, 1, 1)
+    with pgsql_session() as session:
+        release_feeds = ReleaseHelper.fetch_new_releases(session, checkpoint)
+        chunks = list(ReleaseHelper.iter_new_releases(session, checkpoint, chunk_size=7))
+
+    assert release_feeds
+    assert all(0 < len(chunk) <= 7 for chunk in chunks)
+
+    streamed_feeds = [feed for chunk in chunks for feed in chunk]
+    assert all(isinstance(feed, ReleaseFeed) for feed in streamed_feeds)
+    assert sorted(feed.id for feed in streamed_feeds) == sorted(feed.id for feed in release_feeds)
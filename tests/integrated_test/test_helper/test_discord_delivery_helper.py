@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from figure_hook.database import PostgreSQLDB, pgsql_session
+from figure_hook.Helpers.discord_delivery_helper import DiscordDeliveryHelper
+from figure_hook.Models import DiscordDelivery, ProductReleaseInfo, Webhook
+
+checkpoint = datetime(2019, 1, 1)
+lease = timedelta(minutes=10)
+
+
+def _expected_deliveries(session):
+    release_ids = session.execute(
+        select(ProductReleaseInfo.id).where(ProductReleaseInfo.created_at >= checkpoint)
+    ).scalars().all()
+    channel_ids = session.execute(select(Webhook.channel_id)).scalars().all()
+    return {(release_id, channel_id) for release_id in release_ids for channel_id in channel_ids}
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_plan_is_idempotent():
+    with pgsql_session() as session:
+        DiscordDeliveryHelper.plan(session, checkpoint)
+        expected_deliveries = _expected_deliveries(session)
+        assert DiscordDeliveryHelper.count_pending(session) == len(expected_deliveries)
+
+        DiscordDeliveryHelper.mark_delivered(session, list(expected_deliveries)[:3])
+        DiscordDeliveryHelper.plan(session, checkpoint)
+        assert DiscordDeliveryHelper.count_pending(session) == len(expected_deliveries) - 3
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_claim_splits_deliveries_between_workers():
+    with pgsql_session() as session:
+        DiscordDeliveryHelper.plan(session, checkpoint)
+        expected_deliveries = _expected_deliveries(session)
+
+    Session = PostgreSQLDB().Session
+    with Session() as worker_a, Session() as worker_b:
+        claimed_a = DiscordDeliveryHelper.claim(worker_a, 10, lease)
+        claimed_b = DiscordDeliveryHelper.claim(worker_b, 10, lease)
+        assert len(claimed_a) == len(claimed_b) == 10
+        assert not set(claimed_a) & set(claimed_b)
+        worker_a.commit()
+        worker_b.commit()
+
+    with pgsql_session() as session:
+        # the leased deliveries wouldn't be claimed again until the lease is expired.
+        claimed = DiscordDeliveryHelper.claim(session, len(expected_deliveries), lease)
+        assert set(claimed) == expected_deliveries - set(claimed_a) - set(claimed_b)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_prune_delivered_deliveries():
+    with pgsql_session() as session:
+        DiscordDeliveryHelper.plan(session, checkpoint)
+        DiscordDeliveryHelper.mark_delivered(session, _expected_deliveries(session))
+        DiscordDeliveryHelper.prune(session, datetime(2030, 1, 1))
+
+        assert not session.execute(select(DiscordDelivery)).all()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select
+
+from figure_hook.database import PostgreSQLDB, pgsql_session
+from figure_hook.Helpers.publish_job_helper import PublishJobHelper
+from figure_hook.Models import ProductReleaseInfo, PublishJob
+
+target = "plurk"
+
+
+def _release_ids(session, amount):
+    return session.execute(select(ProductReleaseInfo.id).limit(amount)).scalars().all()
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_enqueue_ignores_waiting_jobs():
+    with pgsql_session() as session:
+        release_ids = _release_ids(session, 3)
+        PublishJobHelper.enqueue(session, release_ids + release_ids[:1], target)
+        PublishJobHelper.enqueue(session, release_ids[:2], target)
+        PublishJobHelper.enqueue(session, release_ids[:1], "other")
+
+    with pgsql_session() as session:
+        jobs = session.execute(select(PublishJob).where(PublishJob.target == target)).scalars().all()
+        assert sorted(job.release_id for job in jobs) == sorted(release_ids)
+        assert all(job.attempts == 0 for job in jobs)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_claim_skips_locked_jobs():
+    with pgsql_session() as session:
+        PublishJobHelper.enqueue(session, _release_ids(session, 5), target)
+
+    Session = PostgreSQLDB().Session
+    with Session() as worker_a, Session() as worker_b:
+        jobs_a = PublishJobHelper.claim(worker_a, target, 3)
+        jobs_b = PublishJobHelper.claim(worker_b, target, 3)
+
+        assert len(jobs_a) == 3
+        assert len(jobs_b) == 2
+        assert not {job.id for job in jobs_a} & {job.id for job in jobs_b}
+        worker_a.rollback()
+        worker_b.rollback()
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_fail_with_backoff():
+    with pgsql_session() as session:
+        PublishJobHelper.enqueue(session, _release_ids(session, 1), target)
+
+    with pgsql_session() as session:
+        job, = PublishJobHelper.claim(session, target, 10)
+        PublishJobHelper.fail(session, job, "error")
+
+    with pgsql_session() as session:
+        assert not PublishJobHelper.claim(session, target, 10)
+        job = session.execute(select(PublishJob)).scalar_one()
+        assert job.attempts == 1
+        assert job.last_error == "error"
+        assert job.next_attempt_at > job.created_at
+
+        job.attempts = PublishJobHelper.max_attempts - 1
+        PublishJobHelper.fail(session, job, "error")
+
+    with pgsql_session() as session:
+        job = session.execute(select(PublishJob)).scalar_one()
+        assert job.attempts == PublishJobHelper.max_attempts
+        assert job.next_attempt_at is None
@@ -0,0 +1,219 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from figure_hook.database import PostgreSQLDB
+from figure_hook.Models import Product, ProductReleaseInfo
+from figure_hook.SourceChecksum.abcs import ProductAnnouncementChecksum
+from figure_hook.Tasks.orchestrator import (NewReleaseListener, PipelineEvent,
+                                            ReleasePipeline)
+
+
+class FakeListener:
+    def start(self, stop):
+        pass
+
+
+class FakeAnnouncementChecksum(ProductAnnouncementChecksum):
+    __source_site__ = "fake_announcement"
+    __spider__ = "fake_product"
+    spider_configs = [{"settings": {}}]
+
+    def _extract_feature(self) -> bytes:
+        return b"content"
+
+
+def wait_until(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def stop():
+    stop = threading.Event()
+    yield stop
+    stop.set()
+
+
+def run_pipeline(pipeline: ReleasePipeline, stop: threading.Event) -> threading.Thread:
+    thread = threading.Thread(target=pipeline.run, args=(stop,), daemon=True)
+    thread.start()
+    return thread
+
+
+def insert_release(session):
+    product = Product.create(name="figure", url="https://example.com/figure")
+    ProductReleaseInfo.create(product_id=product.id, price=12000)
+    session.commit()
+
+
+@pytest.mark.usefixtures("session")
+def test_listener_receives_new_releases(session, stop):
+    events = queue.Queue()
+    listener = NewReleaseListener(events, poll_interval=0.05)
+    listener.start(stop)
+    assert listener.listening.wait(5)
+
+    insert_release(session)
+    assert events.get(timeout=5) == PipelineEvent.NEW_RELEASE
+
+    Product.create(name="figure without release")
+    session.commit()
+    with pytest.raises(queue.Empty):
+        events.get(timeout=0.3)
+
+
+@pytest.mark.usefixtures("session")
+def test_new_release_is_pushed_after_ingestion(session, stop):
+    pushed = []
+    events = queue.Queue()
+    listener = NewReleaseListener(events, poll_interval=0.05)
+    pipeline = ReleasePipeline(
+        checksum_factory=list,
+        push_tasks=[lambda: pushed.append(time.monotonic())],
+        maintenance_tasks=[],
+        check_interval=60,
+        debounce=0.1,
+        events=events,
+        listener=listener,
+        session_scope=PostgreSQLDB().Session.begin
+    )
+    pipeline.poll_interval = 0.05
+    run_pipeline(pipeline, stop)
+    assert listener.listening.wait(5)
+
+    inserted_at = time.monotonic()
+    insert_release(session)
+
+    assert wait_until(lambda: pushed)
+    assert pushed[0] - inserted_at < 2
+
+
+def test_pushes_are_debounced(stop):
+    pushed = []
+    events = queue.Queue()
+    pipeline = ReleasePipeline(
+        checksum_factory=list,
+        push_tasks=[lambda: pushed.append(1)],
+        maintenance_tasks=[],
+        check_interval=60,
+        debounce=0.3,
+        events=events,
+        listener=FakeListener()
+    )
+    pipeline.poll_interval = 0.05
+    run_pipeline(pipeline, stop)
+
+    for _ in range(3):
+        events.put(PipelineEvent.NEW_RELEASE)
+        time.sleep(0.05)
+
+    assert wait_until(lambda: pushed)
+    time.sleep(0.4)
+    assert pushed == [1]
+
+    events.put(PipelineEvent.NEW_RELEASE)
+    assert wait_until(lambda: len(pushed) == 2)
+
+
+def test_maintenance_tasks_run_with_checks(stop):
+    maintained = []
+
+    def broken_maintenance():
+        raise ConnectionError("discord is down")
+
+    clock = [0.0]
+    pipeline = ReleasePipeline(
+        checksum_factory=list,
+        push_tasks=[],
+        maintenance_tasks=[broken_maintenance, lambda: maintained.append(clock[0])],
+        check_interval=60,
+        listener=FakeListener(),
+        clock=lambda: clock[0]
+    )
+    pipeline.poll_interval = 0.01
+    thread = run_pipeline(pipeline, stop)
+
+    assert wait_until(lambda: maintained == [0.0])
+    time.sleep(0.05)
+    assert maintained == [0.0]
+
+    clock[0] = 60.0
+    assert wait_until(lambda: maintained == [0.0, 60.0])
+    assert thread.is_alive()
+
+
+def test_failed_push_task_does_not_stop_pipeline(stop):
+    pushed = []
+
+    def broken_push():
+        raise ConnectionError("discord is down")
+
+    events = queue.Queue()
+    pipeline = ReleasePipeline(
+        checksum_factory=list,
+        push_tasks=[broken_push, lambda: pushed.append(1)],
+        maintenance_tasks=[],
+        check_interval=60,
+        debounce=0,
+        events=events,
+        listener=FakeListener()
+    )
+    pipeline.poll_interval = 0.05
+    thread = run_pipeline(pipeline, stop)
+
+    events.put(PipelineEvent.NEW_RELEASE)
+    assert wait_until(lambda: pushed)
+    assert thread.is_alive()
+
+
+@pytest.mark.usefixtures("session")
+def test_changed_sources_trigger_crawlers(session, mocker):
+    trigger_crawler = mocker.patch.object(FakeAnnouncementChecksum, "trigger_crawler")
+    session_scope = PostgreSQLDB().Session.begin
+    pipeline = ReleasePipeline(
+        checksum_factory=lambda: [FakeAnnouncementChecksum(scrapyd_util=None, lazy=True)],
+        push_tasks=[],
+        session_scope=session_scope,
+        listener=FakeListener()
+    )
+
+    result = pipeline.check_sources()
+    assert len(result.changed) == 1
+    assert trigger_crawler.call_count == 1
+
+    result = pipeline.check_sources()
+    assert not result.changed
+    assert trigger_crawler.call_count == 1
+
+
+@pytest.mark.usefixtures("session")
+def test_failed_trigger_is_checked_again(session, mocker):
+    trigger_crawler = mocker.patch.object(
+        FakeAnnouncementChecksum, "trigger_crawler", side_effect=[ConnectionError("scrapyd is down"), []]
+    )
+    pipeline = ReleasePipeline(
+        checksum_factory=lambda: [FakeAnnouncementChecksum(scrapyd_util=None, lazy=True)],
+        push_tasks=[],
+        session_scope=PostgreSQLDB().Session.begin,
+        listener=FakeListener()
+    )
+
+    result = pipeline.check_sources()
+    assert not result.changed
+    assert isinstance(result.failed["fake_announcement"], ConnectionError)
+
+    # the checksum wasn't updated, so the crawler is triggered again.
+    result = pipeline.check_sources()
+    assert len(result.changed) == 1
+    assert trigger_crawler.call_count == 2
+
+    result = pipeline.check_sources()
+    assert not result.changed
+    assert trigger_crawler.call_count == 2
@@ -1,6 +1,9 @@
+import json
 from datetime import date, datetime
 
-from discord import NotFound, RequestsWebhookAdapter, Webhook
+import pytest
+
+from discord import HTTPException, NotFound, RequestsWebhookAdapter, Webhook
 from discord.embeds import Embed
 from pytest_mock import MockerFixture
 
@@ -11,17 +14,44 @@ from figure_hook.Models import Webhook as WebhookModel
 from figure_hook.Publishers.discord_hooker import (DiscordHooker,
                                                    DiscordHookerStats,
                                                    DiscordNewReleaseHooker,
+                                                   group_webhooks,
                                                    process_embeds)
+from tests.fake_servers import FakeDiscordServer
 
 
 def test_embeds_processor():
     embeds = [1, 3, 3, 3, 3, 1, 3, 3, 3, 3]
     expected_embed = [[1, 3, 3], [3, 3, 1], [3, 3, 3], [3]]
 
-    processed_embeds = process_embeds(embeds, 3)
+    processed_embeds = list(process_embeds(embeds, 3))
     assert processed_embeds == expected_embed
 
 
+def test_embeds_processor_without_empty_batch():
+    embeds = iter(range(20))
+
+    processed_embeds = list(process_embeds(embeds))
+    assert processed_embeds == [list(range(10)), list(range(10, 20))]
+    assert list(process_embeds([])) == []
+
+
+def test_embeds_processor_limits_characters():
+    embeds = [Embed(title="a" * 2000) for _ in range(7)]
+
+    processed_embeds = list(process_embeds(embeds))
+    assert [len(batch) for batch in processed_embeds] == [3, 3, 1]
+    assert all(sum(len(embed) for embed in batch) <= 6000 for batch in processed_embeds)
+    assert [embed for batch in processed_embeds for embed in batch] == embeds
+
+    oversized = [Embed(title="a" * 10), Embed(description="a" * 6001), Embed(title="a")]
+    assert [len(batch) for batch in process_embeds(oversized)] == [1, 1, 1]
+
+
+def test_embeds_processor_rejects_large_batch_size():
+    with pytest.raises(ValueError):
+        process_embeds([], 11)
+
+
 def test_hooker_sending(mocker: MockerFixture):
     class MockResponse:
         status = 404
@@ -102,3 +132,180 @@ def test_new_release_hooker(mocker: MockerFixture):
     assert ('zh-TW', False) in new_release_hooker.embeds_cache
     assert ('ja', False) in new_release_hooker.embeds_cache
     assert ('en', True) in new_release_hooker.embeds_cache
+
+
+def _make_raw_embeds(amount: int):
+    return [
+        DiscordEmbedFactory.create_new_release(ReleaseFeed(
+            id=i,
+            name=f'product-{i}',
+            url='https://example.com',
+            is_adult=bool(i % 2),
+            resale=False,
+            series='series',
+            maker='maker',
+            size=7,
+            scale=7,
+            price=10000,
+            release_date=date(2020, 2, 2),
+            image_url='https://example.com/abc.jpg',
+            thumbnail='https://example.com/abc.jpg',
+            og_image='https://example.com/abc.jpg'
+        ))
+        for i in range(amount)
+    ]
+
+
+def test_new_release_hooker_publish_concurrently():
+    raw_embeds = _make_raw_embeds(12)
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=bool(i % 2), lang='en')
+        for i in range(24)
+    ]
+    missing_ids = {'3', '4'}
+
+    with FakeDiscordServer(delay=0.05, missing_webhook_ids=missing_ids) as server:
+        def adapter_factory():
+            adapter = RequestsWebhookAdapter()
+            adapter.BASE = server.api_base
+            return adapter
+
+        hooker = DiscordNewReleaseHooker(raw_embeds=raw_embeds)
+        errors = hooker.publish_concurrently(webhooks, max_workers=8, webhook_adapter_factory=adapter_factory)
+
+    assert not errors
+
+    # nsfw webhooks receive 12 embeds (2 batches), others receive 6 embeds (1 batch)
+    # and the webhooks not found stop sending after the first batch.
+    assert len(server.executions) == 12 * 2 + 12 - 1
+    assert 1 < server.max_in_flight <= 8
+    assert ('en', True) in hooker.embeds_cache
+    assert ('en', False) in hooker.embeds_cache
+
+    stats = hooker.stats
+    assert stats.webhook_count == 24
+    assert stats.sending_404_count == 2
+    assert stats.sending_success_count == len(server.executions) - 2
+    for webhook in webhooks:
+        assert hooker.webhook_status[webhook.id] is (webhook.id not in missing_ids)
+
+
+def test_publish_concurrently_with_failed_webhooks():
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=True, lang='en')
+        for i in range(8)
+    ]
+    failing_webhooks = {'2': 503, '5': 400}
+
+    with FakeDiscordServer(failing_webhooks=failing_webhooks) as server:
+        def adapter_factory():
+            adapter = RequestsWebhookAdapter()
+            adapter.BASE = server.api_base
+            return adapter
+
+        hooker = DiscordNewReleaseHooker(raw_embeds=_make_raw_embeds(12))
+        errors = hooker.publish_concurrently(webhooks, max_workers=4, webhook_adapter_factory=adapter_factory)
+
+    assert set(errors) == set(failing_webhooks)
+    assert all(isinstance(error, HTTPException) for error in errors.values())
+    # the failed webhooks stop after the first batch, the others send 2 batches.
+    assert len(server.executions) == 6 * 2 + 2
+    assert hooker.stats.sending_failed_count == 2
+    assert hooker.stats.sending_success_count == 12
+    assert all(hooker.webhook_status[webhook.id] for webhook in webhooks)
+
+
+def test_group_webhooks():
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=is_nsfw, lang=lang)
+        for i, (lang, is_nsfw) in enumerate([('en', False), ('en', False), ('en', True), ('ja', False), ('ja', False)])
+    ]
+
+    groups = [(key, [webhook.id for webhook in grouped]) for key, grouped in group_webhooks(webhooks)]
+    assert groups == [
+        (('en', False), ['0', '1']),
+        (('en', True), ['2']),
+        (('ja', False), ['3', '4']),
+    ]
+
+
+def test_publish_concurrently_renders_embeds_once_per_group(mocker: MockerFixture):
+    mocker.patch.object(Webhook, "send")
+    raw_embeds = _make_raw_embeds(4)
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=is_nsfw, lang=lang)
+        for i, (lang, is_nsfw) in enumerate(
+            (lang, is_nsfw) for lang in ('en', 'ja') for is_nsfw in (False, True) for _ in range(5)
+        )
+    ]
+    localized_payload = mocker.spy(NewReleaseEmbed, "localized_payload")
+
+    hooker = DiscordNewReleaseHooker(raw_embeds=raw_embeds)
+    errors = hooker.publish_concurrently(webhooks, max_workers=4)
+
+    assert not errors
+    assert hooker.stats.webhook_count == len(webhooks)
+    # 4 groups, the sfw groups render 2 embeds and the nsfw groups render 4 embeds.
+    assert localized_payload.call_count == 2 * (2 + 4)
+
+
+def test_publish_concurrently_serializes_payload_once_per_group(mocker: MockerFixture):
+    from figure_hook.Adapters.webhook_adapter import (DiscordRateLimiter,
+                                                      RateLimitedWebhookAdapter)
+    from figure_hook.Publishers import discord_hooker
+
+    serialize_message = mocker.spy(discord_hooker, "_serialize_message")
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=is_nsfw, lang='en')
+        for i, is_nsfw in enumerate([False] * 6 + [True] * 6)
+    ]
+    rate_limiter = DiscordRateLimiter()
+
+    with FakeDiscordServer() as server:
+        def adapter_factory():
+            adapter = RateLimitedWebhookAdapter(rate_limiter=rate_limiter)
+            adapter.BASE = server.api_base
+            return adapter
+
+        hooker = DiscordNewReleaseHooker(raw_embeds=_make_raw_embeds(12))
+        errors = hooker.publish_concurrently(webhooks, max_workers=4, webhook_adapter_factory=adapter_factory)
+
+    assert not errors
+    # sfw webhooks receive 1 batch, nsfw webhooks receive 2 batches.
+    assert len(server.executions) == 6 + 6 * 2
+    assert serialize_message.call_count == 1 + 2
+
+    payloads = {body for _, path, body in server.executions if path.startswith("/api/v7/webhooks/0/")}
+    assert len(payloads) == 1
+    assert len(json.loads(payloads.pop())["embeds"]) == 6
+
+
+def test_publish_concurrently_with_rate_limited_webhooks():
+    from figure_hook.Adapters.webhook_adapter import (DiscordRateLimiter,
+                                                      RateLimitedWebhookAdapter)
+
+    rate_limiter = DiscordRateLimiter()
+    webhooks = [
+        WebhookModel(channel_id=str(i), id=str(i), token='token', is_nsfw=False, lang='en')
+        for i in range(3)
+    ]
+
+    with FakeDiscordServer(forced_rate_limits=1) as server:
+        def adapter_factory():
+            adapter = RateLimitedWebhookAdapter(rate_limiter=rate_limiter, max_retries=0)
+            adapter.BASE = server.api_base
+            return adapter
+
+        hooker = DiscordNewReleaseHooker(raw_embeds=_make_raw_embeds(1))
+        errors = hooker.publish_concurrently(webhooks, max_workers=2, webhook_adapter_factory=adapter_factory)
+
+    # the deliveries of rate limited webhooks are kept pending.
+    assert set(errors) == {'0', '1', '2'}
+    assert all(error.status == 429 for error in errors.values())
+    assert all(hooker.webhook_status[webhook.id] for webhook in webhooks)
+
+
+def test_publish_concurrently_with_invalid_max_workers():
+    hooker = DiscordNewReleaseHooker(raw_embeds=[])
+    with pytest.raises(ValueError):
+        hooker.publish_concurrently([], max_workers=0)
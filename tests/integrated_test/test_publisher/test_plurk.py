@@ -3,6 +3,8 @@ from pytest_mock import MockerFixture
 
 from figure_hook.exceptions import PublishError
 from figure_hook.Publishers.plurk import Plurker
+from figure_hook.utils.rate_limit import AdaptiveTokenBucket
+from tests.fake_servers import FakeClock, FakePlurkAPI
 
 
 def test_publish(mocker: MockerFixture):
@@ -26,3 +28,58 @@ def test_publish_with_error(mocker: MockerFixture):
         plurk.publish(content=content)
 
     mock_callapi.assert_called_once()
+
+
+def _make_plurker(clock: FakeClock, plurk_api: FakePlurkAPI, rate: float, capacity: float = 1):
+    rate_limiter = AdaptiveTokenBucket(rate=rate, capacity=capacity, clock=clock, sleep=clock.sleep)
+    plurker = Plurker(rate_limiter=rate_limiter)
+    plurker.plurk = plurk_api
+    return plurker
+
+
+def _publish_all(plurker: Plurker, amount: int):
+    for _ in range(amount):
+        try:
+            plurker.publish(content={})
+        except PublishError:
+            pass
+
+
+def test_publish_with_rate_limiter():
+    clock = FakeClock()
+    plurk_api = FakePlurkAPI(clock, limit=5, period=10)
+    plurker = _make_plurker(clock, plurk_api, rate=0.5)
+
+    _publish_all(plurker, 200)
+
+    assert plurker.stats.sending_success_count == 200
+    assert not plurk_api.rejected_count
+    # the former fixed interval took 3 seconds for every post.
+    assert clock.now < 200 * 3 * 0.7
+
+
+def test_publish_backoff_when_throttled():
+    clock = FakeClock()
+    plurk_api = FakePlurkAPI(clock, limit=5, period=10)
+    plurker = _make_plurker(clock, plurk_api, rate=5)
+
+    _publish_all(plurker, 100)
+
+    assert plurk_api.rejected_count
+    assert plurker.stats.sending_failed_count == plurk_api.rejected_count
+    # without slowing down, almost half of the posts would be rejected.
+    assert plurk_api.rejected_count < 100 / 4
+    assert plurker.rate_limiter.rate < 5
+
+
+def test_publish_failure_does_not_wait(mocker: MockerFixture):
+    error = {'code': 400, 'reason': 'BAD REQUEST', 'content': {'error_text': 'anti-flood-same-content'}}
+    clock = FakeClock()
+    plurker = _make_plurker(clock, FakePlurkAPI(clock, limit=5, period=10), rate=1 / 3, capacity=1)
+    mocker.patch.object(plurker.plurk, 'callAPI', return_value=None)
+    mocker.patch.object(plurker.plurk, 'error', return_value=error)
+
+    _publish_all(plurker, 3)
+
+    assert plurker.stats.sending_failed_count == 3
+    assert not clock.slept
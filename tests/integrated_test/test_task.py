@@ -1,14 +1,20 @@
+import json
 from abc import ABC
+from datetime import timedelta
 from typing import Type
 
 import pytest
 from pytest_mock import MockerFixture
+from sqlalchemy import select
 
+from figure_hook.Adapters.webhook_adapter import RateLimitedWebhookAdapter
 from figure_hook.Publishers.abcs import Stats
 from figure_hook.Tasks.on_demand import send_discord_welcome_webhook
 from figure_hook.Tasks.periodic import (DiscordNewReleasePush, NewReleasePush,
                                         PlurkNewReleasePush)
 from figure_hook.database import pgsql_session
+from figure_hook.Helpers.db_helper import ReleaseHelper
+from figure_hook.Models import Task, Webhook
 
 
 def test_send_welcome_hook(mocker: MockerFixture):
@@ -26,7 +32,7 @@ class NewsReleasePush(ABC):
     @pytest.fixture()
     def mock_publisher(self, mocker: MockerFixture):
         mocker.patch('plurk_oauth.PlurkAPI.callAPI', return_value={"a": True})
-        mocker.patch('discord.webhook.Webhook.send')
+        mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
         mocker.patch('time.sleep')
 
     @pytest.mark.usefixtures("mock_publisher")
@@ -52,3 +58,229 @@ class TestDiscordNewsReleasePush(NewsReleasePush):
 
 class TestPlurkNewsReleasePush(NewsReleasePush):
     task_cls = PlurkNewReleasePush
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_discord_push_streams_release_chunks(mocker: MockerFixture):
+    execute_payload = mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    with pgsql_session() as session:
+        task = DiscordNewReleasePush(session)
+        task.release_chunk_size = 30
+        stats = task.execute()
+        webhook_count = len(Webhook.all())
+
+    assert stats.webhook_count == webhook_count
+    assert stats.sending_success_count == execute_payload.call_count
+
+
+def _sent_embed_count(execute_payload):
+    return sum(len(json.loads(call.args[0])["embeds"]) for call in execute_payload.call_args_list)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_discord_push_resumes_undelivered_releases(mocker: MockerFixture, caplog):
+    from figure_hook.Helpers.discord_delivery_helper import \
+        DiscordDeliveryHelper
+    from figure_hook.Publishers.discord_hooker import DiscordNewReleaseHooker
+
+    execute_payload = mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    publish_concurrently = DiscordNewReleaseHooker.publish_concurrently
+    published = []
+
+    def crash_after_first_publish(self, *args, **kwargs):
+        if published:
+            raise RuntimeError("crashed")
+        published.append(args)
+        return publish_concurrently(self, *args, **kwargs)
+
+    mocker.patch.object(DiscordNewReleaseHooker, "publish_concurrently", crash_after_first_publish)
+    update_webhook_status = mocker.patch.object(DiscordNewReleasePush, "_update_webhook_status")
+    with pgsql_session() as session:
+        task = DiscordNewReleasePush(session, max_workers=1)
+        task.release_chunk_size = 10
+        task.delivery_lease = timedelta(0)
+        checkpoint = task.executed_at
+        with pytest.raises(RuntimeError):
+            task.execute()
+
+    assert update_webhook_status.called
+    assert "aborted after" in caplog.text
+    first_sent = _sent_embed_count(execute_payload)
+    assert first_sent
+
+    mocker.stopall()
+    execute_payload = mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    with pgsql_session() as session:
+        task = DiscordNewReleasePush(session)
+        task.delivery_lease = timedelta(0)
+        # the execution time was updated, the undelivered releases are resumed from the deliveries.
+        task.execute()
+        assert not DiscordDeliveryHelper.count_pending(session)
+
+        releases = ReleaseHelper.fetch_new_releases(session, checkpoint)
+        expected_embed_count = sum(
+            len([r for r in releases if webhook.is_nsfw or not r.is_adult])
+            for webhook in Webhook.all()
+        )
+    assert first_sent + _sent_embed_count(execute_payload) == expected_embed_count
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_plurk_push_enqueues_failed_releases(mocker: MockerFixture):
+    from figure_hook.Models import PublishJob
+
+    error = {'code': 400, 'reason': 'BAD REQUEST', 'content': {'error_text': 'anti-flood-same-content'}}
+    mocker.patch('plurk_oauth.PlurkAPI.callAPI', side_effect=[None, None] + [{"a": True}] * 1000)
+    mocker.patch('plurk_oauth.PlurkAPI.error', return_value=error)
+    mocker.patch('time.sleep')
+
+    with pgsql_session() as session:
+        task = PlurkNewReleasePush(session)
+        task.execute()
+        failed_release_ids = [release.id for release in task.failed_releases]
+
+    assert len(failed_release_ids) == 2
+    with pgsql_session() as session:
+        assert sorted(job.release_id for job in PublishJob.all()) == sorted(failed_release_ids)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_plurk_publish_job_push(mocker: MockerFixture):
+    from figure_hook.Helpers.publish_job_helper import PublishJobHelper
+    from figure_hook.Models import ProductReleaseInfo, PublishJob
+    from figure_hook.Tasks.periodic import PlurkPublishJobPush
+
+    error = {'code': 400, 'reason': 'BAD REQUEST', 'content': {'error_text': 'anti-flood-same-content'}}
+    mocker.patch('plurk_oauth.PlurkAPI.callAPI', side_effect=[None] + [{"a": True}] * 1000)
+    mocker.patch('plurk_oauth.PlurkAPI.error', return_value=error)
+    mocker.patch('time.sleep')
+
+    with pgsql_session() as session:
+        release_ids = [release.id for release in ProductReleaseInfo.all()[:5]]
+        PublishJobHelper.enqueue(session, release_ids, "plurk")
+
+    stats = PlurkPublishJobPush(batch_size=2).execute()
+
+    assert stats.sending_success_count == 4
+    assert stats.sending_failed_count == 1
+    with pgsql_session() as session:
+        job, = PublishJob.all()
+        assert job.attempts == 1
+        assert job.next_attempt_at
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_discord_push_skips_dead_webhooks(mocker: MockerFixture):
+    from figure_hook.Models import DiscordDelivery
+
+    execute_payload = mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    with pgsql_session() as session:
+        dead_webhooks = Webhook.all()[:3]
+        Webhook.update_status(session, {webhook.id: False for webhook in dead_webhooks})
+        dead_channels = {webhook.channel_id for webhook in dead_webhooks}
+        live_count = len(Webhook.all()) - len(dead_webhooks)
+
+    decrypt_tokens = mocker.spy(Webhook, "decrypt_tokens")
+    with pgsql_session() as session:
+        stats = DiscordNewReleasePush(session).execute()
+        planned_channels = {delivery.channel_id for delivery in DiscordDelivery.all()}
+
+    assert stats.webhook_count == live_count
+    assert stats.sending_success_count == execute_payload.call_count
+    assert len(decrypt_tokens.call_args.args[0]) == live_count
+    assert planned_channels.isdisjoint(dead_channels)
+
+
+@pytest.mark.usefixtures("session")
+def test_webhook_revalidation(session):
+    from datetime import datetime
+
+    from figure_hook.Tasks.periodic import DiscordWebhookRevalidation
+    from tests.fake_servers import FakeDiscordServer
+
+    webhooks = {
+        "found": dict(is_existed=False),
+        "missing": dict(is_existed=False, missing_count=1),
+        "unauthorized": dict(is_existed=False, missing_count=1),
+        "unavailable": dict(is_existed=False),
+        "tombstoned": dict(is_existed=False, missing_count=DiscordWebhookRevalidation.max_missing_count),
+        "checked": dict(is_existed=False, checked_at=datetime.utcnow()),
+        "live": dict(is_existed=True),
+    }
+    for webhook_id, values in webhooks.items():
+        Webhook.create(channel_id=webhook_id, id=webhook_id, token="token", **values)
+    session.commit()
+
+    failing_webhooks = {"unauthorized": 401, "unavailable": 503}
+    with FakeDiscordServer(
+        missing_webhook_ids=["missing", "tombstoned", "checked"], failing_webhooks=failing_webhooks
+    ) as server:
+        task = DiscordWebhookRevalidation(session)
+        task.api_base = server.api_base
+        webhook_status = task.execute()
+        fetched_ids = {path.split("/")[4] for _, path, _ in server.requests}
+
+    assert webhook_status == {"found": True, "missing": False, "unauthorized": None, "unavailable": None}
+    assert fetched_ids == {"found", "missing", "unauthorized", "unavailable"}
+
+    session.expire_all()
+    assert Webhook.get_by_channel_id("found").is_live
+    assert Webhook.get_by_channel_id("missing").missing_count == 2
+    assert not Webhook.get_by_channel_id("missing").is_live
+    for webhook_id in failing_webhooks:
+        webhook = Webhook.get_by_channel_id(webhook_id)
+        assert webhook.checked_at
+        assert webhook.missing_count == webhooks[webhook_id].get("missing_count", 0)
+        assert not webhook.is_live
+
+    # every webhook is checked at most once per interval.
+    assert DiscordWebhookRevalidation(session).execute() == {}
+    task_name = DiscordWebhookRevalidation.__task_id__.name
+    assert session.execute(select(Task).where(Task.name == task_name)).scalar().executed_at
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_discord_push_publishes_webhooks_grouped_by_embeds(mocker: MockerFixture):
+    from figure_hook.Publishers.discord_hooker import DiscordNewReleaseHooker
+
+    mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    publish_concurrently = DiscordNewReleaseHooker.publish_concurrently
+    published_keys = []
+
+    def record_keys(self, webhooks, *args, **kwargs):
+        published_keys.append([(webhook.lang, webhook.is_nsfw) for webhook in webhooks])
+        return publish_concurrently(self, webhooks, *args, **kwargs)
+
+    mocker.patch.object(DiscordNewReleaseHooker, "publish_concurrently", record_keys)
+    with pgsql_session() as session:
+        DiscordNewReleasePush(session).execute()
+
+    assert published_keys
+    for keys in published_keys:
+        assert len(set(keys)) > 1
+        assert keys == sorted(keys)
+
+
+@pytest.mark.usefixtures("fake_data")
+def test_discord_push_does_not_lock_task_while_delivering(mocker: MockerFixture):
+    from figure_hook.database import PostgreSQLDB
+    from figure_hook.Publishers.discord_hooker import DiscordNewReleaseHooker
+
+    mocker.patch.object(RateLimitedWebhookAdapter, "execute_payload")
+    publish_concurrently = DiscordNewReleaseHooker.publish_concurrently
+    locked_by_others = []
+
+    def try_lock_task(self, *args, **kwargs):
+        with PostgreSQLDB().Session.begin() as other_session:
+            stmt = select(Task).where(Task.name == DiscordNewReleasePush.__task_id__.name).with_for_update(nowait=True)
+            locked_by_others.append(other_session.execute(stmt).scalar_one() is not None)
+        return publish_concurrently(self, *args, **kwargs)
+
+    mocker.patch.object(DiscordNewReleaseHooker, "publish_concurrently", try_lock_task)
+    with pgsql_session() as session:
+        task = DiscordNewReleasePush(session)
+        last_executed_at = task.executed_at
+        task.execute()
+        assert task.executed_at > last_executed_at
+
+    assert locked_by_others and all(locked_by_others)
@@ -1,18 +1,25 @@
+import time
 from typing import Type
 
 import pytest
 from pytest_mock import MockerFixture
 
+from figure_hook.Models.source_checksum import SourceChecksum
+from figure_hook.SourceChecksum import abcs
 from figure_hook.SourceChecksum.abcs import (ProductAnnouncementChecksum,
                                              BaseSourceSiteChecksum,
                                              ShipmentChecksum,
+                                             digest_chunks,
                                              generate_checksum)
 from figure_hook.SourceChecksum.delay_checksum import GSCDelayChecksum
 from figure_hook.SourceChecksum.product_announcement_checksum import (
     AlterProductAnnouncementChecksum, GSCProductAnnouncementChecksum,
     NativeProductAnnouncementChecksum)
+from figure_hook.SourceChecksum.runner import SourceChecksumRunner
 from figure_hook.SourceChecksum.shipment_checksum import GSCShipmentChecksum
+from figure_hook.utils.http import create_http_session
 from figure_hook.utils.scrapyd_api import ScrapydUtil
+from tests.fake_servers import FakeSourceSite
 
 
 def test_checksum_generation():
@@ -20,6 +27,13 @@ def test_checksum_generation():
     assert checksum
 
 
+def test_streamed_digest():
+    chunks = [b"kappa", b"keepo", b""]
+    assert digest_chunks(iter(chunks)) == generate_checksum(b"kappakeepo")
+    assert digest_chunks(chunks, "blake2b") == generate_checksum(*chunks, algorithm="blake2b")
+    assert len(digest_chunks(chunks, "blake2b")) == 128
+
+
 @pytest.mark.usefixtures("session")
 class BaseTestAnnouncementChecksum:
     __checksum_class__: Type[ProductAnnouncementChecksum]
@@ -36,7 +50,7 @@ class BaseTestAnnouncementChecksum:
         assert hasattr(site_checksum, "previous")
         assert hasattr(site_checksum, "is_changed")
         assert hasattr(site_checksum, "feature")
-        assert isinstance(site_checksum.feature, bytes)
+        assert isinstance(site_checksum.current, str)
 
     @pytest.mark.usefixtures("site_checksum")
     def test_update_checksum(self, site_checksum):
@@ -46,8 +60,8 @@ class BaseTestAnnouncementChecksum:
     @pytest.mark.usefixtures("site_checksum")
     def test_trigger_crawler(self, mocker: MockerFixture, site_checksum):
         crawler_trigger = mocker.patch(
-            "figure_hook.utils.scrapyd_api.ScrapydUtil.schedule_spider",
-            return_value="job"
+            "figure_hook.utils.scrapyd_api.ScrapydUtil.dispatch",
+            return_value=["job"]
         )
 
         jobs = site_checksum.trigger_crawler()
@@ -92,3 +106,132 @@ class TestGSCShipment(BaseTestSourceSiteChecksum):
 
 class TestGSCDelay(BaseTestSourceSiteChecksum):
     __checksum_cls__ = GSCDelayChecksum
+
+
+class LocalSiteChecksum(BaseSourceSiteChecksum):
+    __source_site__ = "local"
+    url = ""
+
+    def _extract_feature(self) -> bytes:
+        return self._conditional_request(self.url).content
+
+
+class StreamedLocalSiteChecksum(LocalSiteChecksum):
+    chunk_size = 4
+
+    def _extract_feature(self):
+        return self._stream_content(self._conditional_request(self.url, stream=True))
+
+
+@pytest.mark.usefixtures("session")
+class TestConditionalChecksum:
+    @pytest.fixture
+    def source_site(self, monkeypatch):
+        with FakeSourceSite(b"<html>first</html>") as site:
+            monkeypatch.setattr(LocalSiteChecksum, "url", f"{site.url}/products")
+            yield site
+
+    def test_validators_are_saved(self, session, source_site: FakeSourceSite):
+        checksum = LocalSiteChecksum()
+        assert checksum.is_changed
+        checksum.update()
+
+        saved = SourceChecksum.get_by_site(LocalSiteChecksum.__source_site__)
+        assert saved.etag == source_site.etag
+        assert saved.last_modified == source_site.last_modified
+
+    def test_not_modified_source_is_unchanged(self, session, source_site: FakeSourceSite):
+        LocalSiteChecksum().update()
+        session.commit()
+
+        checksum = LocalSiteChecksum()
+        assert checksum.not_modified
+        assert checksum.feature is None
+        assert not checksum.is_changed
+        assert source_site.not_modified_count == 1
+        _, _, body = source_site.requests[-1]
+        assert body == b""
+
+    def test_modified_source_is_changed(self, session, source_site: FakeSourceSite):
+        LocalSiteChecksum().update()
+        session.commit()
+
+        source_site.modify(b"<html>second</html>")
+        checksum = LocalSiteChecksum()
+        assert not checksum.not_modified
+        assert checksum.feature == b"<html>second</html>"
+        assert checksum.is_changed
+
+        checksum.update()
+        assert SourceChecksum.get_by_site(LocalSiteChecksum.__source_site__).etag == source_site.etag
+        assert not LocalSiteChecksum().is_changed
+
+    def test_new_validators_of_unchanged_source_are_saved(self, session, source_site: FakeSourceSite):
+        source_site.use_etag = False
+        source_site.use_last_modified = False
+        LocalSiteChecksum().update()
+        session.commit()
+
+        source_site.use_etag = True
+        result = SourceChecksumRunner([LocalSiteChecksum(lazy=True)]).run(update=False)
+        assert len(result.unchanged) == 1
+        session.commit()
+
+        assert SourceChecksum.get_by_site(LocalSiteChecksum.__source_site__).etag == source_site.etag
+        assert LocalSiteChecksum().not_modified
+        assert source_site.not_modified_count == 1
+
+    def test_not_modified_source_keeps_validators(self, session, source_site: FakeSourceSite):
+        LocalSiteChecksum().update()
+        session.commit()
+
+        checksum = LocalSiteChecksum()
+        assert not checksum.has_new_validators
+        checksum.update_validators()
+        assert not session.dirty
+
+    def test_last_modified_only(self, session, source_site: FakeSourceSite):
+        source_site.use_etag = False
+        LocalSiteChecksum().update()
+        session.commit()
+
+        assert not LocalSiteChecksum().is_changed
+        assert source_site.not_modified_count == 1
+
+        source_site.modify(b"<html>second</html>", modified_at=time.time() + 60)
+        assert LocalSiteChecksum().is_changed
+
+    def test_checksums_share_http_session(self, session, source_site: FakeSourceSite):
+        with create_http_session() as http_session:
+            LocalSiteChecksum(http_session=http_session).update()
+            LocalSiteChecksum(http_session=http_session)
+
+        assert len(source_site.requests) == 2
+        assert len(source_site.client_addresses) == 1
+
+
+@pytest.mark.usefixtures("session")
+class TestStreamedChecksum:
+    @pytest.fixture
+    def source_site(self, monkeypatch):
+        with FakeSourceSite(b"<html>streamed</html>") as site:
+            monkeypatch.setattr(LocalSiteChecksum, "url", f"{site.url}/products")
+            yield site
+
+    def test_streamed_feature_is_digested_once(self, mocker, source_site):
+        expected = generate_checksum(b"<html>streamed</html>")
+        spy = mocker.spy(abcs, "digest_chunks")
+        checksum = StreamedLocalSiteChecksum()
+
+        assert checksum.feature is None
+        assert checksum.current == expected
+        assert checksum.current == checksum.current
+        assert spy.call_count == 1
+
+    def test_hash_algorithm(self, monkeypatch, source_site):
+        monkeypatch.setattr(StreamedLocalSiteChecksum, "hash_algorithm", "blake2b")
+        checksum = StreamedLocalSiteChecksum()
+        assert checksum.current == generate_checksum(b"<html>streamed</html>", algorithm="blake2b")
+
+        checksum.update()
+        assert not StreamedLocalSiteChecksum().is_changed
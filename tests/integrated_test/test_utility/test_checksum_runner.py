@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from figure_hook.Models.source_checksum import SourceChecksum
+from figure_hook.SourceChecksum.abcs import BaseSourceSiteChecksum
+from figure_hook.SourceChecksum.runner import SourceChecksumRunner
+from tests.fake_servers import FakeSourceSite
+
+
+class SleepyChecksum(BaseSourceSiteChecksum):
+    delay = 0.3
+    content = b"content"
+
+    def _extract_feature(self) -> bytes:
+        time.sleep(self.delay)
+        return self.content
+
+
+class FirstChecksum(SleepyChecksum):
+    __source_site__ = "first"
+
+
+class SecondChecksum(SleepyChecksum):
+    __source_site__ = "second"
+
+
+class BrokenChecksum(SleepyChecksum):
+    __source_site__ = "broken"
+
+    def _extract_feature(self) -> bytes:
+        raise ConnectionError("unreachable")
+
+
+class ConditionalChecksum(BaseSourceSiteChecksum):
+    __source_site__ = "conditional"
+    url = ""
+
+    def _extract_feature(self) -> bytes:
+        return self._conditional_request(self.url).content
+
+
+class SlowChecksum(SleepyChecksum):
+    __source_site__ = "slow"
+    delay = 2
+    timeout = 0.5
+
+
+@pytest.mark.usefixtures("session")
+class TestSourceChecksumRunner:
+    def test_lazy_checksum_is_not_fetched(self, mocker):
+        extract_feature = mocker.patch.object(FirstChecksum, "_extract_feature")
+        FirstChecksum(lazy=True)
+        FirstChecksum(lazy=False)
+        assert extract_feature.call_count == 1
+
+    def test_features_are_fetched_concurrently(self, session):
+        checksums = [FirstChecksum(lazy=True), SecondChecksum(lazy=True)]
+        started_at = time.monotonic()
+        result = SourceChecksumRunner(checksums).run()
+        elapsed = time.monotonic() - started_at
+
+        assert elapsed < SleepyChecksum.delay * 2
+        assert result.changed == checksums
+        assert not result.unchanged
+        assert not result.failed
+
+    def test_session_is_only_used_by_the_calling_thread(self, session, monkeypatch):
+        threads = []
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            print('STMT', threading.current_thread().name, args[2][:80])
+
+        with FakeSourceSite(b"<html>content</html>") as site:
+            monkeypatch.setattr(ConditionalChecksum, "url", f"{site.url}/products")
+            checksums = [ConditionalChecksum(lazy=True)]
+            # the validators would be loaded again when they are read.
+            session.expire_all()
+            from sqlalchemy import inspect as _i
+            print('UNL', _i(checksums[0]._BaseSourceSiteChecksum__source_checksum).unloaded)
+
+            connection = session.connection()
+            event.listen(connection, "before_cursor_execute", record_thread)
+            try:
+                result = SourceChecksumRunner(checksums).run()
+            finally:
+                event.remove(connection, "before_cursor_execute", record_thread)
+
+        print('THREADS', threads, result)
+        assert result.changed == checksums
+        assert threads
+        assert set(threads) == {threading.current_thread()}
+
+    def test_changed_checksums_are_updated_in_one_transaction(self, session):
+        SourceChecksum.create(source=SecondChecksum.__source_site__, checksum="outdated")
+        unchanged = FirstChecksum(lazy=True)
+        unchanged.extract_feature()
+        unchanged.update()
+        session.commit()
+
+        changed = SecondChecksum(lazy=True)
+        result = SourceChecksumRunner([FirstChecksum(lazy=True), changed]).run()
+        assert result.changed == [changed]
+        assert len(result.unchanged) == 1
+
+        session.rollback()
+        assert SourceChecksum.get_by_site(SecondChecksum.__source_site__).checksum == "outdated"
+
+        result = SourceChecksumRunner([SecondChecksum(lazy=True)]).run()
+        session.commit()
+        assert SourceChecksum.get_by_site(SecondChecksum.__source_site__).checksum == changed.current
+        assert not SourceChecksumRunner([SecondChecksum(lazy=True)]).run().changed
+
+    def test_failed_and_timed_out_sources(self, session):
+        result = SourceChecksumRunner(
+            [FirstChecksum(lazy=True), BrokenChecksum(lazy=True), SlowChecksum(lazy=True)]
+        ).run()
+
+        assert [c.source_site for c in result.changed] == ["first"]
+        assert isinstance(result.failed["broken"], ConnectionError)
+        assert isinstance(result.failed["slow"], TimeoutError)
+        assert SourceChecksum.get_by_site("broken").checksum == "init"
+        assert SourceChecksum.get_by_site("slow").checksum == "init"
@@ -0,0 +1,104 @@
+import pytest
+
+from figure_hook.SourceChecksum.product_announcement_checksum import \
+    AlterProductAnnouncementChecksum
+from figure_hook.utils.scrapyd_api import (JobStatus, ScrapydDispatcher,
+                                           ScrapydError, ScrapydUtil)
+from tests.fake_servers import FakeClock, FakeScrapyd
+
+
+@pytest.fixture
+def scrapyd():
+    with FakeScrapyd(spiders=["gsc_recent", "alter_recent", "gsc_product"], delay=0.2) as server:
+        yield server
+
+
+@pytest.fixture
+def dispatcher(scrapyd: FakeScrapyd):
+    return ScrapydDispatcher(scrapyd.url, "product_crawler", max_workers=4)
+
+
+def test_dispatch_concurrently(scrapyd: FakeScrapyd, dispatcher: ScrapydDispatcher):
+    settings_list = [{"category": category, "begin_year": "2022"} for category in ("figure", "altair", "collabo")]
+    jobs = dispatcher.dispatch("alter_product", settings_list)
+
+    assert [job.settings for job in jobs] == settings_list
+    assert all(job.status == JobStatus.PENDING for job in jobs)
+    assert scrapyd.max_in_flight == 3
+    assert sorted(job["args"]["category"] for job in scrapyd.jobs.values()) == ["altair", "collabo", "figure"]
+    assert {job["spider"] for job in scrapyd.jobs.values()} == {"alter_product"}
+
+
+def test_active_spider_is_not_scheduled_again(scrapyd: FakeScrapyd, dispatcher: ScrapydDispatcher):
+    job, = dispatcher.dispatch("gsc_product", [{}])
+    assert dispatcher.dispatch("gsc_product", [{}, {}]) == []
+
+    scrapyd.start(job.id)
+    assert dispatcher.dispatch("gsc_product", [{}]) == []
+    assert job.status == JobStatus.RUNNING
+
+    scrapyd.finish(job.id)
+    assert len(dispatcher.dispatch("gsc_product", [{}])) == 1
+    assert job.status == JobStatus.FINISHED
+    assert len(scrapyd.schedules) == 2
+
+
+def test_failed_schedule_is_skipped(scrapyd: FakeScrapyd, dispatcher: ScrapydDispatcher, caplog):
+    scrapyd.failing_spiders.add("missing")
+    jobs = dispatcher.dispatch_many([("missing", {}), ("gsc_product", {})])
+
+    assert [job.spider for job in jobs] == ["gsc_product"]
+    assert "Failed to schedule missing" in caplog.text
+    with pytest.raises(ScrapydError):
+        dispatcher.schedule("missing")
+
+
+def test_poll_jobs_in_one_request(scrapyd: FakeScrapyd, dispatcher: ScrapydDispatcher):
+    jobs = dispatcher.dispatch_many([("gsc_product", {}), ("alter_product", {}), ("native_product", {})])
+    polled = len(scrapyd.job_lists)
+
+    scrapyd.start(jobs[0].id)
+    scrapyd.finish(jobs[1].id)
+    dispatcher.poll()
+
+    assert len(scrapyd.job_lists) == polled + 1
+    assert [job.status for job in jobs] == [JobStatus.RUNNING, JobStatus.FINISHED, JobStatus.PENDING]
+
+    scrapyd.jobs.pop(jobs[2].id)
+    dispatcher.poll()
+    assert jobs[2].status == JobStatus.UNKNOWN
+
+
+def test_wait_for_jobs(scrapyd: FakeScrapyd, dispatcher: ScrapydDispatcher):
+    job, = dispatcher.dispatch("gsc_product")
+    clock = FakeClock()
+
+    assert not dispatcher.wait([job], interval=5, timeout=12, clock=clock, sleep=clock.sleep)
+    assert clock.slept == [5, 5]
+
+    def finish_on_sleep(seconds):
+        clock.sleep(seconds)
+        scrapyd.finish(job.id)
+
+    assert dispatcher.wait([job], interval=5, clock=clock, sleep=finish_on_sleep)
+
+
+def test_schedule_recent_spiders(scrapyd: FakeScrapyd, monkeypatch):
+    monkeypatch.delenv("SCRAPYD_URL", raising=False)
+    util = ScrapydUtil(scrapyd.url, "product_crawler")
+    jobs = util.schedule_spiders()
+
+    assert sorted(job.spider for job in jobs) == ["alter_recent", "gsc_recent"]
+    assert scrapyd.max_in_flight == 2
+
+
+@pytest.mark.usefixtures("session")
+def test_trigger_crawler(scrapyd: FakeScrapyd, monkeypatch):
+    monkeypatch.delenv("SCRAPYD_URL", raising=False)
+    util = ScrapydUtil(scrapyd.url, "product_crawler")
+    checksum = AlterProductAnnouncementChecksum(util, lazy=True)
+
+    jobs = checksum.trigger_crawler()
+    assert len(jobs) == len(checksum.spider_configs)
+    assert scrapyd.max_in_flight == len(jobs)
+    assert checksum.trigger_crawler() == []
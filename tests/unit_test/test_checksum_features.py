@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from figure_hook.SourceChecksum.abcs import generate_checksum
+from figure_hook.SourceChecksum.delay_checksum import GSCDelayChecksum
+from figure_hook.SourceChecksum.features import RegionFeature
+from figure_hook.SourceChecksum.product_announcement_checksum import \
+    GSCProductAnnouncementChecksum
+from figure_hook.SourceChecksum.shipment_checksum import GSCShipmentChecksum
+
+fixtures = Path(__file__).parent.parent / "fixtures" / "html"
+
+
+def read_fixture(name: str) -> bytes:
+    return (fixtures / name).read_bytes()
+
+
+@pytest.mark.parametrize("region, site", [
+    (GSCProductAnnouncementChecksum.region, "gsc_announcement"),
+    (GSCDelayChecksum.region, "gsc_delay"),
+    (GSCShipmentChecksum.region, "gsc_shipment"),
+])
+class TestSiteRegion:
+    def test_volatile_nodes_are_ignored(self, region: RegionFeature, site):
+        original = region.extract(read_fixture(f"{site}.html"))
+        volatile = region.extract(read_fixture(f"{site}_volatile.html"))
+
+        assert original
+        assert generate_checksum(*original) == generate_checksum(*volatile)
+
+    def test_region_change_is_detected(self, region: RegionFeature, site):
+        original = region.extract(read_fixture(f"{site}.html"))
+        changed = region.extract(read_fixture(f"{site}_changed.html"))
+
+        assert len(changed) == len(original) + 1
+        assert generate_checksum(*original) != generate_checksum(*changed)
+
+    def test_streamed_content(self, region: RegionFeature, site):
+        content = read_fixture(f"{site}.html")
+        chunks = [content[i:i + 512] for i in range(0, len(content), 512)]
+
+        assert region.extract(chunks) == region.extract(content)
+
+
+def test_region_is_reduced_to_texts_and_links():
+    content = b"""
+    <html><body>
+      <div class="item new"><a href="/1">First<script>var t = 1;</script></a> <span class="stamp">10:00</span> tail</div>
+      <div class="other">Other</div>
+      <div class="item"><!-- comment --><img src="/2.jpg">Second</div>
+    </body></html>
+    """
+    region = RegionFeature("div", "item", ignored_classes=["stamp"])
+
+    assert region.extract(content) == [b"/1 First tail", b"/2.jpg Second"]
+
+
+def test_region_text_pattern():
+    content = b"<p><span class='title'>Delayed</span><span class='title'>Event</span></p>"
+    region = RegionFeature("span", "title", text_pattern="Delay")
+
+    assert region.extract(content) == [b"Delayed"]
+
+
+def test_region_of_any_tag():
+    content = b"<div class='item'>First</div><section class='item'>Second</section><p>Other</p>"
+
+    assert RegionFeature(None, "item").extract(content) == [b"First", b"Second"]
+    with pytest.raises(ValueError):
+        RegionFeature(None)
+
+
+def test_empty_region():
+    assert RegionFeature("div", "item").extract(b"<html><body></body></html>") == []
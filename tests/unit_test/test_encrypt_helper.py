@@ -27,3 +27,22 @@ def test_decrpyt_byte_to_byte():
     d_value = EncryptHelper.decrypt(e_value)
     assert type(d_value) is bytes
     assert d_value == value
+
+
+def test_decrypt_str_cached(mocker):
+    value = "cool"
+    e_value = EncryptHelper.encrypt_str(value)
+    decrypt_str = mocker.spy(EncryptHelper, "decrypt_str")
+
+    assert EncryptHelper.decrypt_str_cached(e_value) == value
+    assert EncryptHelper.decrypt_str_cached(e_value) == value
+    assert decrypt_str.call_count == 1
+
+
+def test_decrypt_str_many(mocker):
+    values = ["foo", "bar"]
+    e_values = [EncryptHelper.encrypt_str(value) for value in values]
+    decrypt_str = mocker.spy(EncryptHelper, "decrypt_str")
+
+    assert EncryptHelper.decrypt_str_many(e_values + e_values) == values + values
+    assert decrypt_str.call_count == 2
@@ -0,0 +1,32 @@
+import pytest
+import requests as rq
+
+from figure_hook.utils.http import create_http_session, shared_http_session
+from tests.fake_servers import FakeSourceSite
+
+
+def test_shared_http_session():
+    assert shared_http_session() is shared_http_session()
+
+
+def test_connections_are_reused():
+    with FakeSourceSite(b"content") as site, create_http_session() as session:
+        for _ in range(5):
+            assert session.get(f"{site.url}/page").content == b"content"
+
+        assert len(site.requests) == 5
+        assert len(site.client_addresses) == 1
+
+
+def test_unavailable_source_is_retried():
+    with FakeSourceSite(b"content", failures=2) as site, create_http_session(backoff_factor=0) as session:
+        response = session.get(site.url)
+
+        assert response.status_code == 200
+        assert len(site.requests) == 3
+
+
+def test_default_timeout():
+    with FakeSourceSite(b"content", delay=1) as site, create_http_session(retries=0, timeout=0.1) as session:
+        with pytest.raises(rq.RequestException):
+            session.get(site.url)
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from itertools import product
 from figure_hook.Models import (Category, Company, Paintwork, Product,
                                 ProductOfficialImage, ProductReleaseInfo,
@@ -6,6 +7,22 @@ from figure_hook.constants import SourceSite
 from datetime import date, datetime
 
 import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def count_statements(engine):
+    """Collect the statements executed by `engine` in the block."""
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
 
 
 @pytest.mark.usefixtures("session")
@@ -491,3 +508,161 @@ class TestWebhook:
         assert type(w.token) is str
         assert type(w.decrypted_token) is str
         assert w.decrypted_token == token
+
+    def test_decrypt_tokens(self):
+        webhooks = [
+            Webhook.create(channel_id=str(i), id=f"id-{i}", token=f"token-{i}", lang="en")
+            for i in range(3)
+        ]
+
+        tokens = Webhook.decrypt_tokens(webhooks)
+        assert tokens == {f"id-{i}": f"token-{i}" for i in range(3)}
+
+    def test_update_status(self, session):
+        for i in range(5):
+            Webhook.create(channel_id=str(i), id=f"id-{i}", token=f"token-{i}", is_existed=True)
+        session.commit()
+
+        with count_statements(session.get_bind()) as statements:
+            Webhook.update_status(session, {"id-0": False, "id-1": True, "id-2": False, "id-3": False})
+
+        assert len(statements) == 2
+        assert all(s.startswith("UPDATE webhook") for s in statements)
+
+        session.expire_all()
+        status = {w.id: w.is_existed for w in Webhook.all()}
+        assert status == {"id-0": False, "id-1": True, "id-2": False, "id-3": False, "id-4": True}
+
+    def test_update_status_of_nothing(self, session):
+        Webhook.update_status(session, {})
+
+    def test_is_live(self, session):
+        for i, is_existed in enumerate((None, True, False)):
+            Webhook.create(channel_id=str(i), id=f"id-{i}", token=f"token-{i}", is_existed=is_existed)
+        session.commit()
+
+        assert [w.is_live for w in Webhook.all()] == [True, True, False]
+        assert {w.id for w in Webhook.where(is_live=True)} == {"id-0", "id-1"}
+
+    def test_update_revalidation(self, session):
+        for i in range(2):
+            Webhook.create(channel_id=str(i), id=f"id-{i}", token=f"token-{i}", is_existed=False, missing_count=2)
+        session.commit()
+
+        Webhook.update_revalidation(session, {"id-0": True, "id-1": False})
+        session.expire_all()
+
+        found, missing = Webhook.all()
+        assert (found.is_existed, found.missing_count) == (True, 0)
+        assert (missing.is_existed, missing.missing_count) == (False, 3)
+        assert found.checked_at and missing.checked_at
+
+
+@pytest.mark.usefixtures("session")
+class TestUniqueMany:
+    @pytest.fixture
+    def statements(self, session):
+        with count_statements(session.get_bind()) as statements:
+            yield statements
+
+    def test_as_unique_many(self):
+        existed = Company.create(name="GSC")
+
+        companies = Company.as_unique_many(["GSC", "Alter", None, "Alter", "Max Factory"])
+
+        assert len(companies) == 5
+        assert companies[0] is existed
+        assert companies[1] is companies[3]
+        assert companies[2] is None
+        assert all(c.id for c in companies if c)
+        assert Company.as_unique(name="Max Factory") is companies[4]
+
+    def test_as_unique_many_round_trips(self, statements):
+        names = [f"sculptor-{i}" for i in range(30)]
+        Sculptor.create(name=names[0])
+        statements.clear()
+
+        sculptors = Sculptor.as_unique_many(names)
+        assert len(statements) == 2
+        assert [s.name for s in sculptors] == names
+
+        statements.clear()
+        assert Sculptor.as_unique_many(names) == sculptors
+        assert not statements
+
+    def test_as_unique_many_with_rows_inserted_by_others(self, mocker, session):
+        existed = Paintwork.create(name="Kappa")
+        # the row was inserted after selecting, so the insert would conflict.
+        fetch_unique_many = Paintwork._fetch_unique_many
+        fetched = []
+
+        def fetch_after_insert(session, cache, values):
+            fetched.append(values)
+            if len(fetched) == 1:
+                return values
+            return fetch_unique_many(session, cache, values)
+
+        mocker.patch.object(Paintwork, "_fetch_unique_many", side_effect=fetch_after_insert)
+
+        paintworks = Paintwork.as_unique_many(["Kappa", "Keepo"])
+
+        assert paintworks[0].id == existed.id
+        assert paintworks[1].name == "Keepo"
+        assert session.query(Paintwork).count() == 2
+
+
+class TestUniqueIdentityCache:
+    @pytest.fixture
+    def identity_cache(self):
+        from figure_hook.Models.base import (disable_unique_identity_cache,
+                                             enable_unique_identity_cache)
+
+        yield enable_unique_identity_cache(maxsize=2)
+        disable_unique_identity_cache()
+
+    def test_lru_eviction(self):
+        from figure_hook.Models.base import UniqueIdentityCache
+
+        cache = UniqueIdentityCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_shared_between_sessions(self, session, identity_cache):
+        company = Company.as_unique(name="GSC")
+        series, = Series.as_unique_many(["Fate"])
+        session.commit()
+        assert identity_cache.get((Company, "GSC")) == company.id
+        assert identity_cache.get((Series, "Fate")) == series.id
+
+        from sqlalchemy.orm import Session
+
+        from figure_hook.Models.base import Model
+
+        engine = session.get_bind()
+        with Session(engine) as other_session:
+            Model.set_session(other_session)
+            try:
+                with count_statements(engine) as statements:
+                    assert Company.as_unique(name="GSC").id == company.id
+                    assert Series.as_unique_many(["Fate"])[0].id == series.id
+                assert not statements
+            finally:
+                Model.set_session(session)
+
+    def test_discarded_after_rollback(self, session, identity_cache):
+        Company.as_unique(name="GSC")
+        session.commit()
+        assert identity_cache.get((Company, "GSC"))
+
+        Company.as_unique(name="Alter")
+        session.rollback()
+
+        assert identity_cache.get((Company, "GSC")) is None
+        assert identity_cache.get((Company, "Alter")) is None
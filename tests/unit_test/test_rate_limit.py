@@ -0,0 +1,81 @@
+import pytest
+
+from figure_hook.Adapters.webhook_adapter import DiscordRateLimiter
+from figure_hook.utils.rate_limit import AdaptiveTokenBucket, TokenBucket
+from tests.fake_servers import FakeClock
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.slept == [pytest.approx(0.5)]
+
+    clock.now += 10
+    assert bucket.acquire() == 0
+
+
+def test_token_bucket_refund():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0
+    bucket.refund()
+    assert bucket.acquire() == 0
+
+    # the refunded tokens never exceed the capacity.
+    bucket.refund()
+    bucket.refund()
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1)
+
+
+def test_token_bucket_with_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+def test_discord_rate_limiter_waits_for_bucket():
+    clock = FakeClock()
+    limiter = DiscordRateLimiter(clock=clock, sleep=clock.sleep)
+
+    limiter.acquire("a")
+    limiter.update("a", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "2"})
+    limiter.acquire("b")
+    assert clock.now == 0
+
+    limiter.acquire("a")
+    assert clock.now == pytest.approx(2)
+
+
+def test_discord_rate_limiter_global_rate_limited():
+    clock = FakeClock()
+    limiter = DiscordRateLimiter(clock=clock, sleep=clock.sleep)
+
+    limiter.rate_limited("a", retry_after=3, is_global=True)
+    limiter.acquire("b")
+    assert clock.now == pytest.approx(3)
+    assert limiter.rate_limited_count == 1
+
+
+def test_adaptive_token_bucket_backoff():
+    clock = FakeClock()
+    bucket = AdaptiveTokenBucket(rate=1, capacity=1, min_backoff=2, max_backoff=5, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0
+    bucket.throttled()
+    assert bucket.rate == 0.5
+    assert bucket.acquire() == pytest.approx(2)
+
+    bucket.throttled()
+    bucket.throttled()
+    assert bucket.backoff == 5
+
+    bucket.succeeded()
+    assert bucket.backoff == 0
+    assert bucket.rate == pytest.approx(0.125 + 1 / 50)
+    clock.now += 10
+    assert bucket.acquire() == 0
@@ -104,8 +104,8 @@ def update_fake_release_created_time(session):
         session.add(pr)
 
 
-def insert_fake_products(session):
-    products = create_fake_products(100)
+def insert_fake_products(session, amount: int = 100):
+    products = create_fake_products(amount)
     for p in products:
         product_model = ProductModelFactory.createProduct(p)
         session.add(product_model)